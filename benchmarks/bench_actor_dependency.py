@@ -0,0 +1,57 @@
+import argparse
+import contextlib
+import io
+import time
+
+from src.erdg_builder import ERDGTestGenerator
+from benchmarks.synthetic import generate_summary
+
+
+# ======== Step 1 Scaling Benchmark ========
+def legacy_pairwise_edges(generator):
+    """The original O(R^2 * A) loop: rescan N_A for the target sets of every rebec pair"""
+    rebec_names = [r.name for r in generator.N_R]
+    edges = []
+    for i, r1 in enumerate(rebec_names):
+        for r2 in rebec_names[i + 1:]:
+            r1_targets, r2_targets = [], []
+            for activation in generator.N_A:
+                if activation.sender_rebec == r1 and activation.target_rebec not in r1_targets:
+                    r1_targets.append(activation.target_rebec)
+                elif activation.sender_rebec == r2:
+                    r2_targets.append(activation.target_rebec)
+            common_targets = [t for t in r1_targets if t in r2_targets]
+            if generator._are_dependent_through(r1, r2, common_targets):
+                edges.append((r1, r2))
+    return edges
+
+
+def run(sizes, fan_out, skip_legacy_above):
+    print(f"{'rebecs':>8} {'activations':>12} {'edges':>8} {'pairwise (s)':>13} {'incidence (s)':>14} {'speedup':>8}")
+    for size in sizes:
+        generator = ERDGTestGenerator(generate_summary(actors=size, classes=max(1, size // 10), fan_out=fan_out))
+        with contextlib.redirect_stdout(io.StringIO()):
+            generator.build_erdg()
+
+        start = time.perf_counter()
+        edges = generator._actor_dependency_edges()
+        fast = time.perf_counter() - start
+
+        if size <= skip_legacy_above:
+            start = time.perf_counter()
+            legacy = legacy_pairwise_edges(generator)
+            slow = time.perf_counter() - start
+            assert legacy == edges, "incidence-matrix edges differ from the pairwise loop"
+            print(f"{size:>8} {len(generator.N_A):>12} {len(edges):>8} {slow:>13.3f} {fast:>14.3f} {slow / fast:>7.1f}x")
+        else:
+            print(f"{size:>8} {len(generator.N_A):>12} {len(edges):>8} {'-':>13} {fast:>14.3f} {'-':>8}")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Step 1 (actor dependency graph) scaling benchmark")
+    arg_parser.add_argument("--sizes", type=int, nargs="+", default=[50, 100, 200, 400, 1000, 2000])
+    arg_parser.add_argument("--fan-out", type=int, default=2)
+    arg_parser.add_argument("--skip-legacy-above", type=int, default=400,
+                            help="only time the pairwise loop up to this many rebecs")
+    args = arg_parser.parse_args()
+    run(args.sizes, args.fan_out, args.skip_legacy_above)
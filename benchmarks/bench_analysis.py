@@ -0,0 +1,47 @@
+import argparse
+import contextlib
+import io
+import time
+import tracemalloc
+
+from src.parser_cache import get_parser
+from src.ast_analyzer import ASTAnalyzer, build_summary_parser
+from benchmarks.synthetic import generate_model_source
+
+
+# ======== AST Analysis Benchmark: Visitor vs. Single Pass ========
+def visitor_analysis(parser, code):
+    with contextlib.redirect_stdout(io.StringIO()):
+        tree = parser.parse(code)
+        analyzer = ASTAnalyzer()
+        analyzer.visit(tree)
+    return analyzer.get_summary()
+
+
+def measure(label, func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {label:<12} {elapsed:8.3f}s  peak {peak / 2**20:8.1f} MiB")
+    return result
+
+
+def run(sizes):
+    tree_parser = get_parser()
+    summary_parser = build_summary_parser()
+    for size in sizes:
+        code = generate_model_source(actors=size, classes=max(1, size // 4), methods_per_class=6, fan_out=3)
+        print(f"{size} actors, {len(code) / 2**20:.2f} MiB of source")
+        tree_summary = measure("visitor", lambda: visitor_analysis(tree_parser, code))
+        fused_summary = measure("single-pass", lambda: summary_parser.parse(code))
+        assert tree_summary == fused_summary, "single-pass summary differs from the visitor summary"
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Compare Visitor-based and single-pass AST analysis")
+    arg_parser.add_argument("--sizes", type=int, nargs="+", default=[500, 2000, 8000])
+    args = arg_parser.parse_args()
+    run(args.sizes)
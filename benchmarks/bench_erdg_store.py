@@ -0,0 +1,51 @@
+import argparse
+import os
+import pickle
+import tempfile
+import time
+
+from src.main import analyze_model
+from src.erdg_builder import ERDGTestGenerator
+from benchmarks.synthetic import generate_model_source
+
+
+# ======== ERDG Store Benchmark: rebuild from source vs. save/load ========
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def build(code):
+    summary, _ = analyze_model(code, single_pass=True)
+    generator = ERDGTestGenerator(summary)
+    generator.iter_dependency_guided_tests()
+    return generator
+
+
+def run(sizes):
+    directory = tempfile.mkdtemp(prefix="erdg-store-")
+    for actors in sizes:
+        code = generate_model_source(actors=actors, classes=max(1, actors // 10), methods_per_class=4, fan_out=2)
+        generator, rebuild = timed(lambda: build(code))
+        path = os.path.join(directory, f"a{actors}.erdg")
+        _, save = timed(lambda: generator.save(path))
+        loaded, load = timed(lambda: ERDGTestGenerator.load(path))
+        _, first_case = timed(lambda: next(loaded.iter_prioritized_test_cases()))
+        _, touch_nodes = timed(lambda: sum(1 for _ in loaded.N_A))
+        pickled = len(pickle.dumps(generator, protocol=pickle.HIGHEST_PROTOCOL))
+        print(f"{actors} actors, {len(generator.graph.nodes)} ERDG nodes")
+        print(f"  parse + steps 1-4   {rebuild * 1000:10.1f} ms")
+        print(f"  save                {save * 1000:10.1f} ms   {os.path.getsize(path) / 2**20:7.2f} MiB "
+              f"(pickle: {pickled / 2**20:.2f} MiB)")
+        print(f"  load (mmap)         {load * 1000:10.1f} ms   first test case +{first_case * 1000:.1f} ms, "
+              f"every N_A node +{touch_nodes * 1000:.1f} ms")
+        os.remove(path)
+    os.rmdir(directory)
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Compare rebuilding an ERDG from source with loading a saved one")
+    arg_parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 7000])
+    args = arg_parser.parse_args()
+    run(args.sizes)
@@ -0,0 +1,57 @@
+import argparse
+import random
+import time
+
+from src.erdg_builder import ERDGTestGenerator
+
+
+# ======== AG/HAG Graph Algorithm Scaling Check ========
+def chain_graph(num_nodes: int, extra_edges: int, seed: int = 0):
+    """A single long path (deep DFS) plus random chords, shuffled edge order"""
+    rnd = random.Random(seed)
+    nodes = [f"r{i}" for i in range(num_nodes)]
+    edges = [(nodes[i], nodes[i + 1]) for i in range(num_nodes - 1)]
+    for _ in range(extra_edges):
+        a, b = sorted(rnd.sample(range(num_nodes), 2))
+        edges.append((nodes[a], nodes[b]))
+    rnd.shuffle(edges)
+    return {"nodes": nodes, "edges": edges}
+
+
+def layered_dag(num_groups: int, seed: int = 0):
+    """HAG-shaped DAG: every group points at a few later groups"""
+    rnd = random.Random(seed)
+    edges = set()
+    for i in range(num_groups - 1):
+        edges.add((i, i + 1))
+        for _ in range(2):
+            j = rnd.randrange(i + 1, num_groups)
+            edges.add((i, j))
+    return {"groups": [[f"r{i}"] for i in range(num_groups)], "edges": sorted(edges)}
+
+
+def run(num_nodes: int):
+    generator = ERDGTestGenerator({"actors": {}, "main_instances": []})
+
+    graph = chain_graph(num_nodes, extra_edges=num_nodes // 2)
+    start = time.perf_counter()
+    components = generator._find_connected_components(graph)
+    elapsed = time.perf_counter() - start
+    assert len(components) == 1 and len(components[0]) == num_nodes
+    print(f"connected components: {num_nodes} nodes, {len(graph['edges'])} edges in {elapsed:.3f}s")
+
+    hag = layered_dag(num_nodes)
+    start = time.perf_counter()
+    order = generator._topological_sort(hag)
+    elapsed = time.perf_counter() - start
+    position = {group: i for i, group in enumerate(order)}
+    assert len(order) == num_nodes
+    assert all(position[src] < position[dst] for src, dst in hag["edges"])
+    print(f"topological sort:     {num_nodes} groups, {len(hag['edges'])} edges in {elapsed:.3f}s")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="AG components / HAG topological sort on large synthetic graphs")
+    arg_parser.add_argument("--nodes", type=int, default=150_000)
+    args = arg_parser.parse_args()
+    run(args.nodes)
@@ -0,0 +1,69 @@
+import argparse
+import copy
+import time
+from itertools import islice
+
+from src.erdg_builder import ERDGTestGenerator
+from benchmarks.synthetic import generate_summary
+
+
+# ======== Incremental Re-analysis Benchmark: edit one message server ========
+def edit_data(summary):
+    """Class0.m0 now also writes every state variable"""
+    method = summary["actors"]["Class0"]["methods"]["m0"]
+    method["writes"] = method["writes"] | summary["actors"]["Class0"]["statevars"]
+
+
+def edit_send(summary):
+    """Class0.m1 gets one more send"""
+    summary["actors"]["Class0"]["methods"]["m1"]["sends"].append(("r1", "m0"))
+
+
+def edit_method(summary):
+    """Class0 gets a new message server, which changes N_M"""
+    summary["actors"]["Class0"]["methods"]["extra"] = {"priority": None, "sends": [("self", "m0")],
+                                                       "reads": set(), "writes": set()}
+
+
+EDITS = {"data": edit_data, "send": edit_send, "new method": edit_method}
+
+
+def fingerprint(generator):
+    cases = [(t.actor_priorities, t.method_priorities) for t in islice(generator.iter_prioritized_test_cases(), 50)]
+    return (generator.AG["edges"], generator.actor_groups, generator.HAG["edges"], generator.topological_order,
+            generator.E_I, {c: list(orderings) for c, orderings in generator.class_message_permutations.items()},
+            generator.num_test_cases, cases)
+
+
+def run(sizes, partial_order):
+    for size in sizes:
+        summary = generate_summary(actors=size, classes=max(1, size // 10), methods_per_class=5, fan_out=2)
+        print(f"{size} actors")
+        for label, edit in EDITS.items():
+            generator = ERDGTestGenerator(summary, partial_order_reduction=partial_order)
+            generator._prepare_dependency_guided_tests(materialize=False)
+
+            edited = copy.deepcopy(summary)
+            edit(edited)
+
+            start = time.perf_counter()
+            report = generator.update_analysis(edited)
+            incremental = time.perf_counter() - start
+
+            start = time.perf_counter()
+            fresh = ERDGTestGenerator(edited, partial_order_reduction=partial_order)
+            fresh._prepare_dependency_guided_tests(materialize=False)
+            full = time.perf_counter() - start
+
+            assert fingerprint(generator) == fingerprint(fresh), f"incremental result differs after '{label}' edit"
+            print(f"  {label:<11} full {full * 1000:8.1f} ms  incremental {incremental * 1000:8.1f} ms  "
+                  f"({report['rebuilt_instances']} instances rebuilt, {report['rechecked_pairs']} pairs re-checked, "
+                  f"{len(report['reused_classes'])} classes reused)")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Compare a full rebuild with update_analysis after a small edit")
+    arg_parser.add_argument("--sizes", type=int, nargs="+", default=[200, 1000, 3000])
+    arg_parser.add_argument("--partial-order", action="store_true")
+    args = arg_parser.parse_args()
+    run(args.sizes, args.partial_order)
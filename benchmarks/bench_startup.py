@@ -0,0 +1,47 @@
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+
+# ======== Startup Benchmark: cold vs. cached parser tables ========
+def time_run(command, env):
+    start = time.perf_counter()
+    subprocess.run(command, env=env, check=True, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def run(repeat):
+    cache_dir = tempfile.mkdtemp(prefix="erdg-cache-")
+    env = dict(os.environ, ERDG_CACHE_DIR=cache_dir)
+    # --no-cache skips the result cache, so every run parses and only the parser tables are cached
+    command = [sys.executable, "-m", "src.main", "--count-only", "--no-cache"]
+    cached_result = [sys.executable, "-m", "src.main", "--count-only"]
+    imports = [sys.executable, "-c", "import src.main"]
+    try:
+        cold = []
+        for _ in range(repeat):
+            shutil.rmtree(cache_dir, ignore_errors=True)
+            cold.append(time_run(command, env))
+        warm = [time_run(command, env) for _ in range(repeat)]
+        time_run(cached_result, env)  # store the result
+        hits = [time_run(cached_result, env) for _ in range(repeat)]
+        baseline = [time_run(imports, env) for _ in range(repeat)]
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    print(f"  interpreter + imports          {statistics.median(baseline) * 1000:8.1f} ms")
+    print(f"  --count-only, no parser tables {statistics.median(cold) * 1000:8.1f} ms")
+    print(f"  --count-only, cached tables    {statistics.median(warm) * 1000:8.1f} ms")
+    print(f"  --count-only, result cache hit {statistics.median(hits) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Measure cold-start time of the command line tool")
+    arg_parser.add_argument("--repeat", type=int, default=10)
+    args = arg_parser.parse_args()
+    run(args.repeat)
@@ -0,0 +1,41 @@
+import argparse
+import gc
+import tracemalloc
+from itertools import islice
+
+from src.erdg_builder import ERDGTestGenerator
+from benchmarks.synthetic import generate_summary
+
+
+# ======== Test Case Memory Benchmark: bytes per materialized test case ========
+def measure(actors, classes, methods, fan_out, cases):
+    summary = generate_summary(actors=actors, classes=classes, methods_per_class=methods, fan_out=fan_out, seed=0)
+    generator = ERDGTestGenerator(summary)
+
+    gc.collect()
+    tracemalloc.start()
+    generator._prepare_dependency_guided_tests(materialize=False)
+    erdg_bytes = tracemalloc.get_traced_memory()[0]
+    nodes = len(generator.N_R) + len(generator.N_M) + len(generator.N_A)
+
+    before = tracemalloc.get_traced_memory()[0]
+    test_cases = list(islice(generator.iter_prioritized_test_cases(), cases))
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return nodes, erdg_bytes, len(test_cases), (after - before) / max(len(test_cases), 1)
+
+
+def run(shapes, cases):
+    print(f"{'shape (actors/classes/methods/fan-out)':<40} {'ERDG nodes':>10} {'steps 1-4 MiB':>14} "
+          f"{'cases':>8} {'bytes/case':>11}")
+    for actors, classes, methods, fan_out in shapes:
+        nodes, erdg_bytes, count, per_case = measure(actors, classes, methods, fan_out, cases)
+        print(f"{f'{actors}/{classes}/{methods}/{fan_out}':<40} {nodes:>10} {erdg_bytes / 2**20:>14.2f} "
+              f"{count:>8} {per_case:>11.0f}")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Traced memory of the ERDG and of materialized test cases")
+    arg_parser.add_argument("--cases", type=int, default=100000, help="test cases to materialize per shape")
+    args = arg_parser.parse_args()
+    run([(20, 5, 4, 1), (100, 10, 4, 2), (400, 40, 6, 2)], args.cases)
@@ -0,0 +1,194 @@
+import argparse
+import gc
+import glob
+import json
+import os
+import sys
+import time
+from itertools import islice
+
+from src.main import analyze_model
+from src.erdg_builder import ERDGTestGenerator
+from src.metrics import MetricsRecorder, measure_step
+from benchmarks.synthetic import generate_model_source
+
+
+# ======== Benchmark Suite: shipped models + synthetic scaling models ========
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+MODEL_GLOB = "Benchmark/*.txt"
+
+# (actors, classes, methods per class, fan-out, shared-variable density)
+SYNTHETIC_SHAPES = [
+    (20, 5, 4, 1, 0.3),
+    (100, 10, 4, 2, 0.3),
+    (400, 40, 6, 2, 0.5),
+]
+
+# Differences below these floors are noise, whatever the relative change
+NOISE_FLOOR_SECONDS = 0.01
+NOISE_FLOOR_BYTES = 64 * 1024
+# Baseline entry holding the calibration time of the machine that wrote it
+CALIBRATION_KEY = "_calibration_seconds"
+
+
+def calibrate(repeat=5):
+    """Best-of-`repeat` time of a fixed pure-Python workload, used to scale baseline timings to this machine"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        table = {}
+        for i in range(200000):
+            table[i % 1013] = table.get(i % 1013, 0) + i
+        sorted(str(i * 7919 % 100003) for i in range(100000))
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def synthetic_models():
+    for actors, classes, methods, fan_out, density in SYNTHETIC_SHAPES:
+        name = f"synthetic-a{actors}-c{classes}-m{methods}-f{fan_out}-d{density}"
+        yield name, generate_model_source(actors, classes, methods, fan_out, density, seed=0)
+
+
+def shipped_models(pattern):
+    for path in sorted(glob.glob(pattern)):
+        with open(path) as f:
+            yield os.path.basename(path), f.read()
+
+
+def run_pipeline(code, max_cases, trace_memory=True):
+    """Parse, build the ERDG, run steps 1-4 and stream up to `max_cases` step 5 test cases"""
+    metrics = MetricsRecorder(trace_memory=trace_memory)
+    with measure_step(metrics, "parse_and_analyze"):
+        analysis_result, _ = analyze_model(code)
+    generator = ERDGTestGenerator(analysis_result, metrics=metrics)
+    test_cases = generator.iter_dependency_guided_tests()
+    with measure_step(metrics, "step5_test_cases") as counts:
+        counts["test_cases"] = sum(1 for _ in islice(test_cases, max_cases))
+    return metrics, generator
+
+
+def measure_model(code, max_cases, repeat, trace_memory=True):
+    """Best-of-`repeat` untraced step timings, plus peak memory from one tracemalloc run"""
+    result = {"steps": {}}
+    for run_index in range(repeat):
+        gc.collect()
+        metrics, generator = run_pipeline(code, max_cases, trace_memory=False)
+        for s in metrics.steps:
+            entry = result["steps"].setdefault(s["step"], {"wall_seconds": s["wall_seconds"],
+                                                           "peak_memory_bytes": None})
+            entry["wall_seconds"] = min(entry["wall_seconds"], s["wall_seconds"])
+    result.update(test_cases=generator.num_test_cases, actor_groups=len(generator.actor_groups),
+                  activations=len(generator.N_A))
+    result["wall_seconds"] = sum(s["wall_seconds"] for s in result["steps"].values())
+
+    if trace_memory:
+        metrics, _ = run_pipeline(code, max_cases, trace_memory=True)
+        for s in metrics.steps:
+            result["steps"][s["step"]]["peak_memory_bytes"] = s["peak_memory_bytes"]
+    return result
+
+
+def compare(name, current, baseline, tolerance, time_tolerance=None, time_scale=1.0):
+    """Regression messages for one model; test-case counts must match exactly.
+
+    Peak memory is compared with `tolerance`. Wall times are only compared when
+    `time_tolerance` is given, against baseline times multiplied by `time_scale`.
+    """
+    problems = []
+    if current["test_cases"] > baseline["test_cases"]:
+        problems.append(f"reduction: {baseline['test_cases']} -> {current['test_cases']} test cases")
+    elif current["test_cases"] < baseline["test_cases"]:
+        print(f"  note: {name} now yields fewer test cases ({baseline['test_cases']} -> "
+              f"{current['test_cases']}); refresh the baseline with --update-baseline")
+    for step, entry in current["steps"].items():
+        before = baseline["steps"].get(step)
+        if before is None:
+            continue
+        if time_tolerance is not None:
+            wall, wall_before = entry["wall_seconds"], before["wall_seconds"] * time_scale
+            if wall - wall_before > NOISE_FLOOR_SECONDS and wall > wall_before * (1 + time_tolerance):
+                problems.append(f"{step}: {wall_before:.3f}s -> {wall:.3f}s")
+        memory, memory_before = entry["peak_memory_bytes"], before["peak_memory_bytes"]
+        if memory is not None and memory_before is not None and memory - memory_before > NOISE_FLOOR_BYTES \
+                and memory > memory_before * (1 + tolerance):
+            problems.append(f"{step}: peak {memory_before / 2**20:.1f} MiB -> {memory / 2**20:.1f} MiB")
+    return problems
+
+
+def run(args):
+    models = list(shipped_models(args.models))
+    if not args.skip_synthetic:
+        models.extend(synthetic_models())
+
+    results = {}
+    print(f"{'model':<44} {'test cases':>12} {'groups':>7} {'time (s)':>9} {'peak MiB':>9}")
+    for name, code in models:
+        result = measure_model(code, args.max_cases, args.repeat, not args.no_trace_memory)
+        results[name] = result
+        peaks = [s["peak_memory_bytes"] for s in result["steps"].values() if s["peak_memory_bytes"] is not None]
+        peak = f"{max(peaks) / 2**20:9.1f}" if peaks else f"{'-':>9}"
+        count = str(result["test_cases"])
+        if len(count) > 12:
+            count = f"{count[0]}.{count[1:4]}e+{len(count) - 1}"
+        print(f"{name:<44} {count:>12} {result['actor_groups']:>7} {result['wall_seconds']:>9.3f} {peak}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    calibration = calibrate() if args.update_baseline or args.check_time else None
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(dict(results, **{CALIBRATION_KEY: calibration}), f, indent=2, sort_keys=True)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; create one with --update-baseline")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+
+    # Timings only mean something on the machine that wrote the baseline: they are
+    # checked on request, scaled by the ratio of the two calibration runs
+    time_tolerance, time_scale = None, 1.0
+    if args.check_time:
+        time_tolerance = args.time_tolerance
+        time_scale = calibration / baseline[CALIBRATION_KEY] if baseline.get(CALIBRATION_KEY) else 1.0
+        print(f"Timings scaled by {time_scale:.2f} (calibration {calibration * 1000:.1f} ms)")
+
+    failures = 0
+    for name, result in results.items():
+        if name not in baseline:
+            print(f"  note: {name} has no baseline entry")
+            continue
+        for problem in compare(name, result, baseline[name], args.tolerance, time_tolerance, time_scale):
+            print(f"  REGRESSION {name}: {problem}")
+            failures += 1
+    checked = "counts, memory and time" if args.check_time else "counts and memory"
+    print(f"{failures} regression(s) in {checked} against {args.baseline} (memory tolerance {args.tolerance:.0%})")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Run the full pipeline on shipped and synthetic models "
+                                                     "and compare against a baseline")
+    arg_parser.add_argument("--models", default=MODEL_GLOB, help="glob of model files to include")
+    arg_parser.add_argument("--skip-synthetic", action="store_true")
+    arg_parser.add_argument("--max-cases", type=int, default=10000,
+                            help="number of step 5 test cases to stream per model")
+    arg_parser.add_argument("--repeat", type=int, default=3, help="timed runs per model; the fastest is kept")
+    arg_parser.add_argument("--no-trace-memory", action="store_true", help="skip tracemalloc peak memory")
+    arg_parser.add_argument("--baseline", default=BASELINE_PATH)
+    arg_parser.add_argument("--tolerance", type=float, default=0.25,
+                            help="allowed relative peak memory growth before a step counts as regressed")
+    arg_parser.add_argument("--check-time", action="store_true",
+                            help="also fail on slower steps, comparing against calibration-scaled baseline times")
+    arg_parser.add_argument("--time-tolerance", type=float, default=1.0,
+                            help="allowed relative slowdown with --check-time")
+    arg_parser.add_argument("--update-baseline", action="store_true", help="overwrite the baseline with this run")
+    arg_parser.add_argument("--output", help="also write this run's results as JSON")
+    args = arg_parser.parse_args()
+    sys.exit(run(args))
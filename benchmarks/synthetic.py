@@ -0,0 +1,69 @@
+import random
+from typing import Dict
+
+
+# ======== Synthetic Model Generator ========
+def generate_summary(actors: int = 100, classes: int = 10, methods_per_class: int = 4,
+                     fan_out: int = 2, shared_var_density: float = 0.3, seed: int = 0) -> Dict:
+    """Build an ASTAnalyzer-style summary for a random model of the given shape.
+
+    Every class gets a constructor plus ``methods_per_class`` message servers;
+    each message server sends to ``fan_out`` random (instance, method) targets
+    and reads/writes each state variable with probability ``shared_var_density``.
+    """
+    rnd = random.Random(seed)
+    class_names = [f"Class{c}" for c in range(classes)]
+    instances = [{"name": f"r{i}", "class": class_names[i % classes], "arg": class_names[i % classes], "priority": None}
+                 for i in range(actors)]
+
+    summary_actors = {}
+    for class_name in class_names:
+        statevars = {f"v{v}" for v in range(max(1, methods_per_class // 2))}
+        methods = {class_name.lower(): {"priority": None, "sends": [("self", "m0")], "reads": set(), "writes": set(statevars)}}
+        for m in range(methods_per_class):
+            methods[f"m{m}"] = {
+                "priority": None,
+                "sends": [],
+                "reads": {v for v in sorted(statevars) if rnd.random() < shared_var_density},
+                "writes": {v for v in sorted(statevars) if rnd.random() < shared_var_density},
+            }
+        summary_actors[class_name] = {"statevars": statevars, "methods": methods}
+
+    for class_name in class_names:
+        for method_name, method_info in summary_actors[class_name]["methods"].items():
+            if method_name == class_name.lower():
+                continue
+            for _ in range(fan_out):
+                target = rnd.choice(instances)
+                message = f"m{rnd.randrange(methods_per_class)}"
+                method_info["sends"].append((target["name"], message))
+
+    return {"actors": summary_actors, "main_instances": instances}
+
+
+def generate_model_source(actors: int = 100, classes: int = 10, methods_per_class: int = 4,
+                          fan_out: int = 2, shared_var_density: float = 0.3, seed: int = 0) -> str:
+    """Render a model of the given shape in the language of src/grammar.py"""
+    summary = generate_summary(actors, classes, methods_per_class, fan_out, shared_var_density, seed)
+    lines = []
+    for class_name, class_info in summary["actors"].items():
+        lines.append(f"actorclass {class_name} {{")
+        lines.append(" statevars")
+        for var in sorted(class_info["statevars"]):
+            lines.append(f"     Int {var};")
+        for method_name, method_info in class_info["methods"].items():
+            lines.append(f" method {method_name} {{")
+            reads = sorted(method_info["reads"])
+            for var in sorted(method_info["writes"]):
+                rhs = " + ".join(reads + ["1"])
+                lines.append(f"     {var} = {rhs};")
+            for target, message in method_info["sends"]:
+                lines.append(f"     {target}!{message};")
+            lines.append(" } end")
+        lines.append("}")
+        lines.append("")
+    lines.append("main {")
+    for instance in summary["main_instances"]:
+        lines.append(f"   {instance['name']} actor: ({instance['class']});")
+    lines.append("}")
+    return "\n".join(lines) + "\n"
@@ -1,5 +1,11 @@
-from lark import Visitor, Tree
-from graphviz import Digraph
+import logging
+
+from lark import Lark, Token, Transformer, Visitor, Tree
+
+from src.parser_cache import get_transforming_parser
+from src.rendering import render_graph
+
+logger = logging.getLogger(__name__)
 
 
 # ======== AST Analyzer (unchanged from previous) ========
@@ -9,10 +15,12 @@ class ASTAnalyzer(Visitor):
         self.main_actors = []
         self.current_actor = None
         self.current_method = None
+        # id(send_stmt tree) -> (earliest, latest) send offset within its method
+        self.send_offsets = {}
 
     def class_def(self, tree):
         actor_name = tree.children[0].value
-        print(f"Processing class: {actor_name}")
+        logger.debug("Processing class: %s", actor_name)
         self.current_actor = actor_name
         self.actors[actor_name] = {
             "statevars": set(),
@@ -30,23 +38,23 @@ class ASTAnalyzer(Visitor):
         self.current_actor = None
 
     def visit_vars(self, tree):
-        print(f"Processing vars for actor: {self.current_actor}")
+        logger.debug("Processing vars for actor: %s", self.current_actor)
         for child in tree.children:
             if isinstance(child, Tree) and child.data == "var_decl":
                 self.visit_var_decl(child)
 
     def visit_var_decl(self, tree):
         if self.current_actor is None:
-            print(f"Error: var_decl called without current_actor set")
+            logger.error("var_decl called without current_actor set")
             return
 
         var_name = tree.children[1].value
-        print(f"Adding statevar {var_name} to {self.current_actor}")
+        logger.debug("Adding statevar %s to %s", var_name, self.current_actor)
         self.actors[self.current_actor]["statevars"].add(var_name)
 
     def visit_method(self, tree):
         if self.current_actor is None:
-            print(f"Error: method called without current_actor set")
+            logger.error("method called without current_actor set")
             return
 
         method_name = None
@@ -63,13 +71,20 @@ class ASTAnalyzer(Visitor):
                 method_priority = int(child.children[0].value)
                 break
 
-        print(f"Processing method {method_name} for actor {self.current_actor}")
+        logger.debug("Processing method %s for actor %s", method_name, self.current_actor)
         self.current_method = method_name
+
+        # Local logical time: delay(n) advances it, after(n) offsets a single send
+        statements = [c for c in tree.children if isinstance(c, Tree) and c.data != "priority_block"]
+        _, total_delay = self.visit_timing(statements, (0, 0))
+
         self.actors[self.current_actor]["methods"][method_name] = {
             "priority": method_priority,
             "sends": [],
+            "send_times": [],  # (earliest, latest) offset of each send, aligned with "sends"
             "reads": set(),
-            "writes": set()
+            "writes": set(),
+            "delay": total_delay
         }
 
         # Process method body - visit all statements
@@ -79,12 +94,31 @@ class ASTAnalyzer(Visitor):
 
         self.current_method = None
 
+    def visit_timing(self, statements, offset):
+        """Walk statements in order, recording each send's offset range; return the final range"""
+        earliest, latest = offset
+        for stmt in statements:
+            if stmt.data == "delay_stmt":
+                amount = int(stmt.children[0].value)
+                earliest, latest = earliest + amount, latest + amount
+            elif stmt.data == "send_stmt":
+                after = 0
+                if len(stmt.children) > 2:
+                    after = int(stmt.children[2].children[0].value)
+                self.send_offsets[id(stmt)] = (earliest + after, latest + after)
+            elif stmt.data == "if_stmt":
+                branches = [self.visit_timing(block.children, (earliest, latest))
+                            for block in stmt.children if isinstance(block, Tree) and block.data == "block"]
+                earliest = min(b[0] for b in branches)
+                latest = max(b[1] for b in branches)
+        return earliest, latest
+
     def assign_stmt(self, tree):
         if self.current_actor is None or self.current_method is None:
             return
 
         var_name = tree.children[0].value
-        print(f"Method {self.current_method} writes to {var_name}")
+        logger.debug("Method %s writes to %s", self.current_method, var_name)
         self.actors[self.current_actor]["methods"][self.current_method]["writes"].add(var_name)
 
         # Visit RHS expression to find reads
@@ -105,7 +139,7 @@ class ASTAnalyzer(Visitor):
         elif hasattr(tree, 'type') and tree.type == 'CNAME':
             # Only add to reads if it's actually a state variable
             if tree.value in self.actors[self.current_actor]["statevars"]:
-                print(f"Method {self.current_method} reads from {tree.value}")
+                logger.debug("Method %s reads from %s", self.current_method, tree.value)
                 self.actors[self.current_actor]["methods"][self.current_method]["reads"].add(tree.value)
 
     def send_stmt(self, tree):
@@ -114,11 +148,13 @@ class ASTAnalyzer(Visitor):
 
         target = tree.children[0].value
         message = tree.children[1].value
-        print(f"Method {self.current_method} sends {message} to {target}")
-        self.actors[self.current_actor]["methods"][self.current_method]["sends"].append((target, message))
+        logger.debug("Method %s sends %s to %s", self.current_method, message, target)
+        method_info = self.actors[self.current_actor]["methods"][self.current_method]
+        method_info["sends"].append((target, message))
+        method_info["send_times"].append(self.send_offsets.get(id(tree), (0, 0)))
 
     def main_block(self, tree):
-        print("Processing main block")
+        logger.debug("Processing main block")
         for child in tree.children:
             if isinstance(child, Tree) and child.data == "actor_instance":
                 self.visit_actor_instance(child)
@@ -135,7 +171,7 @@ class ASTAnalyzer(Visitor):
                     priority = int(child.children[0].value)
                     break
 
-            print(f"Found actor instance: {instance_name} of class {actor_class}, priority {priority}")
+            logger.debug("Found actor instance: %s of class %s, priority %s", instance_name, actor_class, priority)
             self.main_actors.append({
                 "name": instance_name,
                 "class": actor_class,
@@ -143,8 +179,7 @@ class ASTAnalyzer(Visitor):
                 "priority": priority
             })
         except Exception as e:
-            print(f"❌ Failed to parse actor_instance: {tree}")
-            print(tree.pretty())
+            logger.error("❌ Failed to parse actor_instance: %s\n%s", tree, tree.pretty())
             raise
 
     def get_summary(self):
@@ -152,7 +187,17 @@ class ASTAnalyzer(Visitor):
             "actors": self.actors,
             "main_instances": self.main_actors
         }
-    def draw_ast_graph(self, filename="AST"):
+
+    @classmethod
+    def from_summary(cls, summary):
+        """Wrap an existing summary (e.g. from the single-pass parser) so it can be drawn"""
+        analyzer = cls()
+        analyzer.actors = summary["actors"]
+        analyzer.main_actors = summary["main_instances"]
+        return analyzer
+    def draw_ast_graph(self, filename="AST", render=True):
+        from graphviz import Digraph  # imported lazily: only needed when rendering
+
         dot = Digraph(comment="AST Graph", format="png")
         dot.attr(rankdir="TB")
 
@@ -166,5 +211,160 @@ class ASTAnalyzer(Visitor):
                 dot.node(m_node, shape="ellipse", style="filled", color="lightgreen")
                 dot.edge(actor, m_node)
 
-        dot.render(f"outputs/images/{filename}", view=False)
-        print(f"✅ AST graph saved as {filename}.png")
+        if render and render_graph(dot, filename):
+            logger.info("✅ AST graph saved as %s.png", filename)
+        return dot
+
+
+
+# ======== Single-Pass Analysis (fused into the LALR parse) ========
+def _names(expr):
+    """Variable names referenced by an already-transformed expression"""
+    if isinstance(expr, Token):
+        return {expr.value} if expr.type == "CNAME" else set()
+    if isinstance(expr, set):
+        return expr
+    return set()
+
+
+class SummaryTransformer(Transformer):
+    """Builds the ASTAnalyzer.get_summary() structure bottom-up while parsing.
+
+    Passed to Lark as ``transformer=`` with the LALR parser, every rule is
+    reduced straight into summary fragments, so no parse tree is kept and each
+    node is handled exactly once. Statements become small tuples that the
+    enclosing method folds into its reads/writes/sends; reads are filtered
+    against the class's state variables once the class itself is reduced.
+    """
+
+    def model(self, children):
+        actors = {}
+        main_instances = []
+        for child in children:
+            if isinstance(child, tuple):
+                actors[child[0]] = child[1]
+            elif isinstance(child, list):
+                main_instances = child
+        return {"actors": actors, "main_instances": main_instances}
+
+    def main_block(self, children):
+        return children
+
+    def actor_instance(self, children):
+        priority = children[2] if len(children) > 2 else None
+        return {
+            "name": children[0].value,
+            "class": children[1].value,
+            "arg": children[1].value,  # Using class name as arg for now
+            "priority": priority
+        }
+
+    def priority_block(self, children):
+        return int(children[0].value)
+
+    def class_def(self, children):
+        statevars = set()
+        methods = {}
+        for child in children[1:]:
+            if isinstance(child, set):
+                statevars = child
+            elif isinstance(child, tuple):
+                methods[child[0]] = child[1]
+        for method_info in methods.values():
+            method_info["reads"] &= statevars
+        return children[0].value, {"statevars": statevars, "methods": methods}
+
+    def vars(self, children):
+        return set(children)
+
+    def var_decl(self, children):
+        return children[1].value
+
+    def method(self, children):
+        method_name = children[0].value
+        method_info = {
+            "priority": None,
+            "sends": [],
+            "send_times": [],
+            "reads": set(),
+            "writes": set(),
+            "delay": 0
+        }
+        statements = []
+        for child in children[1:]:
+            if isinstance(child, int):
+                method_info["priority"] = child
+            elif isinstance(child, tuple):
+                statements.append(child)
+        _, method_info["delay"] = self._fold(statements, (0, 0), method_info)
+        return method_name, method_info
+
+    def _fold(self, statements, offset, method_info, nested_sends=None, level=0):
+        """Fold statement fragments in source order; returns the final time offset range.
+
+        Sends inside an if statement are collected as (nesting level, send,
+        time) and emitted in the order ASTAnalyzer's Visitor meets them:
+        Tree.iter_subtrees walks the if statement's subtree deepest level
+        first, left to right within a level.
+        """
+        earliest, latest = offset
+        for stmt in statements:
+            kind = stmt[0]
+            if kind == "assign":
+                method_info["writes"].add(stmt[1])
+                method_info["reads"] |= stmt[2]
+            elif kind == "send":
+                send = (stmt[1], stmt[2]), (earliest + stmt[3], latest + stmt[3])
+                if nested_sends is None:
+                    method_info["sends"].append(send[0])
+                    method_info["send_times"].append(send[1])
+                else:
+                    nested_sends.append((level, send))
+            elif kind == "delay":
+                earliest, latest = earliest + stmt[1], latest + stmt[1]
+            elif kind == "if":
+                inner = [] if nested_sends is None else nested_sends
+                branches = [self._fold(block, (earliest, latest), method_info, inner, level + 1) for block in stmt[1]]
+                earliest = min(b[0] for b in branches)
+                latest = max(b[1] for b in branches)
+                if nested_sends is None:
+                    # sorted() is stable: same-level sends keep their source order
+                    for _, (target_message, times) in sorted(inner, key=lambda item: -item[0]):
+                        method_info["sends"].append(target_message)
+                        method_info["send_times"].append(times)
+        return earliest, latest
+
+    def block(self, children):
+        return [child for child in children if isinstance(child, tuple)]
+
+    def assign_stmt(self, children):
+        return ("assign", children[0].value, _names(children[1]) if len(children) > 1 else set())
+
+    def send_stmt(self, children):
+        after = children[2] if len(children) > 2 else 0
+        return ("send", children[0].value, children[1].value, after)
+
+    def after_clause(self, children):
+        return int(children[0].value)
+
+    def delay_stmt(self, children):
+        return ("delay", int(children[0].value))
+
+    def if_stmt(self, children):
+        return ("if", [child for child in children if isinstance(child, list)])
+
+    def _operands(self, children):
+        names = set()
+        for child in children:
+            names |= _names(child)
+        return names
+
+    add = sub = mul = div = _operands
+
+    def expr(self, children):
+        return set()
+
+
+def build_summary_parser() -> Lark:
+    """LALR parser whose parse() returns the analysis summary directly"""
+    return get_transforming_parser(SummaryTransformer())
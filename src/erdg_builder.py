@@ -1,163 +1,902 @@
-from collections import defaultdict, deque
-from itertools import permutations
-from graphviz import Digraph, Graph
-from typing import List, Tuple, Dict, Optional
+import logging
+from array import array
+from collections import Counter, defaultdict, deque
+from collections.abc import Sequence
+from heapq import heapify, heappop, heappush
+from itertools import islice, permutations, product
+from functools import lru_cache
+from math import comb, factorial
+from typing import BinaryIO, Callable, FrozenSet, Iterable, Iterator, List, Set, Tuple, Dict, Optional, Union
+
+from src.erdg_nodes import RebecNode, MessageServerNode, ActivationNode, PriorityMap, TestCase
+from src.erdg_store import open_erdg_buffer, read_erdg, write_erdg
+from src.graph_core import CSRAdjacency, GraphCore
+from src.metrics import MetricsRecorder, measure_step
+from src.permutations import (iter_canonical_permutations, num_arrangements, rank_canonical_permutation,
+                              rank_permutation, unrank_canonical_permutation, unrank_permutation)
+from src.rendering import render_graph
+
+logger = logging.getLogger(__name__)
+
+
+def _linear_extension(methods: List[str], oriented: Set[Tuple[str, str]]) -> Tuple[str, ...]:
+    """Lexicographically smallest ordering of methods (by position) that puts a before b for each (a, b)"""
+    position = {m: i for i, m in enumerate(methods)}
+    successors = {m: [] for m in methods}
+    in_degree = {m: 0 for m in methods}
+    for a, b in oriented:
+        successors[a].append(b)
+        in_degree[b] += 1
+    heap = [position[m] for m in methods if in_degree[m] == 0]
+    heapify(heap)
+    ordering = []
+    while heap:
+        m = methods[heappop(heap)]
+        ordering.append(m)
+        for nxt in successors[m]:
+            in_degree[nxt] -= 1
+            if in_degree[nxt] == 0:
+                heappush(heap, position[nxt])
+    return tuple(ordering)
+
+
+def _reaches(oriented: Set[Tuple[str, str]], src: str, dst: str) -> bool:
+    successors = defaultdict(list)
+    for a, b in oriented:
+        successors[a].append(b)
+    stack, seen = [src], {src}
+    while stack:
+        node = stack.pop()
+        if node == dst:
+            return True
+        for nxt in successors[node]:
+            if nxt not in seen:
+                seen.add(nxt)
+                stack.append(nxt)
+    return False
+
+
+def _contract(methods: List[str], conflicts: List[Tuple[str, str]], u: str, v: str):
+    """Merge v into u; pairs that become loops or duplicates are dropped"""
+    merged, seen = [], set()
+    for a, b in conflicts:
+        a, b = (u if a == v else a), (u if b == v else b)
+        if a != b and frozenset((a, b)) not in seen:
+            seen.add(frozenset((a, b)))
+            merged.append((a, b))
+    return [m for m in methods if m != v], merged
+
+
+# A component's conflict orderings are ranked block by block (biconnected
+# components orient independently), the last block as the fastest digit. A
+# complete block's orientations are the permutations of its methods. Other
+# blocks are ranked by deletion-contraction on their first pair e = (u, v):
+# a(G) = a(G - e) + a(G / e). Ranks below a(G - e) are the orientations of
+# G - e, with e oriented u -> v unless G - e already orders v before u; the
+# others are the orientations of G / e (u, v unordered in G - e) with e
+# oriented v -> u. Every count comes from _count_conflict_orderings, so no
+# ordering is enumerated.
+
+@lru_cache(maxsize=1 << 12)
+def _conflict_blocks(methods: Tuple[str, ...], conflicts: Tuple[Tuple[str, str], ...]) -> List[Tuple]:
+    """(methods, pairs, orderings, base ordering or None) per block; the base is set for complete blocks"""
+    position = {m: i for i, m in enumerate(methods)}
+    neighbours = [set() for _ in methods]
+    for u, v in conflicts:
+        neighbours[position[u]].add(position[v])
+        neighbours[position[v]].add(position[u])
+
+    blocks = []
+    for block in _biconnected_blocks(neighbours):
+        block_methods = [methods[i] for i in sorted(block)]
+        members = set(block_methods)
+        pairs = [(u, v) for u, v in conflicts if u in members and v in members]
+        if len(pairs) == len(block) * (len(block) - 1) // 2:
+            # Permutations of the order the given pair directions impose
+            blocks.append((block_methods, pairs, factorial(len(block)), _linear_extension(block_methods, set(pairs))))
+        else:
+            blocks.append((block_methods, pairs, _count_conflict_orderings(block_methods, pairs), None))
+    return blocks
+
+
+def _unrank_conflict_ordering(methods: List[str], conflicts: List[Tuple[str, str]], index: int) -> Tuple[str, ...]:
+    """The ``index``-th ordering of methods, one per acyclic orientation of the conflict pairs.
+
+    Each orientation is given as its lexicographically smallest linear
+    extension. Ordering 0 follows the given pair directions.
+    """
+    oriented = set()
+    for block_methods, pairs, count, base in reversed(_conflict_blocks(tuple(methods), tuple(conflicts))):
+        index, digit = divmod(index, count)
+        if base is not None:
+            position = {m: i for i, m in enumerate(unrank_permutation(base, digit))}
+            oriented.update((a, b) if position[a] < position[b] else (b, a) for a, b in pairs)
+        else:
+            oriented |= _unrank_block_orientation(block_methods, pairs, digit)
+    return _linear_extension(methods, oriented)
+
+
+def _rank_conflict_ordering(methods: List[str], conflicts: List[Tuple[str, str]], ordering: Iterable[str]) -> int:
+    """Inverse of _unrank_conflict_ordering for any ordering of methods"""
+    position = {m: i for i, m in enumerate(ordering)}
+    index = 0
+    for block_methods, pairs, count, base in _conflict_blocks(tuple(methods), tuple(conflicts)):
+        if base is not None:
+            digit = rank_permutation(base, sorted(block_methods, key=position.get))
+        else:
+            digit = _rank_block_orientation(block_methods, pairs, {(a, b) if position[a] < position[b] else (b, a)
+                                                                    for a, b in pairs})
+        index = index * count + digit
+    return index
+
+
+def _unrank_block_orientation(methods: List[str], conflicts: List[Tuple[str, str]], index: int) -> Set[Tuple[str, str]]:
+    steps = []
+    graph_methods, graph = methods, conflicts
+    while graph:
+        (u, v), rest = graph[0], graph[1:]
+        without = _count_conflict_orderings(graph_methods, rest)
+        contracted = index >= without
+        steps.append((u, v, rest, contracted))
+        if contracted:
+            index -= without
+            graph_methods, graph = _contract(graph_methods, rest, u, v)
+        else:
+            graph = rest
+
+    # Orient the pairs back up from the empty graph; `oriented` covers the pairs of the current level
+    oriented = set()
+    for u, v, rest, contracted in reversed(steps):
+        if contracted:
+            lifted = set()
+            for a, b in rest:
+                image = (u if a == v else a, u if b == v else b)
+                lifted.add((a, b) if image in oriented else (b, a))
+            oriented = lifted | {(v, u)}
+        else:
+            oriented.add((v, u) if _reaches(oriented, v, u) else (u, v))
+    return oriented
+
+
+def _rank_block_orientation(methods: List[str], conflicts: List[Tuple[str, str]],
+                            oriented: Set[Tuple[str, str]]) -> int:
+    index = 0
+    graph_methods, graph = methods, conflicts
+    while graph:
+        (u, v), rest = graph[0], graph[1:]
+        oriented.discard((u, v))
+        if (v, u) not in oriented or _reaches(oriented - {(v, u)}, v, u):
+            oriented.discard((v, u))
+            graph = rest
+            continue
+        oriented.discard((v, u))
+        index += _count_conflict_orderings(graph_methods, rest)
+        graph_methods, graph = _contract(graph_methods, rest, u, v)
+        oriented = {(u if a == v else a, u if b == v else b) for a, b in oriented}
+    return index
+
+
+def _count_conflict_orderings(methods: List[str], conflicts: List[Tuple[str, str]]) -> int:
+    """Number of orderings of methods that differ on some conflicting pair, i.e. acyclic orientations.
+
+    The count is the product of the counts of the conflict graph's blocks
+    (biconnected components): a chain of n methods gives 2^(n-1) in linear
+    time and a complete block of n methods n!. Other blocks are counted by
+    _count_block_orientations. Methods without conflicts contribute a factor 1.
+    """
+    return _count_conflict_graph(frozenset(frozenset(pair) for pair in conflicts))
+
+
+@lru_cache(maxsize=1 << 16)
+def _count_conflict_graph(pairs: FrozenSet[FrozenSet[str]]) -> int:
+    # Keyed by the graph alone: ranking by deletion-contraction meets the same subgraphs again and again
+    methods = sorted({m for pair in pairs for m in pair})
+    position = {m: i for i, m in enumerate(methods)}
+    neighbours = [set() for _ in methods]
+    for u, v in pairs:
+        neighbours[position[u]].add(position[v])
+        neighbours[position[v]].add(position[u])
+
+    total = 1
+    for block in _biconnected_blocks(neighbours):
+        members = set(block)
+        block_neighbours = {v: neighbours[v] & members for v in block}
+        if all(len(adjacent) == len(block) - 1 for adjacent in block_neighbours.values()):
+            total *= factorial(len(block))
+        else:
+            total *= _count_block_orientations(block_neighbours)
+    return total
+
+
+def _biconnected_blocks(neighbours: List[Set[int]]) -> List[List[int]]:
+    """Vertex sets of the blocks with at least one edge (iterative Hopcroft-Tarjan)"""
+    index_of = [-1] * len(neighbours)
+    low = [0] * len(neighbours)
+    blocks = []
+    counter = 0
+    for root in range(len(neighbours)):
+        if index_of[root] != -1:
+            continue
+        index_of[root] = low[root] = counter
+        counter += 1
+        stack = [root]
+        work = [(root, -1, iter(neighbours[root]))]
+        while work:
+            node, parent, remaining = work[-1]
+            for nxt in remaining:
+                if index_of[nxt] == -1:
+                    index_of[nxt] = low[nxt] = counter
+                    counter += 1
+                    stack.append(nxt)
+                    work.append((nxt, node, iter(neighbours[nxt])))
+                    break
+                if nxt != parent:
+                    low[node] = min(low[node], index_of[nxt])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                    if low[node] >= index_of[parent]:
+                        block = [parent]
+                        while block[-1] != node:
+                            block.append(stack.pop())
+                        blocks.append(block)
+    return blocks
+
+
+def _count_block_orientations(neighbours: Dict[int, Set[int]]) -> int:
+    """Acyclic orientations of a graph by inclusion-exclusion over its (independent) set of sources.
+
+    a(G) = sum over nonempty independent S of (-1)^(|S|+1) a(G - S). Twins
+    (vertices with the same neighbours) are interchangeable, so the recursion
+    runs over how many vertices of each twin class remain: e.g. two writers
+    and k readers of one variable take O(k) steps.
+    """
+    by_open = defaultdict(list)
+    for v, adjacent in neighbours.items():
+        by_open[frozenset(adjacent)].append(v)
+    classes = [(members, False) for members in by_open.values() if len(members) > 1]
+    by_closed = defaultdict(list)
+    for members in by_open.values():
+        if len(members) == 1:
+            by_closed[frozenset(neighbours[members[0]] | {members[0]})].append(members[0])
+    # Vertices with the same closed neighbourhood form a clique: at most one of them is a source
+    classes += [(members, len(members) > 1) for members in by_closed.values()]
+    adjacent = [[classes[d][0][0] in neighbours[classes[c][0][0]] for d in range(len(classes))]
+                for c in range(len(classes))]
+
+    memo = {}
+
+    def count(remaining):
+        if sum(remaining) <= 1:
+            return 1
+        if remaining in memo:
+            return memo[remaining]
+
+        total = 0
+        for removed, size, ways in sources(remaining, 0, []):
+            if size:
+                rest = tuple(n - s for n, s in zip(remaining, removed))
+                total += (ways if size % 2 else -ways) * count(rest)
+        memo[remaining] = total
+        return total
+
+    def sources(remaining, c, chosen):
+        # Sources taken from each class from c on; classes that give sources must be pairwise non-adjacent
+        if c == len(classes):
+            yield (), 0, 1
+            return
+        options = [0]
+        if remaining[c] and not any(adjacent[c][d] for d in chosen):
+            options += [1] if classes[c][1] else range(1, remaining[c] + 1)
+        for s in options:
+            for removed, size, ways in sources(remaining, c + 1, chosen + [c] if s else chosen):
+                yield (s,) + removed, size + s, ways * comb(remaining[c], s)
+
+    return count(tuple(len(members) for members, _ in classes))
+
+
+class ClassOrderings(Sequence):
+    """A class's step 4 orderings, built on access instead of listed.
+
+    Ordering k is a mixed-radix number with one digit per message component
+    (the last component fastest); ``unrank(k, digit)`` gives component k's
+    ordering at that digit. The orderings themselves are never stored.
+    """
+
+    def __init__(self, counts: List[int], unrank: Callable[[int, int], Tuple[str, ...]]):
+        self.counts = counts
+        self.unrank = unrank
+        self.length = 1
+        for count in counts:
+            self.length *= count
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, index: int) -> List[str]:
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError(f"ordering index {index} out of range [0, {self.length})")
+        digits = []
+        for count in reversed(self.counts):
+            index, digit = divmod(index, count)
+            digits.append(digit)
+        return [m for k, digit in enumerate(reversed(digits)) for m in self.unrank(k, digit)]
+
+
+def _strongly_connected_components(successors: List[List[int]]) -> List[List[int]]:
+    """Iterative Tarjan; SCCs are returned in reverse topological order (sinks first)"""
+    index_of = [-1] * len(successors)
+    low = [0] * len(successors)
+    on_stack = [False] * len(successors)
+    stack = []
+    components = []
+    counter = 0
+
+    for root in range(len(successors)):
+        if index_of[root] != -1:
+            continue
+        work = [(root, 0)]
+        index_of[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+        while work:
+            node, i = work[-1]
+            if i < len(successors[node]):
+                work[-1] = (node, i + 1)
+                nxt = successors[node][i]
+                if index_of[nxt] == -1:
+                    index_of[nxt] = low[nxt] = counter
+                    counter += 1
+                    stack.append(nxt)
+                    on_stack[nxt] = True
+                    work.append((nxt, 0))
+                elif on_stack[nxt]:
+                    low[node] = min(low[node], index_of[nxt])
+                continue
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                low[parent] = min(low[parent], low[node])
+            if low[node] == index_of[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack[member] = False
+                    component.append(member)
+                    if member == node:
+                        break
+                components.append(component)
 
-from src.erdg_nodes import RebecNode, MessageServerNode, ActivationNode, TestCase
+    return components
+
+
+def _dfs_components(nodes: Iterable, neighbors) -> List[List]:
+    """Connected components, members in recursive-DFS preorder, without recursion"""
+    visited = set()
+    components = []
+    for root in nodes:
+        if root in visited:
+            continue
+        visited.add(root)
+        component = [root]
+        stack = [iter(neighbors(root))]
+        while stack:
+            for nxt in stack[-1]:
+                if nxt not in visited:
+                    visited.add(nxt)
+                    component.append(nxt)
+                    stack.append(iter(neighbors(nxt)))
+                    break
+            else:
+                stack.pop()
+        components.append(component)
+    return components
+
+
+def _undirected_adjacency(nodes: List[str], edges: List[Tuple[str, str]]) -> CSRAdjacency:
+    """CSR over node positions; each node's neighbours keep the order of the edge list"""
+    position = {name: i for i, name in enumerate(nodes)}
+    sources, targets = [], []
+    for a, b in edges:
+        sources += (position[a], position[b])
+        targets += (position[b], position[a])
+    return CSRAdjacency(len(nodes), sources, targets)
+
+
+def _immediate_dominators(roots: List[int], successors: Callable[[int], Iterable[int]]) -> Dict[int, int]:
+    """Immediate dominator of every node reachable from ``roots`` (Cooper-Harvey-Kennedy, without recursion).
+
+    The roots hang off a virtual root, -1, so a node is dominated by a real
+    node only if every path from every root to it passes through that node.
+    """
+    postorder = []
+    seen = set()
+    for root in roots:
+        if root in seen:
+            continue
+        seen.add(root)
+        stack = [(root, iter(successors(root)))]
+        while stack:
+            node, remaining = stack[-1]
+            for nxt in remaining:
+                if nxt not in seen:
+                    seen.add(nxt)
+                    stack.append((nxt, iter(successors(nxt))))
+                    break
+            else:
+                stack.pop()
+                postorder.append(node)
+
+    number = {node: k for k, node in enumerate(postorder)}
+    number[-1] = len(postorder)
+    predecessors = defaultdict(list)
+    for node in postorder:
+        for nxt in successors(node):
+            predecessors[nxt].append(node)
+    for root in roots:
+        predecessors[root].append(-1)
+
+    idom = {-1: -1}
+
+    def intersect(a, b):
+        while a != b:
+            while number[a] < number[b]:
+                a = idom[a]
+            while number[b] < number[a]:
+                b = idom[b]
+        return a
+
+    changed = True
+    while changed:
+        changed = False
+        for node in reversed(postorder):
+            new_idom = None
+            for pred in predecessors[node]:
+                if pred in idom:
+                    new_idom = pred if new_idom is None else intersect(pred, new_idom)
+            if idom.get(node) != new_idom:
+                idom[node] = new_idom
+                changed = True
+    del idom[-1]
+    return idom
+
+
+def _dominator_intervals(idom: Dict[int, int]) -> Dict[int, Tuple[int, int]]:
+    """Preorder interval of each node in the dominator tree: a dominates b iff b's interval nests in a's"""
+    children = defaultdict(list)
+    for node, parent in idom.items():
+        children[parent].append(node)
+    intervals = {}
+    clock = 0
+    stack = [(-1, iter(children[-1]))]
+    entered = {-1: 0}
+    while stack:
+        node, remaining = stack[-1]
+        for child in remaining:
+            clock += 1
+            entered[child] = clock
+            stack.append((child, iter(children[child])))
+            break
+        else:
+            stack.pop()
+            intervals[node] = (entered[node], clock)
+    del intervals[-1]
+    return intervals
+
+
+def _dominator_chain(idom: Dict[int, int], node: int) -> Tuple[int, ...]:
+    """Strict dominators of ``node``, nearest first"""
+    chain = []
+    node = idom.get(node, -1)
+    while node != -1:
+        chain.append(node)
+        node = idom[node]
+    return tuple(chain)
+
+
+@lru_cache(maxsize=None)
+def _load_numpy():
+    """NumPy if installed; imported on first use so small runs never pay for it"""
+    try:
+        import numpy
+    except ImportError:  # optional: step 1 falls back to per-target sender pairs
+        return None
+    return numpy
+
+
+def _node_keys(nodes: List) -> List[Tuple]:
+    return [(str(node), node.priority) for node in nodes]
+
+
+def _method_delays(class_info: Dict) -> Dict[str, int]:
+    return {method: info.get("delay", 0) for method, info in class_info["methods"].items()}
+
+
+def _activation_keys(activations: List[Tuple[ActivationNode, bool]]) -> List[Tuple]:
+    return [(str(a), a.max_delay_time, class_targeted) for a, class_targeted in activations]
+
+
+INF = float("inf")
+# Below this many rebecs the pure-Python pair scan beats importing NumPy
+NUMPY_MIN_REBECS = 64
+# Above this share of dirty rebecs, step 1 re-checks every pair instead of patching the AG
+PATCH_MAX_DIRTY_FRACTION = 0.5
+# Step 5 keeps one shared method priority map per combination of class orderings up to this many
+SHARED_COMBINATIONS_MAX = 1 << 16
+
+ERDG_RELATIONS = ("E_RM", "E_MA", "E_AR", "E_AM", "E_I")
+ERDG_EDGE_STYLES = {
+    "E_RM": {"color": "gray"},
+    "E_MA": {"color": "green"},
+    "E_AR": {"color": "red"},
+    "E_AM": {"color": "orange"},
+    "E_I": {"color": "purple", "style": "dashed"},
+}
 
 
 # ======== ERDG Builder with Algorithm Implementation ========
 class ERDGTestGenerator:
-    def __init__(self, analysis_result: Dict):
+    def __init__(self, analysis_result: Dict, symmetry_reduction: bool = False,
+                 partial_order_reduction: bool = False, metrics: Optional[MetricsRecorder] = None):
         self.analysis = analysis_result
+        self.metrics = metrics
+        self.symmetry_reduction = symmetry_reduction
+        self.partial_order_reduction = partial_order_reduction
         self.N_R: List[RebecNode] = []
         self.N_M: List[MessageServerNode] = []
         self.N_A: List[ActivationNode] = []
-        self.E_RM: List[Tuple[str, str]] = []
-        self.E_MA: List[Tuple[str, str]] = []
-        self.E_AR: List[Tuple[str, str]] = []
-        self.E_AM: List[Tuple[str, str]] = []
-        self.E_I: List[Tuple[str, str]] = []
+        # All ERDG nodes are interned to integer IDs; relations E_RM, E_MA, E_AR,
+        # E_AM and E_I are stored as integer arrays with CSR adjacency
+        self.graph = GraphCore()
+        for relation in ERDG_RELATIONS:
+            self.graph.add_relation(relation)
+        self.ms_by_id: Dict[int, MessageServerNode] = {}
+        # Indices into N_A of sends whose target was a class name rather than an instance
+        self.class_targeted_activations = set()
+        # Rebecs with a message server that delays; everything queued at them may wait
+        self.busy_rebecs = None
+        # Per-instance ERDG fragments, keyed by instance name
+        self.fragments: Dict[str, Dict] = {}
+
+        # Symmetry reduction: orbits of interchangeable rebec instances
+        self.instance_orbits: List[List[str]] = []
+        self.orbit_of: Dict[str, str] = {}
+        self.symmetry_factor = 1
 
         # Algorithm-specific data structures
         self.AG = None  # Actor Dependency Graph
         self.HAG = None  # Hierarchical Actor Group graph
         self.actor_groups = []
         self.test_cases: List[TestCase] = []
+        self.num_test_cases = 0
+        # Shared per-ordering method priority maps: (class_message_permutations they
+        # were built from, {(class, ordering index): map}), filled on first use
+        self._priority_maps = None
 
         # Create a mapping from instance names to their details
         self.instance_map = {inst["name"]: inst for inst in analysis_result["main_instances"]}
 
-    def build_erdg(self):
-        """Build the complete ERDG graph"""
-        print("\n=== Building ERDG ===")
-
-        # Step 1: Create rebec instance nodes (N_R)
-        self._create_rebec_nodes()
-
-        # Step 2: Create message server nodes (N_M)
-        self._create_message_server_nodes()
-
-        # Step 3: Create activation nodes (N_A) and related edges
-        self._create_activation_nodes()
-
-        # Step 4: Create intra-rebec dependency edges (E_I)
-        self._create_intra_rebec_dependencies()
-
-        print(f"ERDG built successfully!")
-        print(f"- Rebec nodes: {len(self.N_R)}")
-        print(f"- Message server nodes: {len(self.N_M)}")
-        print(f"- Activation nodes: {len(self.N_A)}")
-        print(f"- Total edges: {len(self.E_RM) + len(self.E_MA) + len(self.E_AR) + len(self.E_AM) + len(self.E_I)}")
-
-    def _create_rebec_nodes(self):
-        """Create N_R: rebec instance nodes"""
-        for instance in self.analysis["main_instances"]:
-            actor_class = instance["class"]
-            instance_name = instance["name"]
-
-            node = RebecNode(
-                name=instance_name,
-                actor_class=actor_class,
-                arg=str(instance["arg"]) if instance["arg"] else "",
-                priority=instance["priority"]
-            )
-            self.N_R.append(node)
-            print(f"Created rebec node: {instance_name} ({actor_class})")
-
-    def _create_message_server_nodes(self):
-        """Create N_M: message server nodes and E_RM edges"""
+    def save(self, target: Union[str, BinaryIO]):
+        """Save the ERDG, AG, HAG, groups, topological order and step 3-4 results in the compact store format"""
+        if isinstance(target, str):
+            with open(target, "wb") as f:
+                write_erdg(self, f)
+        else:
+            write_erdg(self, target)
+
+    @classmethod
+    def load(cls, source: Union[str, bytes, memoryview]) -> "ERDGTestGenerator":
+        """Restore a generator saved with ``save``; a path is memory-mapped and read lazily"""
+        return read_erdg(cls, open_erdg_buffer(source))
+
+    # Per-pair query indexes are not saved; a loaded generator rebuilds them on first use
+    _LAZY_INDEXES = {
+        "sends_by_sender": "_index_activations", "senders_by_target": "_index_activations",
+        "_ms_position": "_build_causal_index", "_reach": "_build_causal_index",
+        "_idom": "_build_causal_index", "_dominance": "_build_causal_index",
+    }
+
+    def __getattr__(self, attr):
+        builder = self._LAZY_INDEXES.get(attr)
+        if builder is None:
+            raise AttributeError(attr)
+        getattr(self, builder)()
+        return self.__dict__[attr]
+
+    # Name-keyed views of the ERDG relations, kept for drawing and external callers
+    @property
+    def E_RM(self) -> List[Tuple[str, str]]:
+        return self.graph.edges("E_RM")
+
+    @property
+    def E_MA(self) -> List[Tuple[str, str]]:
+        return self.graph.edges("E_MA")
+
+    @property
+    def E_AR(self) -> List[Tuple[str, str]]:
+        return self.graph.edges("E_AR")
+
+    @property
+    def E_AM(self) -> List[Tuple[str, str]]:
+        return self.graph.edges("E_AM")
+
+    @property
+    def E_I(self) -> List[Tuple[str, str]]:
+        return self.graph.edges("E_I")
+
+    @property
+    def activation_endpoints(self) -> Iterator[Tuple[int, int]]:
+        """(sender message server ID, target message server ID) per N_A entry"""
+        return zip(self.graph.relation_ids("E_MA")[0], self.graph.relation_ids("E_AM")[1])
+
+    def build_erdg(self, dirty: Optional[Set[str]] = None):
+        """Build the complete ERDG graph; with ``dirty``, only those instances' fragments are rebuilt"""
+        logger.info("=== Building ERDG ===")
+
+        # Each rebec instance contributes one fragment (its N_R node, message
+        # servers, outgoing activations and E_I edges); fragments are kept so
+        # update_analysis can rebuild only the instances an edit touches
+        self._build_target_indexes()
+        self.erdg_changes = set()
+        # Instances whose outgoing activations differ from the previous build
+        self.changed_senders = set()
+        fragments = {}
         for instance in self.analysis["main_instances"]:
-            instance_name = instance["name"]
-            actor_class = instance["class"]
-
-            if actor_class not in self.analysis["actors"]:
-                print(f"Warning: Actor class {actor_class} not found in analysis")
+            name = instance["name"]
+            old = self.fragments.get(name)
+            if dirty is not None and name not in dirty and old is not None:
+                fragments[name] = old
                 continue
+            fragments[name] = fragment = self._create_fragment(instance)
+            if old is None:
+                self.erdg_changes.update(("rebecs", "message_servers", "activations"))
+                self.changed_senders.add(name)
+                continue
+            # Keep the old node objects (and their timing windows) for parts the edit left alone
+            if fragment["rebec"] == old["rebec"]:
+                fragment["rebec"] = old["rebec"]
+            else:
+                self.erdg_changes.add("rebecs")
+            if _node_keys(fragment["message_servers"]) == _node_keys(old["message_servers"]):
+                fragment["message_servers"] = old["message_servers"]
+            else:
+                self.erdg_changes.add("message_servers")
+            if _activation_keys(fragment["activations"]) == _activation_keys(old["activations"]):
+                fragment["activations"] = old["activations"]
+            else:
+                self.erdg_changes.add("activations")
+                self.changed_senders.add(name)
+        if list(self.fragments) != list(fragments):
+            self.erdg_changes.update(("rebecs", "message_servers", "activations"))
+        self.fragments = fragments
+        self._assemble_erdg()
+
+        logger.info("ERDG built successfully!")
+        logger.info("- Rebec nodes: %s", len(self.N_R))
+        logger.info("- Message server nodes: %s", len(self.N_M))
+        logger.info("- Activation nodes: %s", len(self.N_A))
+        logger.info("- Total edges: %s", sum(self.graph.num_edges(relation) for relation in ERDG_RELATIONS))
+
+        # Sends and reachability depend only on N_M and N_A; timing also on which rebecs delay
+        busy_rebecs = self._busy_rebecs()
+        if busy_rebecs != self.busy_rebecs:
+            self.erdg_changes.add("timing")
+        if dirty is None or self.erdg_changes & {"message_servers", "activations"}:
+            self._index_activations()
+            self._build_causal_index()
+        if dirty is None or self.erdg_changes & {"message_servers", "activations", "timing"}:
+            self.busy_rebecs = busy_rebecs
+            self._compute_timing_windows()
+
+        if self.symmetry_reduction and (dirty is None or self.erdg_changes):
+            self.detect_interchangeable_instances()
+
+    def _create_fragment(self, instance: Dict) -> Dict:
+        """Nodes and edges contributed by one rebec instance"""
+        activations, dropped_targets = self._create_activation_nodes(instance)
+        return {
+            "rebec": self._create_rebec_node(instance),
+            "message_servers": self._create_message_server_nodes(instance),
+            "activations": activations,
+            # Instances that sends were resolved to but then dropped for an unknown method
+            "dropped_targets": dropped_targets,
+            "intra_edges": self._create_intra_rebec_dependencies(instance),
+        }
+
+    def _intern_fragments(self, fragments: List[Dict]) -> List[Dict[str, Tuple[array, array]]]:
+        """Node IDs of each fragment's edges, interned phase by phase as a single-pass build would number them"""
+        intern = self.graph.nodes.intern
+        fragment_ids = []
+        for fragment in fragments:
+            fragment_ids.append({relation: (array("q"), array("q")) for relation in ERDG_RELATIONS})
+            intern(fragment["rebec"].name)
+
+        for fragment, ids in zip(fragments, fragment_ids):
+            sources, targets = ids["E_RM"]
+            for ms_node in fragment["message_servers"]:
+                sources.append(intern(ms_node.rebec_name))
+                targets.append(intern(str(ms_node)))
+
+        for fragment, ids in zip(fragments, fragment_ids):
+            for activation, _ in fragment["activations"]:
+                sender_id = intern(f"{activation.sender_rebec}.{activation.sender_method}")
+                activation_id = intern(str(activation))
+                ids["E_MA"][0].append(sender_id)
+                ids["E_MA"][1].append(activation_id)
+                ids["E_AR"][0].append(activation_id)
+                ids["E_AR"][1].append(intern(activation.target_rebec))
+                ids["E_AM"][0].append(activation_id)
+                ids["E_AM"][1].append(intern(f"{activation.target_rebec}.{activation.message_name}"))
+
+        for fragment, ids in zip(fragments, fragment_ids):
+            sources, targets = ids["E_I"]
+            for src, dst in fragment.pop("intra_edges"):
+                sources.append(intern(src))
+                targets.append(intern(dst))
+        return fragment_ids
+
+    def _assemble_erdg(self):
+        """Concatenate the fragments, in main_instances order, into N_R, N_M, N_A and the relations.
+
+        Only new fragments are interned; a kept fragment copies its slice
+        ("spans") of the previous relation arrays. Names an edit removed stay in
+        the node table without edges.
+        """
+        fragments = [self.fragments[instance["name"]] for instance in self.analysis["main_instances"]]
+        new_fragments = [fragment for fragment in fragments if "spans" not in fragment]
+        new_ids = dict(zip(map(id, new_fragments), self._intern_fragments(new_fragments)))
+
+        previous_ids = {relation: self.graph.relation_ids(relation) for relation in ERDG_RELATIONS}
+        relation_ids = {relation: (array("q"), array("q")) for relation in ERDG_RELATIONS}
+        self.N_R, self.N_M, self.N_A = [], [], []
+        self.class_targeted_activations = set()
+        for fragment in fragments:
+            ids = new_ids.get(id(fragment))
+            old_spans, spans = fragment.get("spans"), {}
+            for relation, (sources, targets) in relation_ids.items():
+                start = len(sources)
+                if ids is not None:
+                    sources.extend(ids[relation][0])
+                    targets.extend(ids[relation][1])
+                else:
+                    old_start, old_end = old_spans[relation]
+                    sources.extend(previous_ids[relation][0][old_start:old_end])
+                    targets.extend(previous_ids[relation][1][old_start:old_end])
+                spans[relation] = (start, len(sources))
+            fragment["spans"] = spans
+
+            self.N_R.append(fragment["rebec"])
+            self.N_M.extend(fragment["message_servers"])
+            for activation, class_targeted in fragment["activations"]:
+                if class_targeted:
+                    self.class_targeted_activations.add(len(self.N_A))
+                self.N_A.append(activation)
+
+        for relation, (sources, targets) in relation_ids.items():
+            self.graph.set_relation_ids(relation, sources, targets)
+        self.ms_by_id = dict(zip(relation_ids["E_RM"][1], self.N_M))
+
+    def _create_rebec_node(self, instance: Dict) -> RebecNode:
+        """Create the N_R node of one rebec instance"""
+        node = RebecNode(
+            name=instance["name"],
+            actor_class=instance["class"],
+            arg=str(instance["arg"]) if instance["arg"] else "",
+            priority=instance["priority"]
+        )
+        logger.debug("Created rebec node: %s (%s)", node.name, node.actor_class)
+        return node
+
+    def _create_message_server_nodes(self, instance: Dict) -> List[MessageServerNode]:
+        """Create N_M: the message server nodes of one rebec instance"""
+        instance_name = instance["name"]
+        actor_class = instance["class"]
 
-            actor_info = self.analysis["actors"][actor_class]
-
-            for method_name, method_info in actor_info["methods"].items():
-                # Create message server node
-                ms_node = MessageServerNode(
-                    rebec_name=instance_name,
-                    method_name=method_name,
-                    priority=method_info["priority"]
-                )
-                self.N_M.append(ms_node)
-                self.E_RM.append((instance_name, str(ms_node)))
-                print(f"Created message server: {ms_node}")
-
-    def _create_activation_nodes(self):
-        """Create N_A: activation nodes and related edges"""
-        for instance in self.analysis["main_instances"]:
-            instance_name = instance["name"]
-            actor_class = instance["class"]
+        if actor_class not in self.analysis["actors"]:
+            logger.warning("Actor class %s not found in analysis", actor_class)
+            return []
+
+        actor_info = self.analysis["actors"][actor_class]
+
+        ms_nodes = []
+        for method_name, method_info in actor_info["methods"].items():
+            # Create message server node
+            ms_node = MessageServerNode(
+                rebec_name=instance_name,
+                method_name=method_name,
+                priority=method_info["priority"]
+            )
+            ms_nodes.append(ms_node)
+            logger.debug("Created message server: %s", ms_node)
+        return ms_nodes
+
+    def _build_target_indexes(self):
+        """Lookup indexes for send targets, built once per ERDG build"""
+        # lowercase instance name -> instance (first declared in main wins, so
+        # resolution is deterministic); lowercase class name -> all its instances
+        self._instance_by_lower = {}
+        self._instances_by_class = defaultdict(list)
+        for inst in self.analysis["main_instances"]:
+            self._instance_by_lower.setdefault(inst["name"].lower(), inst["name"])
+            self._instances_by_class[inst["class"].lower()].append(inst["name"])
+        actors = self.analysis["actors"]
+        self._methods_of = {name: actors[inst["class"]]["methods"] for name, inst in self.instance_map.items()
+                            if inst["class"] in actors}
+
+    def _create_activation_nodes(self, instance: Dict) -> Tuple[List[Tuple[ActivationNode, bool]], Set[str]]:
+        """Create N_A: the activation nodes of one rebec's sends, each with whether it targets a class name.
+
+        A target is resolved as ``self``, then through the instance's known-rebec
+        bindings, then as an instance name (exact, else case-insensitive with the
+        first declared instance winning). Anything else is a class name, and the
+        send gets one activation per instance of that class, in declaration order.
+        Also returns the instances of sends dropped because the target has no such method.
+        """
+        instance_name = instance["name"]
+        actor_class = instance["class"]
+        # Timed Rebeca: known-rebec name -> instance bound to it in main
+        bindings = instance.get("knownrebecs", {})
+        activations = []
+        dropped_targets = set()
 
-            if actor_class not in self.analysis["actors"]:
-                continue
+        if actor_class not in self.analysis["actors"]:
+            return activations, dropped_targets
 
-            actor_info = self.analysis["actors"][actor_class]
+        actor_info = self.analysis["actors"][actor_class]
 
-            for method_name, method_info in actor_info["methods"].items():
-                sender_method = f"{instance_name}.{method_name}"
+        for method_name, method_info in actor_info["methods"].items():
+            send_times = method_info.get("send_times") or [(0, 0)] * len(method_info["sends"])
 
-                for target, message in method_info["sends"]:
-                    # Resolve target to actual instance name
-                    target_rebec = None
-                    if target == "self":
-                        target_rebec = instance_name
+            for (target, message), (min_offset, max_offset) in zip(method_info["sends"], send_times):
+                # Resolve target to actual instance names
+                class_targeted = False
+                if target == "self":
+                    target_rebecs = [instance_name]
+                else:
+                    target = bindings.get(target, target)
+                    if target is None:
+                        logger.debug("Skipping send through a null rebec in %s.%s", instance_name, method_name)
+                        continue
+                    if target in self.instance_map:
+                        target_rebecs = [target]
+                    elif target.lower() in self._instance_by_lower:
+                        target_rebecs = [self._instance_by_lower[target.lower()]]
                     else:
-                        # First try direct instance name lookup
-                        if target in self.instance_map:
-                            target_rebec = target
-                        else:
-                            # Try case-insensitive match for instance names
-                            for inst_name in self.instance_map.keys():
-                                if inst_name.lower() == target.lower():
-                                    target_rebec = inst_name
-                                    break
-
-                            # If still not found, try to match by class name
-                            if not target_rebec:
-                                for inst in self.analysis["main_instances"]:
-                                    if inst["class"].lower() == target.lower():
-                                        target_rebec = inst["name"]
-                                        
-
-                            if not target_rebec:
-                                print(f"Warning: Unknown target actor '{target}' in send statement from {instance_name}.{method_name}")
-                                continue
+                        # A class name: the message may reach any of its instances
+                        target_rebecs = self._instances_by_class.get(target.lower(), [])
+                        class_targeted = True
 
+                    if not target_rebecs:
+                        logger.warning("Unknown target actor '%s' in send statement from %s.%s", target, instance_name, method_name)
+                        continue
+
+                for target_rebec in target_rebecs:
                     # Verify target method exists
-                    target_class = None
-                    for inst in self.analysis["main_instances"]:
-                        if inst["name"] == target_rebec:
-                            target_class = inst["class"]
-                            break
-
-                    if target_class and target_class in self.analysis["actors"]:
-                        target_methods = self.analysis["actors"][target_class]["methods"]
-                        if message not in target_methods:
-                            print(f"Warning: Method '{message}' not found in target actor '{target_rebec}' (class: {target_class})")
-                            continue
+                    target_methods = self._methods_of.get(target_rebec)
+                    if target_methods is not None and message not in target_methods:
+                        logger.warning("Method '%s' not found in target actor '%s' (class: %s)",
+                                       message, target_rebec, self.instance_map[target_rebec]["class"])
+                        dropped_targets.add(target_rebec)
+                        continue
 
                     # Create activation node
                     activation = ActivationNode(
                         sender_rebec=instance_name,
                         sender_method=method_name,
                         target_rebec=target_rebec,
-                        message_name=message
+                        message_name=message,
+                        delay_time=min_offset or None,
+                        max_delay_time=max_offset or None
                     )
-                    self.N_A.append(activation)
-
-                    # Create edges
-                    self.E_MA.append((sender_method, str(activation)))
-                    self.E_AR.append((str(activation), target_rebec))
-                    target_ms = f"{target_rebec}.{message}"
-                    self.E_AM.append((str(activation), target_ms))
+                    activations.append((activation, class_targeted))
+                    logger.debug("Created activation: %s", activation)
+        return activations, dropped_targets
 
-                    print(f"Created activation: {activation}")
     def has_self_send_in_constructor(self, actor_class: str) -> bool:
         """Check if the constructor method of actor_class sends message to self"""
         if actor_class not in self.analysis["actors"]:
@@ -183,96 +922,406 @@ class ERDGTestGenerator:
                 return True
         return False
 
-    def _create_intra_rebec_dependencies(self):
-        """Create intra-rebec data dependencies (E_I edges)"""
-        for instance in self.analysis["main_instances"]:
-            instance_name = instance["name"]
-            actor_class = instance["class"]
+    def _create_intra_rebec_dependencies(self, instance: Dict) -> List[Tuple[str, str]]:
+        """Create intra-rebec data dependencies (E_I edges) of one rebec instance"""
+        instance_name = instance["name"]
+        actor_class = instance["class"]
+        intra_edges = []
 
-            if actor_class not in self.analysis["actors"]:
-                continue
+        if actor_class not in self.analysis["actors"]:
+            return intra_edges
+
+        actor_info = self.analysis["actors"][actor_class]
+        variables = actor_info["statevars"]
+        methods = actor_info["methods"]
+
+        # ترتیب ثابت متغیرها تا خروجی در هر پردازه یکسان باشد
+        for var in sorted(variables):
+            last_writer = None
+            last_writer_method = None
+
+            # Process methods (we could sort by priority if needed)
+            for method_name, method_info in methods.items():
+                ms_node = f"{instance_name}.{method_name}"
+
+                # If method writes to variable
+                if var in method_info["writes"]:
+                    # اگر متد هم نام با کلاس است (constructor)، از آن صرف نظر کن
+                    if method_name.lower() == actor_class.lower():
+                        logger.debug("Skipping E_I edge for constructor method: %s in class %s", method_name, actor_class)
+                        last_writer = ms_node  # Still update last_writer for future dependencies
+                        last_writer_method = method_name
+                        continue
+
+                    if last_writer:  # Write-after-write dependency
+                        # بررسی کن که last_writer هم constructor نباشد
+                        if last_writer_method.lower() != actor_class.lower():
+                            intra_edges.append((last_writer, ms_node))
+                            logger.debug("Added E_I edge (write-after-write): %s → %s for variable %s", last_writer, ms_node, var)
+                    last_writer = ms_node
+                    last_writer_method = method_name
+
+                # If method reads from variable
+                if var in method_info["reads"] and last_writer:
+                    # اگر current method constructor است، edge رسم نکن
+                    if method_name.lower() == actor_class.lower():
+                        logger.debug("Skipping E_I edge for constructor method: %s in class %s", method_name, actor_class)
+                        continue
+
+                    # اگر last_writer constructor است، edge رسم نکن
+                    if last_writer_method.lower() == actor_class.lower():
+                        logger.debug("Skipping E_I edge from constructor method: %s in class %s", last_writer_method, actor_class)
+                        continue
+
+                    intra_edges.append((last_writer, ms_node))
+                    logger.debug("Added E_I edge (read-after-write): %s → %s for variable %s", last_writer, ms_node, var)
+        return intra_edges
+
+    def detect_interchangeable_instances(self):
+        """Partition rebecs into orbits of interchangeable instances (symmetry reduction).
+
+        Two instances are interchangeable when they have the same class,
+        priority and constructor arguments and swapping their names maps the set of activations onto
+        itself. Sends addressed by class name target the class as a whole, so
+        they do not distinguish its instances.
+        """
+        outgoing = defaultdict(list)
+        incoming = defaultdict(list)
+        for idx, activation in enumerate(self.N_A):
+            if idx in self.class_targeted_activations:
+                target = f"<{self.instance_map[activation.target_rebec]['class']}>"
+            else:
+                target = activation.target_rebec
+                incoming[target].append((activation.sender_rebec, activation.sender_method, activation.message_name))
+            outgoing[activation.sender_rebec].append((activation.sender_method, target, activation.message_name))
+
+        def swappable(r1, r2):
+            swap = {r1: r2, r2: r1}
+            out_1 = sorted((m, swap.get(t, t), msg) for m, t, msg in outgoing[r1])
+            in_1 = sorted((swap.get(snd, snd), m, msg) for snd, m, msg in incoming[r1])
+            return out_1 == sorted(outgoing[r2]) and in_1 == sorted(incoming[r2])
+
+        # Cheap renaming-invariant signature first, exact swap check within a bucket
+        buckets = defaultdict(list)
+        for r in self.N_R:
+            signature = (
+                r.actor_class,
+                r.priority,
+                # Different constructor arguments give different initial states
+                r.arg,
+                tuple(sorted((m, msg) for m, _, msg in outgoing[r.name])),
+                tuple(sorted((m, msg) for _, m, msg in incoming[r.name])),
+            )
+            buckets[signature].append(r.name)
+
+        self.instance_orbits = []
+        self.orbit_of = {}
+        for members in buckets.values():
+            orbits = []
+            for r in members:
+                # Swappability is transitive, so comparing with one representative suffices
+                for orbit in orbits:
+                    if swappable(orbit[0], r):
+                        orbit.append(r)
+                        break
+                else:
+                    orbits.append([r])
+            for orbit in orbits:
+                if len(orbit) > 1:
+                    self.instance_orbits.append(orbit)
+                    for r in orbit:
+                        self.orbit_of[r] = orbit[0]
 
-            actor_info = self.analysis["actors"][actor_class]
-            variables = actor_info["statevars"]
-            methods = actor_info["methods"]
-
-            for var in variables:
-                last_writer = None
-
-                # Process methods (we could sort by priority if needed)
-                for method_name, method_info in methods.items():
-                    ms_node = f"{instance_name}.{method_name}"
-
-                    # If method writes to variable
-                    if var in method_info["writes"]:
-                        # اگر متد هم نام با کلاس است (constructor)، از آن صرف نظر کن
-                        if method_name.lower() == actor_class.lower():
-                            print(f"Skipping E_I edge for constructor method: {method_name} in class {actor_class}")
-                            last_writer = ms_node  # Still update last_writer for future dependencies
-                            continue
-
-                        if last_writer:  # Write-after-write dependency
-                            # بررسی کن که last_writer هم constructor نباشد
-                            last_writer_method = last_writer.split('.')[1]
-                            if last_writer_method.lower() != actor_class.lower():
-                                self.E_I.append((last_writer, ms_node))
-                                print(f"Added E_I edge (write-after-write): {last_writer} → {ms_node} for variable {var}")
-                        last_writer = ms_node
-
-                    # If method reads from variable
-                    if var in method_info["reads"] and last_writer:
-                        # اگر current method constructor است، edge رسم نکن
-                        if method_name.lower() == actor_class.lower():
-                            print(f"Skipping E_I edge for constructor method: {method_name} in class {actor_class}")
-                            continue
-
-                        # اگر last_writer constructor است، edge رسم نکن
-                        last_writer_method = last_writer.split('.')[1]
-                        if last_writer_method.lower() == actor_class.lower():
-                            print(f"Skipping E_I edge from constructor method: {last_writer_method} in class {actor_class}")
-                            continue
-
-                        self.E_I.append((last_writer, ms_node))
-                        print(f"Added E_I edge (read-after-write): {last_writer} → {ms_node} for variable {var}")
+        logger.info("Interchangeable instance orbits: %s", self.instance_orbits)
 
     # ======== Algorithm Implementation ========
 
+    def _index_activations(self):
+        """Index N_A by sender, then target, so per-pair checks avoid rescanning N_A"""
+        self.sends_by_sender: Dict[str, Dict[str, List[ActivationNode]]] = {r.name: {} for r in self.N_R}
+        # target -> senders, in N_R order (dict as an ordered set)
+        self.senders_by_target: Dict[str, Dict[str, None]] = defaultdict(dict)
+        for activation in self.N_A:
+            targets = self.sends_by_sender.setdefault(activation.sender_rebec, {})
+            targets.setdefault(activation.target_rebec, []).append(activation)
+            self.senders_by_target[activation.target_rebec][activation.sender_rebec] = None
+
     def are_actor_dependent(self, r1: str, r2: str) -> bool:
         """Check if two rebec actors are actor dependent (Definition from algorithm)"""
-        # Find all activations where r1 and r2 send to the same target
-        r1_targets = set()
-        r2_targets = set()
-
-        for activation in self.N_A:
-            if activation.sender_rebec == r1:
-                r1_targets.add(activation.target_rebec)
-            elif activation.sender_rebec == r2:
-                r2_targets.add(activation.target_rebec)
+        # Find all targets both r1 and r2 send to
+        r1_targets = self.sends_by_sender.get(r1, {})
+        r2_targets = self.sends_by_sender.get(r2, {})
+        common_targets = [t for t in r1_targets if t in r2_targets]
 
-        # Check for common targets
-        common_targets = r1_targets.intersection(r2_targets)
+        return self._are_dependent_through(r1, r2, common_targets)
 
+    def _are_dependent_through(self, r1: str, r2: str, common_targets: Iterable[str]) -> bool:
+        """Per-pair hook: do the sends of r1 and r2 to any common target conflict?"""
         for target in common_targets:
             # Check if there's no causal path between the two senders
-            if not self._has_causal_path_between_actors(r1, r2, target):
+            if self._has_causal_path_between_actors(r1, r2, target):
+                continue
+            # ... and that their messages can be pending at target at the same logical time
+            if self._may_be_pending_together(r1, r2, target):
                 return True
 
         return False
 
+    def _actor_dependency_edges(self) -> List[Tuple[str, str]]:
+        """All actor-dependent pairs (i < j in N_R order), without an O(R^2) pair loop.
+
+        Builds a sender x target incidence matrix once, restricted to targets
+        with at least two senders; one matrix product then yields every pair of
+        senders sharing a target, and only those pairs go through the per-pair
+        causal/timing filter.
+        """
+        rebec_names = [r.name for r in self.N_R]
+        position = {name: i for i, name in enumerate(rebec_names)}
+
+        senders_of = defaultdict(list)
+        for sender in rebec_names:
+            for target in self.sends_by_sender.get(sender, {}):
+                senders_of[target].append(position[sender])
+        shared_targets = [t for t, senders in senders_of.items() if len(senders) > 1]
+
+        np = _load_numpy() if len(rebec_names) >= NUMPY_MIN_REBECS else None
+        if np is not None:
+            incidence = np.zeros((len(rebec_names), len(shared_targets)), dtype=np.float32)
+            for column, target in enumerate(shared_targets):
+                incidence[senders_of[target], column] = 1
+            shares_target = np.triu(incidence @ incidence.T, k=1) > 0
+            candidates = zip(*np.nonzero(shares_target))
+        else:
+            pairs = set()
+            for target in shared_targets:
+                senders = senders_of[target]
+                pairs.update((a, b) for a in senders for b in senders if a < b)
+            candidates = sorted(pairs)
+
+        edges = []
+        self.rechecked_pairs = 0
+        for i, j in candidates:
+            r1, r2 = rebec_names[i], rebec_names[j]
+            targets_2 = self.sends_by_sender[r2]
+            common_targets = [t for t in self.sends_by_sender[r1] if t in targets_2]
+            self.rechecked_pairs += 1
+            if self._are_dependent_through(r1, r2, common_targets):
+                edges.append((r1, r2))
+        return edges
+
+    def _patch_actor_dependency_edges(self, dirty: Set[str], previous_edges: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+        """Actor-dependent pairs after an edit, re-checking only pairs that involve a dirty rebec or share a dirty target"""
+        position = {r.name: i for i, r in enumerate(self.N_R)}
+
+        def ordered(a, b):
+            return (a, b) if position[a] < position[b] else (b, a)
+
+        recheck = set()
+        for target in dirty:
+            senders = list(self.senders_by_target.get(target, ()))
+            recheck.update(ordered(a, b) for k, a in enumerate(senders) for b in senders[k + 1:])
+        for rebec in dirty:
+            for target in self.sends_by_sender.get(rebec, {}):
+                recheck.update(ordered(rebec, other) for other in self.senders_by_target[target] if other != rebec)
+
+        # Every other pair keeps its verdict: its sends, and the reachability and timing they are checked against, are unchanged
+        edges = [(r1, r2) for r1, r2 in previous_edges
+                 if r1 not in dirty and r2 not in dirty and (r1, r2) not in recheck]
+        for r1, r2 in recheck:
+            targets_2 = self.sends_by_sender[r2]
+            if self._are_dependent_through(r1, r2, [t for t in self.sends_by_sender[r1] if t in targets_2]):
+                edges.append((r1, r2))
+        self.rechecked_pairs = len(recheck)
+
+        edges.sort(key=lambda edge: (position[edge[0]], position[edge[1]]))
+        return edges
+
     def _has_causal_path_between_actors(self, r1: str, r2: str, target: str) -> bool:
-        """Check if there's a causal path between r1 and r2 through target"""
-        # Simplified: assume no causal path for now
-        # This could be enhanced with proper causality analysis
+        """Check if there's a causal path between r1 and r2 through target.
+
+        Each send of r1 to target must be causally ordered with each send of r2
+        to target: one of the two messages must dominate the message server
+        from which the other one is sent, i.e. every path from a constructor to
+        that server goes through the first message. Then the second message is
+        only sent after the first was handled, and the two can never be pending
+        at target together. Mere reachability is not enough: the second server
+        may also be triggered some other way.
+        """
+        sends_1 = self.sends_by_sender.get(r1, {}).get(target, [])
+        sends_2 = self.sends_by_sender.get(r2, {}).get(target, [])
+        if not sends_1 or not sends_2:
+            return False
+
+        for a1 in sends_1:
+            for a2 in sends_2:
+                if not (self._message_dominates(a1, f"{r2}.{a2.sender_method}")
+                        or self._message_dominates(a2, f"{r1}.{a1.sender_method}")):
+                    return False
+        return True
+
+    def _message_dominates(self, activation: ActivationNode, ms_name: str) -> bool:
+        """O(1) query: does every path from a constructor to message server ms_name go through activation?"""
+        outer = self._dominance.get(self.graph.nodes.id(str(activation)))
+        inner = self._dominance.get(self.graph.nodes.id(ms_name))
+        return outer is not None and inner is not None and outer[0] <= inner[0] and inner[1] <= outer[1]
+
+    def _build_causal_index(self):
+        """Precompute reachability between message servers over E_MA/E_AM as bitsets, and dominance.
+
+        Message server m reaches m' when m sends a message (transitively) handled
+        by m'. Reachability is reflexive; SCCs share one bitset. Dominance is
+        kept as preorder intervals of the dominator tree.
+        """
+        # Position of each message server in N_M, keyed by its graph node ID
+        self._ms_position = {}
+        for i, m in enumerate(self.N_M):
+            self._ms_position[self.graph.nodes.id(str(m))] = i
+
+        # m -> activation (E_MA) -> m' (E_AM), straight over the CSR adjacency
+        successors = [[] for _ in self.N_M]
+        for ms_id, i in self._ms_position.items():
+            for activation_id in self.graph.successors("E_MA", ms_id):
+                for target_id in self.graph.successors("E_AM", activation_id):
+                    target = self._ms_position.get(target_id)
+                    if target is not None:
+                        successors[i].append(target)
+
+        components = _strongly_connected_components(successors)
+        component_of = [0] * len(self.N_M)
+        for c, members in enumerate(components):
+            for member in members:
+                component_of[member] = c
+
+        # Tarjan yields sinks first, so successor components are already closed
+        component_reach = [0] * len(components)
+        for c, members in enumerate(components):
+            bits = 0
+            for member in members:
+                bits |= 1 << member
+                for nxt in successors[member]:
+                    if component_of[nxt] != c:
+                        bits |= component_reach[component_of[nxt]]
+            component_reach[c] = bits
+
+        self._reach = [component_reach[component_of[i]] for i in range(len(self.N_M))]
+
+        # Dominator tree over message servers and activations, rooted at the constructors
+        constructors = [ms_id for ms_id, i in self._ms_position.items()
+                        if self.N_M[i].method_name.lower() == self.instance_map[self.N_M[i].rebec_name]["class"].lower()]
+
+        def ms_or_activation_successors(node_id):
+            if node_id in self._ms_position:
+                return self.graph.successors("E_MA", node_id)
+            return self.graph.successors("E_AM", node_id)
+
+        self._idom = _immediate_dominators(constructors, ms_or_activation_successors)
+        self._dominance = _dominator_intervals(self._idom)
+
+    def _busy_rebecs(self) -> Set[str]:
+        """Rebecs whose class has a message server (or constructor) that delays"""
+        busy_classes = {actor_class for actor_class, class_info in self.analysis["actors"].items()
+                        if any(info.get("delay", 0) > 0 for info in class_info["methods"].values())}
+        return {name for name, inst in self.instance_map.items() if inst["class"] in busy_classes}
+
+    def _compute_timing_windows(self):
+        """Bound the logical time at which each message server may start and each activation may arrive.
+
+        Constructors start at time 0. The earliest start is a shortest path over
+        the minimum send offsets (delay + after); the latest start a longest path
+        over the maximum offsets, which is unbounded on cycles. A message server
+        of a busy rebec may be queued behind one that delays, so its latest start
+        is unbounded too. Message servers no constructor can reach get the
+        unknown window [0, inf].
+        """
+        earliest = [INF] * len(self.N_M)
+        latest = [-INF] * len(self.N_M)
+        constructor = [m.method_name.lower() == self.instance_map[m.rebec_name]["class"].lower() for m in self.N_M]
+        for i, is_constructor in enumerate(constructor):
+            if is_constructor:
+                earliest[i] = latest[i] = 0
+
+        edges = [[] for _ in self.N_M]
+        for activation, (sender_id, target_id) in zip(self.N_A, self.activation_endpoints):
+            src = self._ms_position.get(sender_id)
+            dst = self._ms_position.get(target_id)
+            if src is not None and dst is not None:
+                edges[src].append((dst, activation.delay_time or 0, activation.max_delay_time or 0))
+
+        # Earliest start: Dijkstra from all constructors (offsets are non-negative)
+        heap = [(0, i) for i in range(len(self.N_M)) if earliest[i] == 0]
+        heapify(heap)
+        while heap:
+            time, node = heappop(heap)
+            if time > earliest[node]:
+                continue
+            for dst, min_offset, _ in edges[node]:
+                if time + min_offset < earliest[dst]:
+                    earliest[dst] = time + min_offset
+                    heappush(heap, (earliest[dst], dst))
+
+        # Latest start: longest path over the SCC condensation, in topological order
+        components = _strongly_connected_components([[dst for dst, _, _ in out] for out in edges])
+        for members in reversed(components):
+            cyclic = len(members) > 1 or any(dst == members[0] for dst, _, _ in edges[members[0]])
+            if cyclic and max(latest[m] for m in members) > -INF:
+                for m in members:
+                    latest[m] = INF
+            for m in members:
+                if latest[m] > -INF and not constructor[m] and self.N_M[m].rebec_name in self.busy_rebecs:
+                    latest[m] = INF
+                for dst, _, max_offset in edges[m]:
+                    latest[dst] = max(latest[dst], latest[m] + max_offset)
+
+        self.ms_start_windows = {}
+        for i, m in enumerate(self.N_M):
+            if earliest[i] == INF:
+                earliest[i], latest[i] = 0, INF
+            self.ms_start_windows[str(m)] = (earliest[i], latest[i])
+
+        for activation, (sender_id, _) in zip(self.N_A, self.activation_endpoints):
+            sender = self._ms_position.get(sender_id)
+            start = (earliest[sender], latest[sender]) if sender is not None else (0, INF)
+            activation.earliest_arrival = start[0] + (activation.delay_time or 0)
+            activation.latest_arrival = start[1] + (activation.max_delay_time or 0)
+
+    def _may_be_pending_together(self, r1: str, r2: str, target: str) -> bool:
+        """Can a message from r1 and one from r2 be pending at target at the same logical time?
+
+        A target whose message servers never delay handles every message at its
+        arrival time, so only overlapping arrival windows can coincide. A target
+        that delays may hold a message back arbitrarily long.
+        """
+        busy = target in self.busy_rebecs
+
+        sends_1 = self.sends_by_sender.get(r1, {}).get(target, [])
+        sends_2 = self.sends_by_sender.get(r2, {}).get(target, [])
+        for a1 in sends_1:
+            for a2 in sends_2:
+                latest_1 = INF if busy else a1.latest_arrival
+                latest_2 = INF if busy else a2.latest_arrival
+                if a1.earliest_arrival <= latest_2 and a2.earliest_arrival <= latest_1:
+                    return True
         return False
 
+    def has_causal_path(self, src_ms: str, dst_ms: str) -> bool:
+        """O(1) query: can processing message server src_ms (transitively) trigger dst_ms?"""
+        src = self._ms_position.get(self.graph.nodes.id(src_ms))
+        dst = self._ms_position.get(self.graph.nodes.id(dst_ms))
+        if src is None or dst is None:
+            return False
+        return bool((self._reach[src] >> dst) & 1)
+
     def messages_may_interfere(self, group_i: List[str], group_j: List[str]) -> bool:
         """Check if messages from group_i may interfere with group_j via send message"""
+        group_j = set(group_j)
         for sender in group_i:
-            for activation in self.N_A:
-                if activation.sender_rebec == sender and activation.target_rebec in group_j:
+            for target in self.sends_by_sender.get(sender, {}):
+                if target in group_j:
                     return True
         return False
-    def draw_erdg(self, filename="ERDG"):
+    def draw_erdg(self, filename="ERDG", render=True):
+        from graphviz import Digraph
+
         dot = Digraph(comment="ERDG", format="png")
         dot.attr(rankdir="TB")
 
@@ -289,43 +1338,67 @@ class ERDGTestGenerator:
             dot.node(str(a), shape="diamond", style="filled", color="orange")
 
         # Draw edges
-        for (src, dst) in self.E_RM:
-            dot.edge(src, dst, color="gray")
-        for (src, dst) in self.E_MA:
-            dot.edge(src, dst, color="green")
-        for (src, dst) in self.E_AR:
-            dot.edge(src, dst, color="red")
-        for (src, dst) in self.E_AM:
-            dot.edge(src, dst, color="orange")
-        for (src, dst) in self.E_I:
-            dot.edge(src, dst, color="purple", style="dashed")
-
-        dot.render(f"outputs/images/{filename}", view=False)
-        print(f"✅ ERDG graph saved as {filename}.png")
-
-
-    def step1_build_actor_dependency_graph(self):
+        for relation, style in ERDG_EDGE_STYLES.items():
+            for (src, dst) in self.graph.edges(relation):
+                dot.edge(src, dst, **style)
+
+        if render and render_graph(dot, filename):
+            logger.info("✅ ERDG graph saved as %s.png", filename)
+        return dot
+
+
+    def _dirty_rebecs(self, previous: Dict) -> Optional[Set[str]]:
+        """Rebecs whose actor-dependency checks may differ from the previous build; None means all of them.
+
+        A pair check reads the senders' activations, the dominators and start
+        windows of message servers, and the delays of the target's class.
+        Dominators are compared by node ID, which only holds while N_M is unchanged.
+        """
+        if previous["AG"]["nodes"] != [r.name for r in self.N_R] or "message_servers" in self.erdg_changes:
+            return None
+
+        dirty = set(self.changed_senders)
+        dirty.update(name for name, inst in self.instance_map.items() if inst["class"] in previous["delay_changed_classes"])
+        if self.erdg_changes & {"activations", "timing"}:
+            for ms_id, i in self._ms_position.items():
+                m = self.N_M[i]
+                name = str(m)
+                if _dominator_chain(self._idom, ms_id) != _dominator_chain(previous["idom"], ms_id) \
+                        or self.ms_start_windows[name] != previous["ms_start_windows"][name]:
+                    dirty.add(m.rebec_name)
+        return dirty
+
+    def step1_build_actor_dependency_graph(self, previous: Optional[Dict] = None):
         """Step 1: Build Actor Dependency Graph"""
-        print("\n=== Step 1: Building Actor Dependency Graph ===")
+        logger.info("=== Step 1: Building Actor Dependency Graph ===")
+
+        # Incremental update: re-check only pairs the edit may have affected;
+        # when most rebecs are affected the full scan is cheaper
+        dirty = self._dirty_rebecs(previous) if previous is not None else None
+        if dirty is not None and len(dirty) > len(self.N_R) * PATCH_MAX_DIRTY_FRACTION:
+            dirty = None
+        if dirty is not None and not dirty:
+            self.AG = previous["AG"]
+            self.rechecked_pairs = 0
+            logger.info("Actor Dependency Graph unchanged: %s edges", len(self.AG['edges']))
+            return
 
         # Initialize undirected graph AG = (N_R, E_D)
         self.AG = {"nodes": [r.name for r in self.N_R], "edges": []}
 
-        # Check all pairs of rebecs
-        rebec_names = [r.name for r in self.N_R]
-        for i, r1 in enumerate(rebec_names):
-            for j, r2 in enumerate(rebec_names):
-                if i < j:  # Avoid duplicate pairs and self-loops
-                    if self.are_actor_dependent(r1, r2):
-                        self.AG["edges"].append((r1, r2))
-                        print(f"Added actor dependency edge: {r1} <-> {r2}")
+        # Only pairs of rebecs sharing a target can be dependent
+        for r1, r2 in (self._actor_dependency_edges() if dirty is None
+                       else self._patch_actor_dependency_edges(dirty, previous["AG"]["edges"])):
+            self.AG["edges"].append((r1, r2))
+            logger.debug("Added actor dependency edge: %s <-> %s", r1, r2)
 
-        print(f"Actor Dependency Graph: {len(self.AG['edges'])} edges")
+        logger.info("Actor Dependency Graph: %s edges", len(self.AG['edges']))
 
-        # 👉 Draw the graph here
-        self.draw_actor_dependency_graph("AG")
+        self.AG["adjacency"] = _undirected_adjacency(self.AG["nodes"], self.AG["edges"])
+
+    def draw_actor_dependency_graph(self, filename="AG", render=True):
+        from graphviz import Graph
 
-    def draw_actor_dependency_graph(self, filename="AG"):
         dot = Graph(comment="Actor Dependency Graph", format="png")
         dot.attr(rankdir="LR")
 
@@ -337,109 +1410,126 @@ class ERDGTestGenerator:
         for r1, r2 in self.AG["edges"]:
             dot.edge(r1, r2)
 
-        dot.render(f"outputs/images/{filename}", view=False)
-        print(f"✅ Actor Dependency Graph saved as {filename}.png")
+        if render and render_graph(dot, filename):
+            logger.info("✅ Actor Dependency Graph saved as %s.png", filename)
+        return dot
         
-    def step2_identify_actor_groups_and_build_hag(self):
+    def step2_identify_actor_groups_and_build_hag(self, previous: Optional[Dict] = None):
         """Step 2: Identify Actor Groups and Build Group-Level Dependency Graph (HAG)"""
-        print("\n=== Step 2: Identifying Actor Groups and Building HAG ===")
+        logger.info("=== Step 2: Identifying Actor Groups and Building HAG ===")
 
-        # Find connected components using DFS
-        self.actor_groups = self._find_connected_components(self.AG)
+        # Find connected components using DFS; an unchanged AG keeps its groups
+        groups_reused = previous is not None and (self.AG is previous["AG"] or (
+            previous["AG"]["nodes"] == self.AG["nodes"] and previous["AG"]["edges"] == self.AG["edges"]))
+        if groups_reused:
+            self.actor_groups = previous["actor_groups"]
+        else:
+            self.actor_groups = self._find_connected_components(self.AG)
 
-        print(f"Found {len(self.actor_groups)} actor groups:")
+        logger.info("Found %s actor groups:", len(self.actor_groups))
         for i, group in enumerate(self.actor_groups):
-            print(f"  Group {i+1}: {group}")
-
-        # Initialize directed graph HAG = (G, E_H)
-        self.HAG = {"groups": self.actor_groups, "edges": []}
-
-        # Check interference between groups
-        for i, group_i in enumerate(self.actor_groups):
-            for j, group_j in enumerate(self.actor_groups):
-                if i != j and self.messages_may_interfere(group_i, group_j):
-                    self.HAG["edges"].append((i, j))
-                    print(f"Added HAG edge: Group {i+1} -> Group {j+1}")
-
-        # 🔥 Resolve cycles (bidirectional edges)
-        for (src, dst) in self.HAG["edges"]:
-            if (dst, src) in self.HAG["edges"]:
-                g1 = self.actor_groups[src]
-                g2 = self.actor_groups[dst]
-
-                # بررسی شرط constructor
-                g1_has_self = any(self.has_self_send_in_constructor(self.instance_map[a]["class"]) for a in g1)
-                g2_has_self = any(self.has_self_send_in_constructor(self.instance_map[a]["class"]) for a in g2)
-
-                if g1_has_self and not g2_has_self:
-                    self.topological_order = [src, dst]
-                elif g2_has_self and not g1_has_self:
-                    self.topological_order = [dst, src]
-                else:
-                    # پیش‌فرض (اگر هر دو یا هیچ‌کدوم نداشتن)
-                    self.topological_order = [src, dst]
-
-                print(f"⚠️ Cycle detected between groups {src+1} and {dst+1}, "
-                      f"resolved order: {[i+1 for i in self.topological_order]}")
-                self.draw_hag("HAG")
-                return  
-
-        # Apply topological sort on HAG (only if no cycle)
-        self.topological_order = self._topological_sort(self.HAG)
-        print(f"Topological order of groups: {[i+1 for i in self.topological_order]}")
-
-        # 👉 Draw HAG
-        self.draw_hag("HAG")
+            logger.debug("  Group %s: %s", i+1, group)
+
+        # Same groups and sends: same HAG
+        if groups_reused and "activations" not in self.erdg_changes:
+            self.HAG = previous["HAG"]
+        else:
+            # Initialize directed graph HAG = (G, E_H)
+            self.HAG = {"groups": self.actor_groups, "edges": []}
+
+            # Check interference between groups: one pass over the sends, then
+            # (i, j) order as in a pairwise scan of the groups
+            group_of = {actor: i for i, group in enumerate(self.actor_groups) for actor in group}
+            interfering = set()
+            for sender, targets in self.sends_by_sender.items():
+                for target in targets:
+                    i, j = group_of.get(sender), group_of.get(target)
+                    if i is not None and j is not None and i != j:
+                        interfering.add((i, j))
+            for i, j in sorted(interfering):
+                self.HAG["edges"].append((i, j))
+                logger.debug("Added HAG edge: Group %s -> Group %s", i+1, j+1)
+
+            self.HAG["adjacency"] = CSRAdjacency(len(self.actor_groups),
+                                                 [src for src, _ in self.HAG["edges"]],
+                                                 [dst for _, dst in self.HAG["edges"]])
+
+        # Order the groups: topological sort of the HAG's SCC condensation,
+        # with every cycle (of any length) resolved internally. Cycles are broken
+        # by constructor self-sends, so changing one forces a re-sort.
+        if groups_reused and previous["HAG"]["edges"] == self.HAG["edges"] and not previous["self_send_changed"]:
+            self.topological_order = previous["topological_order"]
+        else:
+            self.topological_order = self._topological_sort(self.HAG)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Topological order of groups: %s", [i+1 for i in self.topological_order])
 
     def _find_connected_components(self, graph):
-        """Find connected components in undirected graph using DFS"""
-        visited = set()
-        components = []
-
-        def dfs(node, component):
-            visited.add(node)
-            component.append(node)
-            # Find neighbors
-            for edge in graph["edges"]:
-                if edge[0] == node and edge[1] not in visited:
-                    dfs(edge[1], component)
-                elif edge[1] == node and edge[0] not in visited:
-                    dfs(edge[0], component)
-
-        for node in graph["nodes"]:
-            if node not in visited:
-                component = []
-                dfs(node, component)
-                components.append(component)
-
-        return components
+        """Find connected components in undirected graph using iterative DFS, O(V+E)"""
+        adjacency = graph.get("adjacency") or _undirected_adjacency(graph["nodes"], graph["edges"])
+        components = _dfs_components(range(len(graph["nodes"])), adjacency.neighbors)
+        return [[graph["nodes"][i] for i in component] for component in components]
 
     def _topological_sort(self, hag):
-        """Topological sort using Kahn's algorithm"""
-        in_degree = [0] * len(hag["groups"])
-
-        # Calculate in-degrees
+        """Order all HAG groups in O(V+E), even when the HAG has cycles.
+
+        Strongly connected components (Tarjan) are condensed into a DAG, which is
+        ordered with Kahn's algorithm (components keyed by their smallest group
+        index, so an acyclic HAG keeps its plain Kahn order). Inside a cycle,
+        groups whose constructors send to self go first, otherwise index order.
+        """
+        num_groups = len(hag["groups"])
+        adjacency = hag.get("adjacency") or CSRAdjacency(num_groups,
+                                                         [src for src, _ in hag["edges"]],
+                                                         [dst for _, dst in hag["edges"]])
+
+        # Condense SCCs, numbering them in order of their smallest group index
+        components = _strongly_connected_components([adjacency.neighbors(i) for i in range(num_groups)])
+        components.sort(key=min)
+        component_of = [0] * num_groups
+        for c, members in enumerate(components):
+            for member in members:
+                component_of[member] = c
+
+        # Calculate in-degrees of the condensed DAG
+        in_degree = [0] * len(components)
         for src, dst in hag["edges"]:
-            in_degree[dst] += 1
+            if component_of[src] != component_of[dst]:
+                in_degree[component_of[dst]] += 1
 
-        # Initialize queue with nodes having 0 in-degree
-        queue = deque([i for i in range(len(hag["groups"])) if in_degree[i] == 0])
+        # Initialize queue with components having 0 in-degree
+        queue = deque([c for c in range(len(components)) if in_degree[c] == 0])
         result = []
 
         while queue:
-            node = queue.popleft()
-            result.append(node)
+            c = queue.popleft()
+            members = sorted(components[c])
+            if len(members) > 1:
+                # بررسی شرط constructor: گروه‌هایی که سازنده‌شان به خودشان پیام می‌دهد اول
+                members.sort(key=lambda g: not self._group_has_self_send(hag["groups"][g]))
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info("⚠️ Cycle detected between groups %s, resolved order: %s",
+                                sorted(i+1 for i in members), [i+1 for i in members])
+            result.extend(members)
 
             # Reduce in-degree of neighbors
-            for src, dst in hag["edges"]:
-                if src == node:
-                    in_degree[dst] -= 1
-                    if in_degree[dst] == 0:
-                        queue.append(dst)
+            for member in components[c]:
+                for dst in adjacency.neighbors(member):
+                    d = component_of[dst]
+                    if d != c:
+                        in_degree[d] -= 1
+                        if in_degree[d] == 0:
+                            queue.append(d)
 
         return result
 
-    def draw_hag(self, filename="HAG"):
+    def _group_has_self_send(self, group: List[str]) -> bool:
+        return any(self.has_self_send_in_constructor(self.instance_map.get(a, {}).get("class", ""))
+                   for a in group)
+
+    def draw_hag(self, filename="HAG", render=True):
+        from graphviz import Digraph
+
         dot = Digraph(comment="Hierarchical Actor Group Graph", format="png")
         dot.attr(rankdir="TB")
 
@@ -452,72 +1542,159 @@ class ERDGTestGenerator:
         for src, dst in self.HAG["edges"]:
             dot.edge(f"G{src}", f"G{dst}")
 
-        dot.render(f"outputs/images/{filename}", view=False)
-        print(f"✅ HAG saved as {filename}.png")
+        if render and render_graph(dot, filename):
+            logger.info("✅ HAG saved as %s.png", filename)
+        return dot
 
-    def step3_assign_priorities_to_actors(self):
+    def step3_assign_priorities_to_actors(self, materialize: bool = True):
         """Step 3: Assign Priorities to Actors Based on Group Ordering"""
-        print("\n=== Step 3: Assigning Priorities to Actors ===")
+        logger.info("=== Step 3: Assigning Priorities to Actors ===")
 
-        self.actor_priority_assignments = [ {} ]  # شروع با یه دیکشنری خالی
+        # هر گروه یک بلوک پیوسته از اولویت‌ها می‌گیرد: (شروع اولویت، گروه، برچسب مدار)
+        self.priority_blocks = []
+        self.num_actor_priority_assignments = 1
+        self.symmetry_factor = 1
         priority = 1
 
         for group_idx in self.topological_order:
             group = self.actor_groups[group_idx]
-            print(f"Processing group {group_idx+1}: {group}")
-
-            if len(group) == 1:
-                # فقط یه actor → اولویت ثابت
-                actor = group[0]
-                for assignment in self.actor_priority_assignments:
-                    assignment[actor] = priority
-                print(f"  Fixed assignment for {actor} -> Priority {priority}")
-                priority += 1
-                continue
-
-            # چند actor → همه permutation ها
-            new_assignments = []
-            for perm in permutations(group):
-                for assignment in self.actor_priority_assignments:
-                    new_assignment = assignment.copy()
-                    current_priority = priority
-                    for actor in perm:
-                        new_assignment[actor] = current_priority
-                        current_priority += 1
-                    new_assignments.append(new_assignment)
-                    print(f"  Permutation: {perm} -> Priorities: {new_assignment}")
-            self.actor_priority_assignments = new_assignments
+            logger.debug("Processing group %s: %s", group_idx+1, group)
+            labels = self._orbit_labels(group)
+            orderings = num_arrangements(Counter(labels))
+            self.priority_blocks.append((priority, group, labels))
+            self.num_actor_priority_assignments *= orderings
+            self.symmetry_factor *= factorial(len(group)) // orderings
             priority += len(group)
 
-        print(f"Generated {len(self.actor_priority_assignments)} actor priority assignments")
-
-
-    def step4_identify_message_dependency_components(self):
+        if materialize:
+            self.actor_priority_assignments = []
+            for assignment in self.iter_actor_priority_assignments():
+                self.actor_priority_assignments.append(assignment)
+                logger.debug("  Priorities: %s", assignment)
+
+        if self.symmetry_reduction:
+            logger.info("Symmetry reduction removed a factor of %s", self.symmetry_factor)
+        logger.info("Generated %s actor priority assignments", self.num_actor_priority_assignments)
+
+    def _orbit_labels(self, group: List[str]) -> List[str]:
+        """Label each actor of a group by its orbit; interchangeable actors share a label"""
+        return [self.orbit_of.get(actor, actor) for actor in group]
+
+    def iter_actor_priority_assignments(self) -> Iterator[Dict[str, int]]:
+        """Lazily yield actor priority assignments in the order step 3 builds them"""
+        blocks = self.priority_blocks
+
+        def block_orderings(k):
+            _, group, labels = blocks[k]
+            if len(set(labels)) == len(labels):
+                return permutations(group)
+            # فقط یک نماینده از هر مدار تقارن
+            return iter_canonical_permutations(group, labels)
+
+        # Odometer over the blocks: the first block is the fastest digit and the
+        # last the slowest. Only one ordering per block is held at a time, unlike
+        # itertools.product, which would materialize every group's permutations.
+        iterators = [block_orderings(k) for k in range(len(blocks))]
+        current = [next(iterator) for iterator in iterators]
+        while True:
+            yield PriorityMap((actor, base + offset) for (base, _, _), perm in zip(blocks, current)
+                              for offset, actor in enumerate(perm))
+
+            k = 0
+            while k < len(blocks):
+                ordering = next(iterators[k], None)
+                if ordering is not None:
+                    current[k] = ordering
+                    break
+                iterators[k] = block_orderings(k)
+                current[k] = next(iterators[k])
+                k += 1
+            else:
+                return
+
+    def step4_identify_message_dependency_components(self, previous: Optional[Dict] = None):
         """Step 4: Identify Message Server Dependency Components (Class Level)"""
-        print("\n=== Step 4: Identifying Message Dependency Components ===")
+        logger.info("=== Step 4: Identifying Message Dependency Components ===")
 
         self.class_message_permutations = {}
+        self.class_message_components = self._identify_class_message_components()
+        self.component_counts = {}
+        self.reused_classes = []
+
+        for actor_class, grouped in self.class_message_components.items():
+            logger.debug("Processing class %s", actor_class)
+
+            # Same components, E_I edges (and conflicts) as the previous build: same orderings
+            if previous is not None and previous["class_message_components"].get(actor_class) == grouped \
+                    and previous["class_intra_edges"].get(actor_class, []) == self.class_intra_edges.get(actor_class, []) \
+                    and (not self.partial_order_reduction
+                         or previous["class_conflicts"].get(actor_class) == self.class_conflicts.get(actor_class)):
+                self.class_message_permutations[actor_class] = previous["class_message_permutations"][actor_class]
+                self.component_counts[actor_class] = previous["component_counts"][actor_class]
+                self.reused_classes.append(actor_class)
+                continue
 
+            self.component_counts[actor_class] = [self._count_component_orderings(actor_class, g) for g in grouped]
+            self.class_message_permutations[actor_class] = self._class_orderings(actor_class)
+            logger.info("  Class %s: %s permutations", actor_class, len(self.class_message_permutations[actor_class]))
+
+    def _class_conflicts(self, actor_class: str) -> List[Tuple[str, str]]:
+        """Pairs of a class's message servers, in declaration order, that conflict on a state variable.
+
+        Two methods conflict when one writes a state variable the other reads or
+        writes. The constructor runs before every message server and is left out.
+        """
+        class_info = self.analysis["actors"][actor_class]
+        statevars = set(class_info["statevars"])
+        accesses = [(method, statevars.intersection(info["writes"]),
+                     statevars.intersection(info["reads"]) | statevars.intersection(info["writes"]))
+                    for method, info in class_info["methods"].items() if method.lower() != actor_class.lower()]
+        return [(m1, m2) for k, (m1, writes_1, used_1) in enumerate(accesses)
+                for m2, writes_2, used_2 in accesses[k + 1:]
+                if writes_1 & used_2 or writes_2 & used_1]
+
+    def _component_conflicts(self, actor_class: str, component: List[str]) -> List[Tuple[str, str]]:
+        members = set(component)
+        return [(m1, m2) for m1, m2 in self.class_conflicts.get(actor_class, []) if m1 in members and m2 in members]
+
+    def _class_orderings(self, actor_class: str) -> ClassOrderings:
+        """Step 4 orderings of a class over its components and component_counts, unranked on access"""
+        return ClassOrderings(self.component_counts[actor_class],
+                              lambda k, digit: self._unrank_component_ordering(actor_class, k, digit))
+
+    def _unrank_component_ordering(self, actor_class: str, k: int, digit: int) -> Tuple[str, ...]:
+        component = self.class_message_components[actor_class][k]
+        if self.partial_order_reduction:
+            # فقط ترتیب‌های متمایز جفت‌های متعارض (جهت‌دهی‌های بدون دور)
+            return _unrank_conflict_ordering(component, self._component_conflicts(actor_class, component), digit)
+        return unrank_permutation(component, digit)
+
+    def _count_component_orderings(self, actor_class: str, component: List[str]) -> int:
+        """Number of orderings step 4 gives a component, without enumerating them"""
+        if self.partial_order_reduction:
+            return _count_conflict_orderings(component, self._component_conflicts(actor_class, component))
+        return factorial(len(component))
+
+    def _identify_class_message_components(self) -> Dict[str, List[List[str]]]:
+        """Group each class's methods into E_I components (singletons for independent methods)"""
+        # یال‌های E_I را یک بار بر اساس کلاس دسته‌بندی کن
+        intra_edges_by_class = defaultdict(list)
+        for u, v in self.graph.edge_ids("E_I"):
+            src, dst = self.ms_by_id[u], self.ms_by_id[v]
+
+            src_cls = self.instance_map.get(src.rebec_name, {}).get("class")
+            dst_cls = self.instance_map.get(dst.rebec_name, {}).get("class")
+
+            if src_cls is not None and src_cls == dst_cls:
+                intra_edges_by_class[src_cls].append((src.method_name, dst.method_name))
+
+        components = {}
         for actor_class, class_info in self.analysis["actors"].items():
-            print(f"Processing class {actor_class}")
-
             # همه‌ی متدهای این کلاس
             methods = list(class_info["methods"].keys())
 
-            # همه‌ی یال‌های E_I مربوط به این کلاس
-            intra_edges = []
-            for src, dst in self.E_I:
-                src_inst, src_method = src.split('.')
-                dst_inst, dst_method = dst.split('.')
-
-                src_cls = self.instance_map.get(src_inst, {}).get("class")
-                dst_cls = self.instance_map.get(dst_inst, {}).get("class")
-
-                if src_cls == actor_class and dst_cls == actor_class:
-                    intra_edges.append((src_method, dst_method))
-
             # گروه‌بندی متدها بر اساس E_I (هر گروه باید permute بشه)
-            grouped = self._group_priority_assignment(intra_edges)
+            grouped = self._group_priority_assignment(intra_edges_by_class[actor_class])
 
             # متدهایی که داخل گروه‌ها هستند
             used_methods = set(x for g in grouped for x in g)
@@ -527,110 +1704,333 @@ class ERDGTestGenerator:
                 if m not in used_methods and m.lower() != actor_class.lower():
                     grouped.append([m])
 
-            all_permutations = []
-            from itertools import product, permutations
+            components[actor_class] = grouped
 
-            for group_perm in product(*[list(permutations(g)) for g in grouped]):
-                final_ordering = []
-                for g in group_perm:
-                    final_ordering.extend(g)
-                all_permutations.append(final_ordering)
+        self.class_intra_edges = intra_edges_by_class
+        self.class_conflicts = {actor_class: self._class_conflicts(actor_class) for actor_class in components}
+        return components
 
-            self.class_message_permutations[actor_class] = all_permutations
-            print(f"  Class {actor_class}: {len(all_permutations)} permutations")
+    def count_test_cases(self) -> Dict:
+        """Compute the number of test cases steps 3-5 would produce, without enumerating them.
+
+        The total is the product of |g|! over HAG groups (step 3) times, for every
+        class, the product of |c|! over its E_I components (step 4). With symmetry
+        reduction each group contributes |g|! / prod(k!) over its orbits instead.
+        With partial-order reduction a component contributes its number of acyclic
+        conflict orientations, which is counted block by block rather than enumerated.
+        """
+        if self.HAG is None:
+            self.build_erdg()
+            self.step1_build_actor_dependency_graph()
+            self.step2_identify_actor_groups_and_build_hag()
+
+        actor_groups = []
+        actor_total = 1
+        symmetry_factor = 1
+        for group_idx in self.topological_order:
+            group = self.actor_groups[group_idx]
+            orderings = num_arrangements(Counter(self._orbit_labels(group)))
+            actor_groups.append({"group": group, "size": len(group), "orderings": orderings})
+            actor_total *= orderings
+            symmetry_factor *= factorial(len(group)) // orderings
+
+        classes = {}
+        message_total = 1
+        for actor_class, grouped in self._identify_class_message_components().items():
+            orderings = 1
+            for g in grouped:
+                orderings *= self._count_component_orderings(actor_class, g)
+            classes[actor_class] = {"components": grouped, "orderings": orderings}
+            message_total *= orderings
+
+        return {
+            "total": actor_total * message_total,
+            "actor_priority_assignments": actor_total,
+            "symmetry_factor": symmetry_factor,
+            "instance_orbits": self.instance_orbits,
+            "method_priority_combinations": message_total,
+            "actor_groups": actor_groups,
+            "classes": classes,
+        }
 
     def _group_priority_assignment(self, intra_edges: List[Tuple[str, str]]) -> List[List[str]]:
         """گروه‌بندی متدها بر اساس یال‌های E_I"""
-        # گراف بدون جهت از intra_edges
-        neighbors = defaultdict(set)
+        # گراف بدون جهت از intra_edges (dict به جای set تا ترتیب قطعی بماند)
+        neighbors = defaultdict(dict)
         for u, v in intra_edges:
-            neighbors[u].add(v)
-            neighbors[v].add(u)
+            neighbors[u][v] = None
+            neighbors[v][u] = None
 
-        visited = set()
-        groups = []
-
-        def dfs(node, group):
-            visited.add(node)
-            group.append(node)
-            for nei in neighbors[node]:
-                if nei not in visited:
-                    dfs(nei, group)
-
-        for node in neighbors:
-            if node not in visited:
-                group = []
-                dfs(node, group)
-                groups.append(group)
-
-        return groups
+        return _dfs_components(list(neighbors), neighbors.__getitem__)
 
     def step5_generate_prioritized_test_cases(self):
         """Step 5: Generate Prioritized Test Cases"""
-        print("\n=== Step 5: Generating Prioritized Test Cases ===")
+        logger.info("=== Step 5: Generating Prioritized Test Cases ===")
 
-        self.test_cases = []
-        test_id = 1
+        self.test_cases = list(self.iter_prioritized_test_cases())
 
-        # For each combination of actor priority assignments
-        for actor_assignment in self.actor_priority_assignments:
+        logger.info("Generated %s test cases", len(self.test_cases))
 
-            # Generate all combinations of message server permutations across all classes
-            class_names = list(self.class_message_permutations.keys())
-            class_permutations = [self.class_message_permutations[cls] for cls in class_names]
+    def _class_priority_map(self, actor_class: str, k: int) -> PriorityMap:
+        """Shared {method: priority} map of a class's k-th step 4 ordering, built on first use"""
+        if self._priority_maps is None or self._priority_maps[0] is not self.class_message_permutations:
+            self._priority_maps = (self.class_message_permutations, {})
+        maps = self._priority_maps[1]
+        priority_map = maps.get((actor_class, k))
+        if priority_map is None:
+            ordering = self.class_message_permutations[actor_class][k]
+            priority_map = maps[actor_class, k] = PriorityMap(
+                (method, priority) for priority, method in enumerate(ordering, 1))
+        return priority_map
+
+    def iter_prioritized_test_cases(self) -> Iterator[TestCase]:
+        """Step 5 (streaming): yield prioritized test cases one at a time.
 
-            from itertools import product
-            for msg_combination in product(*class_permutations):
-                # Build method priorities for this combination
-                method_priorities = {}
+        Test cases share their priority maps (flyweight): one actor map per
+        assignment, one method map per class ordering (built when first used),
+        and, up to SHARED_COMBINATIONS_MAX, one map per combination of class
+        orderings.
+        """
+        class_names = list(self.class_message_permutations)
+        class_map = self._class_priority_map
 
-                for i, class_name in enumerate(class_names):
-                    method_ordering = msg_combination[i]
-                    method_priorities[class_name] = {}
+        def combinations():
+            for digits in product(*(range(self.class_orderings[c]) for c in class_names)):
+                yield PriorityMap((c, class_map(c, k)) for c, k in zip(class_names, digits))
 
-                    for priority, method in enumerate(method_ordering, 1):
-                        method_priorities[class_name][method] = priority
+        shared = list(combinations()) if self.num_method_priority_combinations <= SHARED_COMBINATIONS_MAX else None
 
-                # Create test case
-                test_case = TestCase(
+        test_id = 1
+        # For each combination of actor priority assignments
+        for actor_assignment in self.iter_actor_priority_assignments():
+            # Generate all combinations of message server permutations across all classes
+            for method_priorities in (shared if shared is not None else combinations()):
+                yield TestCase(
                     id=test_id,
-                    actor_priorities=actor_assignment.copy(),
+                    actor_priorities=actor_assignment,
                     method_priorities=method_priorities
                 )
-
-                self.test_cases.append(test_case)
                 test_id += 1
 
-        print(f"Generated {len(self.test_cases)} test cases")
+    # ======== Index-addressable test cases (mixed-radix ranking) ========
+    #
+    # Test case ``index`` (0-based, id = index + 1) is a mixed-radix number: the
+    # actor assignment is the most significant part (the last HAG group in
+    # topological order being its most significant digit) and the method
+    # combination the least significant (the last class varying fastest).
+    # Each digit is the Lehmer rank of a permutation in itertools order.
+
+    def test_case_at(self, index: int) -> TestCase:
+        """Return the test case steps 3-5 produce at position ``index`` without enumerating earlier ones"""
+        if not 0 <= index < self.num_test_cases:
+            raise IndexError(f"test case index {index} out of range [0, {self.num_test_cases})")
+
+        actor_index, message_index = divmod(index, self.num_method_priority_combinations)
+
+        actor_priorities = {}
+        for base, group, labels in self.priority_blocks:
+            actor_index, digit = divmod(actor_index, num_arrangements(Counter(labels)))
+            for offset, actor in enumerate(unrank_canonical_permutation(group, labels, digit)):
+                actor_priorities[actor] = base + offset
+
+        # A class's digit indexes its step 4 orderings, whose priority maps are shared
+        class_digits = {}
+        for actor_class in reversed(list(self.class_message_components)):
+            message_index, class_digits[actor_class] = divmod(message_index, self.class_orderings[actor_class])
+        method_priorities = PriorityMap((actor_class, self._class_priority_map(actor_class, class_digits[actor_class]))
+                                        for actor_class in self.class_message_components)
+
+        return TestCase(id=index + 1, actor_priorities=PriorityMap(actor_priorities),
+                        method_priorities=method_priorities)
+
+    def index_of(self, test_case: TestCase) -> int:
+        """Inverse of test_case_at: the 0-based position of ``test_case`` in the full enumeration"""
+        actor_index = 0
+        for base, group, labels in reversed(self.priority_blocks):
+            perm = sorted(group, key=lambda actor: test_case.actor_priorities[actor])
+            actor_index = (actor_index * num_arrangements(Counter(labels))
+                           + rank_canonical_permutation(group, labels, perm))
+
+        message_index = 0
+        for actor_class, grouped in self.class_message_components.items():
+            priorities = test_case.method_priorities[actor_class]
+            ordering = sorted(priorities, key=priorities.get)
+            class_digit = 0
+            start = 0
+            for k, g in enumerate(grouped):
+                part = ordering[start:start + len(g)]
+                class_digit = (class_digit * self._component_radix(actor_class, k)
+                               + self._component_ordering_rank(actor_class, k, part))
+                start += len(g)
+            message_index = message_index * self.class_orderings[actor_class] + class_digit
+
+        return actor_index * self.num_method_priority_combinations + message_index
+
+    def _component_radix(self, actor_class: str, k: int) -> int:
+        """Number of orderings of the k-th message component of a class"""
+        return self.component_counts[actor_class][k]
+
+    def _component_ordering_rank(self, actor_class: str, k: int, part: List[str]) -> int:
+        component = self.class_message_components[actor_class][k]
+        if self.partial_order_reduction:
+            return _rank_conflict_ordering(component, self._component_conflicts(actor_class, component), part)
+        return rank_permutation(component, part)
+
+    def iter_test_case_range(self, start: int, end: int) -> Iterator[TestCase]:
+        """Yield the test cases with 0-based index in [start, end), e.g. one shard of a split run"""
+        for index in range(max(start, 0), min(end, self.num_test_cases)):
+            yield self.test_case_at(index)
+
+    def _prepare_dependency_guided_tests(self, materialize: bool, previous: Optional[Dict] = None):
+        """Build the ERDG and run steps 1-4 of the algorithm, reusing ``previous`` results when given"""
+        logger.info("=== Dependency-Guided Test Generation using ERDG ===")
 
+        # Build ERDG first
+        with measure_step(self.metrics, "build_erdg") as counts:
+            self.build_erdg(dirty=previous["dirty_instances"] if previous is not None else None)
+            counts.update(rebecs=len(self.N_R), message_servers=len(self.N_M), activations=len(self.N_A))
+            counts.update({f"edges_{relation}": self.graph.num_edges(relation) for relation in ERDG_RELATIONS})
+
+        # Algorithm steps
+        with measure_step(self.metrics, "step1_actor_dependency_graph") as counts:
+            self.step1_build_actor_dependency_graph(previous)
+            counts.update(nodes=len(self.AG["nodes"]), edges=len(self.AG["edges"]), rechecked_pairs=self.rechecked_pairs)
+        with measure_step(self.metrics, "step2_actor_groups_and_hag") as counts:
+            self.step2_identify_actor_groups_and_build_hag(previous)
+            counts.update(groups=len(self.actor_groups), hag_edges=len(self.HAG["edges"]),
+                          largest_group=max(map(len, self.actor_groups), default=0))
+        with measure_step(self.metrics, "step3_actor_priorities") as counts:
+            self.step3_assign_priorities_to_actors(materialize=materialize)
+            counts.update(actor_priority_assignments=self.num_actor_priority_assignments,
+                          symmetry_factor=self.symmetry_factor)
+        with measure_step(self.metrics, "step4_message_components") as counts:
+            self.step4_identify_message_dependency_components(previous)
+
+            self.class_orderings = {}
+            self.num_method_priority_combinations = 1
+            for actor_class, all_permutations in self.class_message_permutations.items():
+                orderings = len(all_permutations)
+                self.class_orderings[actor_class] = orderings
+                self.num_method_priority_combinations *= orderings
+
+            counts.update(classes=len(self.class_message_components),
+                          components=sum(map(len, self.class_message_components.values())),
+                          reused_classes=len(self.reused_classes),
+                          method_priority_combinations=self.num_method_priority_combinations)
+
+        self.num_test_cases = self.num_actor_priority_assignments * self.num_method_priority_combinations
+
+    def update_analysis(self, analysis_result: Dict) -> Dict:
+        """Re-run the ERDG and steps 1-4 for an edited model, recomputing only what the edit touched.
+
+        The new summary is diffed against the current one by class and by
+        instance. Only the fragments of affected instances are rebuilt, only
+        actor pairs whose sends, reachability or timing changed are re-checked,
+        groups and group order are kept while the AG and HAG are unchanged, and
+        step 4 orderings are kept for classes with the same components.
+        Returns what changed and what was recomputed.
+        """
+        if self.HAG is None or not self.fragments:
+            # Nothing to reuse yet (a loaded generator keeps no fragments)
+            self.__init__(analysis_result, self.symmetry_reduction, self.partial_order_reduction, self.metrics)
+            self._prepare_dependency_guided_tests(materialize=False)
+            return {"full_rebuild": True, "rebuilt_instances": len(self.N_R)}
+
+        old_actors, new_actors = self.analysis["actors"], analysis_result["actors"]
+        changed_classes = {c for c in old_actors.keys() | new_actors.keys() if old_actors.get(c) != new_actors.get(c)}
+        # Classes whose set of message servers changed: sends to them may now resolve differently
+        reshaped_classes = {c for c in changed_classes
+                            if old_actors.get(c, {}).get("methods", {}).keys()
+                            != new_actors.get(c, {}).get("methods", {}).keys()}
+        # Target delays decide whether messages can be pending together (step 1);
+        # constructor self-sends break HAG cycles (step 2)
+        delays_before = {c: _method_delays(old_actors[c]) for c in changed_classes if c in old_actors}
+        self_sends_before = {c: self.has_self_send_in_constructor(c) for c in changed_classes}
+        old_layout = [(inst["name"], inst["class"]) for inst in self.analysis["main_instances"]]
+        changed_instances = {inst["name"] for inst in analysis_result["main_instances"]
+                             if self.instance_map.get(inst["name"]) != inst}
+
+        previous = {
+            "AG": self.AG, "HAG": self.HAG,
+            "actor_groups": self.actor_groups, "topological_order": self.topological_order,
+            "idom": self._idom, "ms_start_windows": self.ms_start_windows,
+            "class_message_components": self.class_message_components,
+            "class_intra_edges": self.class_intra_edges,
+            "class_message_permutations": self.class_message_permutations,
+            "class_conflicts": self.class_conflicts,
+            "component_counts": self.component_counts,
+        }
 
+        self.analysis = analysis_result
+        self.instance_map = {inst["name"]: inst for inst in analysis_result["main_instances"]}
+        self.test_cases = []
+        previous["delay_changed_classes"] = {c for c in changed_classes if delays_before.get(c)
+                                             != (_method_delays(new_actors[c]) if c in new_actors else None)}
+        previous["self_send_changed"] = any(self.has_self_send_in_constructor(c) != self_sends_before[c]
+                                            for c in changed_classes)
+
+        if [(inst["name"], inst["class"]) for inst in analysis_result["main_instances"]] == old_layout:
+            touched = {name for name, inst in self.instance_map.items() if inst["class"] in reshaped_classes}
+            dirty = set(changed_instances)
+            dirty |= {name for name, inst in self.instance_map.items() if inst["class"] in changed_classes}
+            dirty |= {name for name, fragment in self.fragments.items()
+                      if not touched.isdisjoint(a.target_rebec for a, _ in fragment["activations"])
+                      or not touched.isdisjoint(fragment["dropped_targets"])}
+        else:
+            # Added, removed, reordered or retyped instances change target resolution everywhere
+            dirty = set(self.instance_map)
+        previous["dirty_instances"] = dirty
+
+        self._prepare_dependency_guided_tests(materialize=False, previous=previous)
+
+        report = {
+            "full_rebuild": False,
+            "changed_classes": sorted(changed_classes),
+            "changed_instances": sorted(changed_instances),
+            "rebuilt_instances": len(dirty),
+            "rechecked_pairs": self.rechecked_pairs,
+            "actor_groups_reused": self.actor_groups is previous["actor_groups"],
+            "reused_classes": self.reused_classes,
+        }
+        logger.info("Incremental update: %s", report)
+        return report
 
     def generate_dependency_guided_tests(self) -> List[TestCase]:
         """Main method implementing the complete algorithm"""
-        print("\n=== Dependency-Guided Test Generation using ERDG ===")
+        self._prepare_dependency_guided_tests(materialize=True)
+        with measure_step(self.metrics, "step5_test_cases") as counts:
+            self.step5_generate_prioritized_test_cases()
+            counts["test_cases"] = len(self.test_cases)
 
-        # Build ERDG first
-        self.build_erdg()
+        return self.test_cases
 
-        # Algorithm steps
-        self.step1_build_actor_dependency_graph()
-        self.step2_identify_actor_groups_and_build_hag()
-        self.step3_assign_priorities_to_actors()
-        self.step4_identify_message_dependency_components()
-        self.step5_generate_prioritized_test_cases()
+    def iter_dependency_guided_tests(self) -> Iterator[TestCase]:
+        """Streaming variant of generate_dependency_guided_tests.
 
-        return self.test_cases
+        Steps 1-4 run eagerly; the returned iterator yields step 5 test cases
+        lazily so memory stays flat regardless of how many cases there are.
+        The total is available beforehand as ``self.num_test_cases``. Step 5
+        metrics, if wanted, are recorded by whoever consumes the iterator.
+        """
+        self._prepare_dependency_guided_tests(materialize=False)
+        logger.info("=== Step 5: Streaming Prioritized Test Cases ===")
+        logger.info("Streaming %s test cases", self.num_test_cases)
+
+        return self.iter_prioritized_test_cases()
+
+    def print_test_cases(self, test_cases: Optional[Iterable[TestCase]] = None, limit: int = 10):
+        """Print the first ``limit`` generated test cases"""
+        if test_cases is None:
+            test_cases = self.test_cases if self.test_cases else self.iter_prioritized_test_cases()
 
-    def print_test_cases(self):
-        """Print all generated test cases"""
-        print(f"\n=== Generated Test Cases ({len(self.test_cases)}) ===")
+        print(f"\n=== Generated Test Cases ({self.num_test_cases}) ===")
 
-        for i, test_case in enumerate(self.test_cases[:10]):  # Show first 10
+        for test_case in islice(test_cases, limit):
             print(f"\nTest Case {test_case.id}:")
             print(f"  Actor Priorities: {test_case.actor_priorities}")
             print(f"  Method Priorities:")
             for class_name, methods in test_case.method_priorities.items():
                 print(f"    {class_name}: {methods}")
 
-        if len(self.test_cases) > 10:
-            print(f"\n... and {len(self.test_cases) - 10} more test cases")
+        if self.num_test_cases > limit:
+            print(f"\n... and {self.num_test_cases - limit} more test cases")
@@ -3,7 +3,8 @@ from typing import Dict, Optional
 
 
 # ======== Data Structures for ERDG ========
-@dataclass
+# Nodes and test cases exist by the hundred thousand, so they use __slots__
+@dataclass(slots=True)
 class RebecNode:
     """Node representing a rebec instance (N_R)"""
     name: str
@@ -11,7 +12,7 @@ class RebecNode:
     arg: str
     priority: Optional[int] = None
 
-@dataclass
+@dataclass(slots=True)
 class MessageServerNode:
     """Node representing a message server/method (N_M)"""
     rebec_name: str
@@ -21,7 +22,7 @@ class MessageServerNode:
     def __str__(self):
         return f"{self.rebec_name}.{self.method_name}"
 
-@dataclass
+@dataclass(slots=True)
 class ActivationNode:
     """Node representing a send activation (N_A)"""
     sender_rebec: str
@@ -29,14 +30,30 @@ class ActivationNode:
     target_rebec: str
     message_name: str
     delay_time: Optional[int] = None
+    max_delay_time: Optional[int] = None
+    # Logical-time window in which the message may arrive at its target
+    earliest_arrival: Optional[float] = None
+    latest_arrival: Optional[float] = None
 
     def __str__(self):
         delay_str = f"@{self.delay_time}" if self.delay_time else ""
         return f"{self.sender_rebec}.{self.sender_method} -> {self.target_rebec}.{self.message_name}{delay_str}"
 
-@dataclass
+class PriorityMap(dict):
+    """Read-only priority dict shared by many test cases (flyweight); prints and compares like a dict"""
+    __slots__ = ()
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("priority maps are shared between test cases; copy() one to modify it")
+
+    __setitem__ = __delitem__ = __ior__ = clear = pop = popitem = setdefault = update = _read_only
+
+    def __reduce__(self):
+        return PriorityMap, (dict(self),)
+
+@dataclass(slots=True)
 class TestCase:
-    """Represents a generated test case"""
+    """Represents a generated test case; its priority maps may be shared with other test cases"""
     id: int
     actor_priorities: Dict[str, int]
     method_priorities: Dict[str, Dict[str, int]]
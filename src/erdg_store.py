@@ -0,0 +1,348 @@
+import json
+import mmap
+import struct
+import sys
+from array import array
+from collections import defaultdict
+from collections.abc import Mapping, Sequence
+from itertools import accumulate
+from typing import BinaryIO, Callable, Dict, Tuple, Union
+
+from src.erdg_nodes import RebecNode, MessageServerNode, ActivationNode
+from src.graph_core import CSRAdjacency, NodeTable
+
+# ======== Compact ERDG Store ========
+#
+# One file: a fixed header, 8-byte aligned int64/float64/byte arrays, and a
+# JSON directory (array offsets plus the small actor- and class-level results)
+# at the end. Every string is stored once in a string table; node names come
+# first, so graph node ID i is string i. Arrays are read straight from the
+# (memory-mapped) buffer and node objects are only built when accessed.
+MAGIC = b"ERDGPACK"
+FORMAT_VERSION = 3
+_HEADER = struct.Struct("<8sIIQQ")  # magic, version, reserved, directory offset, directory length
+
+_NO_STRING = -1
+# Numeric fields are Optional[int | float]: the value plus a tag keeps 2 and 2.0 apart
+_NONE, _INT, _FLOAT = 0, 1, 2
+
+NODE_COLUMNS = {
+    "N_R": (RebecNode, (("name", "str"), ("actor_class", "str"), ("arg", "str"), ("priority", "num"))),
+    "N_M": (MessageServerNode, (("rebec_name", "str"), ("method_name", "str"), ("priority", "num"))),
+    "N_A": (ActivationNode, (("sender_rebec", "str"), ("sender_method", "str"), ("target_rebec", "str"),
+                             ("message_name", "str"), ("delay_time", "num"), ("max_delay_time", "num"),
+                             ("earliest_arrival", "num"), ("latest_arrival", "num"))),
+}
+
+
+class StringTable(Sequence):
+    """Read-only strings decoded on access from one UTF-8 blob and an offsets array"""
+
+    def __init__(self, blob: memoryview, offsets: Sequence[int]):
+        self.blob = blob
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        return str(self.blob[self.offsets[index]:self.offsets[index + 1]], "utf-8")
+
+
+class NodeColumns(Sequence):
+    """Read-only node list that builds each node object from its columns on access"""
+
+    def __init__(self, node_class, fields: Tuple[str, ...], decoders: Tuple[Callable, ...], length: int):
+        self.node_class = node_class
+        self.fields = fields
+        self.decoders = decoders
+        self.length = length
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.length))]
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError("node index out of range")
+        return self.node_class(**{field: decode(index) for field, decode in zip(self.fields, self.decoders)})
+
+
+class EdgeList(Sequence):
+    """Read-only list of (name, name) edges over two index arrays"""
+
+    def __init__(self, names: Sequence[str], sources: Sequence[int], targets: Sequence[int]):
+        self.names = names
+        self.sources = sources
+        self.targets = targets
+
+    def __len__(self):
+        return len(self.sources)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return self.names[self.sources[index]], self.names[self.targets[index]]
+
+    def __iter__(self):
+        names = self.names
+        return ((names[u], names[v]) for u, v in zip(self.sources, self.targets))
+
+    def __eq__(self, other):
+        return isinstance(other, Sequence) and len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+
+class _Deferred(Mapping):
+    """Dict built by ``factory`` on first access"""
+
+    def __init__(self, factory: Callable[[], Dict]):
+        self.factory = factory
+        self.data = None
+
+    def _dict(self) -> Dict:
+        if self.data is None:
+            self.data = self.factory()
+        return self.data
+
+    def __getitem__(self, key):
+        return self._dict()[key]
+
+    def __iter__(self):
+        return iter(self._dict())
+
+    def __len__(self):
+        return len(self._dict())
+
+
+# ---- summary: JSON with sets and tuples tagged so they round-trip ----
+def _encode_value(value):
+    if isinstance(value, dict):
+        return {key: _encode_value(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_encode_value(item) for item in value]
+    if isinstance(value, tuple):
+        return {"__tuple__": [_encode_value(item) for item in value]}
+    if isinstance(value, (set, frozenset)):
+        return {"__set__": sorted(_encode_value(item) for item in value)}
+    return value
+
+
+def _encode_count(value: int) -> str:
+    # Counts can exceed the digit limit of int -> decimal string conversion; hex has none
+    return format(value, "x")
+
+
+def _decode_object(value: Dict):
+    # json object_hook: inner values are already decoded
+    if "__tuple__" in value:
+        return tuple(value["__tuple__"])
+    if "__set__" in value:
+        return set(value["__set__"])
+    return value
+
+
+# ======== Writing ========
+class _Writer:
+    def __init__(self, f: BinaryIO):
+        self.f = f
+        self.start = f.tell()
+        self.arrays = {}
+        f.write(bytes(_HEADER.size))
+
+    def add(self, name: str, values: array):
+        padding = -(self.f.tell() - self.start) % 8
+        self.f.write(bytes(padding))
+        self.arrays[name] = (values.typecode, self.f.tell() - self.start, len(values))
+        self.f.write(values)
+
+    def finish(self, meta: Dict):
+        directory = json.dumps({"byteorder": sys.byteorder, "arrays": self.arrays, "meta": meta}).encode("utf-8")
+        offset = self.f.tell() - self.start
+        self.f.write(directory)
+        end = self.f.tell()
+        self.f.seek(self.start)
+        self.f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, 0, offset, len(directory)))
+        self.f.seek(end)
+
+
+def write_erdg(generator, f: BinaryIO):
+    """Write the ERDG, AG, HAG and step 3-4 results of ``generator`` to a binary file"""
+    if generator.HAG is None or not hasattr(generator, "class_message_components"):
+        raise ValueError("Run steps 1-4 (e.g. iter_dependency_guided_tests()) before saving the ERDG")
+
+    writer = _Writer(f)
+    graph = generator.graph
+    string_ids = {name: i for i, name in enumerate(graph.nodes.names)}
+    strings = list(graph.nodes.names)
+
+    def string_id(value):
+        if value is None:
+            return _NO_STRING
+        i = string_ids.get(value)
+        if i is None:
+            i = string_ids[value] = len(strings)
+            strings.append(value)
+        return i
+
+    # Nodes, one column (or value/tag pair) per field
+    for kind, (_, columns) in NODE_COLUMNS.items():
+        nodes = getattr(generator, kind)
+        for field, column_type in columns:
+            values = [getattr(node, field) for node in nodes]
+            if column_type == "str":
+                writer.add(f"{kind}.{field}", array("q", map(string_id, values)))
+            else:
+                writer.add(f"{kind}.{field}", array("d", (0.0 if v is None else v for v in values)))
+                writer.add(f"{kind}.{field}.tag", array("B", (_NONE if v is None else _INT if isinstance(v, int)
+                                                               else _FLOAT for v in values)))
+    writer.add("class_targeted_activations", array("q", sorted(generator.class_targeted_activations)))
+
+    # Relations over node IDs
+    for relation in graph.relations():
+        sources, targets = graph.relation_ids(relation)
+        writer.add(f"{relation}.sources", array("q", sources))
+        writer.add(f"{relation}.targets", array("q", targets))
+
+    # AG over N_R positions, HAG over group positions, both with their CSR adjacency
+    position = {name: i for i, name in enumerate(generator.AG["nodes"])}
+    writer.add("AG.nodes", array("q", map(string_id, generator.AG["nodes"])))
+    writer.add("AG.sources", array("q", (position[a] for a, _ in generator.AG["edges"])))
+    writer.add("AG.targets", array("q", (position[b] for _, b in generator.AG["edges"])))
+    writer.add("HAG.group_offsets", array("q", accumulate(map(len, generator.actor_groups), initial=0)))
+    writer.add("HAG.group_members", array("q", (string_id(actor) for group in generator.actor_groups
+                                                for actor in group)))
+    writer.add("HAG.sources", array("q", (i for i, _ in generator.HAG["edges"])))
+    writer.add("HAG.targets", array("q", (j for _, j in generator.HAG["edges"])))
+    for name, graph_dict in (("AG", generator.AG), ("HAG", generator.HAG)):
+        writer.add(f"{name}.indptr", array("q", graph_dict["adjacency"].indptr))
+        writer.add(f"{name}.indices", array("q", graph_dict["adjacency"].indices))
+    writer.add("topological_order", array("q", generator.topological_order))
+
+    meta = {
+        "num_node_names": len(graph.nodes.names),
+        "relations": graph.relations(),
+        "symmetry_reduction": generator.symmetry_reduction,
+        "partial_order_reduction": generator.partial_order_reduction,
+        "summary": _encode_value(generator.analysis),
+        "instance_orbits": generator.instance_orbits,
+        "orbit_of": generator.orbit_of,
+        "symmetry_factor": _encode_count(generator.symmetry_factor),
+        "priority_blocks": generator.priority_blocks,
+        "num_actor_priority_assignments": _encode_count(generator.num_actor_priority_assignments),
+        "class_message_components": generator.class_message_components,
+        "class_intra_edges": generator.class_intra_edges,
+        "class_conflicts": generator.class_conflicts,
+        "component_counts": {c: [_encode_count(n) for n in counts] for c, counts in generator.component_counts.items()},
+        "class_orderings": {c: _encode_count(n) for c, n in generator.class_orderings.items()},
+        "num_method_priority_combinations": _encode_count(generator.num_method_priority_combinations),
+        "num_test_cases": _encode_count(generator.num_test_cases),
+    }
+
+    encoded = [s.encode("utf-8") for s in strings]
+    writer.add("strings.offsets", array("q", accumulate(map(len, encoded), initial=0)))
+    writer.add("strings.blob", array("B", b"".join(encoded)))
+    writer.finish(meta)
+
+
+# ======== Reading ========
+def open_erdg_buffer(source: Union[str, bytes, memoryview]) -> memoryview:
+    """A read-only view of a saved ERDG: a file path is memory-mapped, bytes are used as they are"""
+    if isinstance(source, str):
+        with open(source, "rb") as f:
+            return memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+    return memoryview(source).cast("B")
+
+
+def read_erdg(generator_class, buffer: memoryview):
+    """Rebuild an ERDGTestGenerator from ``buffer`` without parsing or re-running any step.
+
+    Relation arrays and node columns stay views of the buffer. Indexes that are
+    only needed while building (reachability, timing windows, fragments) are not
+    stored, so ``update_analysis`` on a loaded generator rebuilds from scratch.
+    """
+    magic, version, _, offset, length = _HEADER.unpack_from(buffer)
+    if magic != MAGIC:
+        raise ValueError("Not a saved ERDG (bad magic number)")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported ERDG format version {version} (expected {FORMAT_VERSION})")
+    directory = json.loads(str(buffer[offset:offset + length], "utf-8"), object_hook=_decode_object)
+    if directory["byteorder"] != sys.byteorder:
+        raise ValueError(f"ERDG was saved on a {directory['byteorder']}-endian machine")
+
+    def column(name: str) -> memoryview:
+        typecode, start, count = directory["arrays"][name]
+        return buffer[start:start + count * array(typecode).itemsize].cast(typecode)
+
+    meta = directory["meta"]
+    generator = generator_class(meta["summary"], symmetry_reduction=meta["symmetry_reduction"],
+                                partial_order_reduction=meta["partial_order_reduction"])
+    strings = StringTable(column("strings.blob"), column("strings.offsets"))
+
+    def string_decoder(ids):
+        return lambda i: None if ids[i] == _NO_STRING else strings[ids[i]]
+
+    def number_decoder(values, tags):
+        def decode(i):
+            tag = tags[i]
+            return None if tag == _NONE else int(values[i]) if tag == _INT else values[i]
+        return decode
+
+    for kind, (node_class, columns) in NODE_COLUMNS.items():
+        decoders = tuple(string_decoder(column(f"{kind}.{field}")) if column_type == "str"
+                         else number_decoder(column(f"{kind}.{field}"), column(f"{kind}.{field}.tag"))
+                         for field, column_type in columns)
+        length = directory["arrays"][f"{kind}.{columns[0][0]}"][2]
+        setattr(generator, kind, NodeColumns(node_class, tuple(field for field, _ in columns), decoders, length))
+    generator.class_targeted_activations = set(column("class_targeted_activations"))
+
+    graph = generator.graph
+    graph.nodes = NodeTable.from_names(StringTable(strings.blob,
+                                                   strings.offsets[:meta["num_node_names"] + 1]))
+    for relation in meta["relations"]:
+        graph.set_relation_ids(relation, column(f"{relation}.sources"), column(f"{relation}.targets"))
+    generator.ms_by_id = _Deferred(lambda: dict(zip(graph.relation_ids("E_RM")[1], generator.N_M)))
+
+    # Groups and orders are small and decoded eagerly; AG edges can number millions
+    nodes = [strings[i] for i in column("AG.nodes")]
+    generator.AG = {"nodes": nodes, "edges": EdgeList(nodes, column("AG.sources"), column("AG.targets")),
+                    "adjacency": CSRAdjacency.from_arrays(column("AG.indptr"), column("AG.indices"))}
+    members, offsets = column("HAG.group_members"), column("HAG.group_offsets")
+    generator.actor_groups = [[strings[m] for m in members[offsets[k]:offsets[k + 1]]]
+                              for k in range(len(offsets) - 1)]
+    generator.HAG = {"groups": generator.actor_groups,
+                     "edges": list(zip(column("HAG.sources"), column("HAG.targets"))),
+                     "adjacency": CSRAdjacency.from_arrays(column("HAG.indptr"), column("HAG.indices"))}
+    generator.topological_order = list(column("topological_order"))
+
+    generator.instance_orbits = meta["instance_orbits"]
+    generator.orbit_of = meta["orbit_of"]
+    generator.symmetry_factor = int(meta["symmetry_factor"], 16)
+    generator.priority_blocks = [tuple(block) for block in meta["priority_blocks"]]
+    generator.num_actor_priority_assignments = int(meta["num_actor_priority_assignments"], 16)
+
+    generator.class_message_components = meta["class_message_components"]
+    generator.class_intra_edges = defaultdict(list, {
+        actor_class: [tuple(edge) for edge in edges] for actor_class, edges in meta["class_intra_edges"].items()})
+    generator.class_conflicts = {actor_class: [tuple(pair) for pair in pairs]
+                                 for actor_class, pairs in meta["class_conflicts"].items()}
+    generator.component_counts = {actor_class: [int(n, 16) for n in counts]
+                                  for actor_class, counts in meta["component_counts"].items()}
+    # Step 4 orderings are unranked from the components and counts, as after a build
+    generator.class_message_permutations = {actor_class: generator._class_orderings(actor_class)
+                                            for actor_class in generator.class_message_components}
+    generator.class_orderings = {c: int(n, 16) for c, n in meta["class_orderings"].items()}
+    generator.num_method_priority_combinations = int(meta["num_method_priority_combinations"], 16)
+    generator.num_test_cases = int(meta["num_test_cases"], 16)
+
+    generator._build_target_indexes()
+    generator.busy_rebecs = generator._busy_rebecs()
+    generator.erdg_changes, generator.changed_senders = set(), set()
+    generator.rechecked_pairs, generator.reused_classes = 0, []
+    return generator
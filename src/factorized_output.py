@@ -0,0 +1,171 @@
+import argparse
+import gzip
+import io
+import json
+from collections import Counter
+from typing import Dict, Iterator, List, Tuple
+
+from src.erdg_nodes import TestCase
+from src.permutations import num_arrangements, unrank_canonical_permutation
+
+# ======== Factorized Test Case Output ========
+#
+# A gzip-compressed JSONL file. The header line is followed by one line with
+# the actor priority blocks (one per HAG group, in topological order) and one
+# line per class holding that class's method orderings, each stored once.
+# Test cases are not written out: every following line is a run of
+# consecutive 0-based ranks. Rank r is the mixed-radix number that
+# ERDGTestGenerator.test_case_at uses. Its actor part has one digit per block
+# (first block fastest, the Lehmer rank of the block's ordering) and its
+# method part one digit per class (last class fastest, an index into the
+# class's ordering table).
+FORMAT_NAME = "factorized-test-cases"
+FORMAT_VERSION = 1
+
+
+class FactorizedWriter:
+    """Stream test case ranks of one generator into a factorized output file"""
+
+    def __init__(self, path: str, test_generator):
+        # No name or timestamp in the gzip header, so equal runs give byte-identical files
+        self.raw = open(path, "wb")
+        self.file = io.TextIOWrapper(gzip.GzipFile(filename="", mode="wb", fileobj=self.raw, mtime=0),
+                                     encoding="utf-8")
+        self.run = None
+        self.written = 0
+        self._write({"format": FORMAT_NAME, "version": FORMAT_VERSION,
+                     "num_test_cases": test_generator.num_test_cases})
+        self._write({"actor_blocks": [{"base": base, "actors": group, "labels": labels}
+                                      for base, group, labels in test_generator.priority_blocks]})
+        for actor_class, orderings in test_generator.class_message_permutations.items():
+            self._write({"class": actor_class, "orderings": list(orderings)})
+
+    def _write(self, record: Dict):
+        self.file.write(json.dumps(record, separators=(",", ":")))
+        self.file.write("\n")
+
+    def add(self, rank: int):
+        self.add_range(rank, rank + 1)
+
+    def add_range(self, start: int, end: int):
+        """Add ranks [start, end); adjacent ranges are merged into one run.
+
+        An empty range is still recorded, so an empty shard keeps its position.
+        """
+        if start > end:
+            return
+        if self.run is not None and self.run[1] == start:
+            self.run[1] = end
+        else:
+            self._flush_run()
+            self.run = [start, end]
+        self.written += end - start
+
+    def _flush_run(self):
+        if self.run is not None:
+            self._write({"ranks": self.run})
+            self.run = None
+
+    def close(self):
+        self._flush_run()
+        self.file.close()
+        self.raw.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def write_factorized_test_cases(output: str, test_generator, start: int, end: int) -> int:
+    """Write test cases [start, end) of `test_generator` to `output`; returns how many were written"""
+    with FactorizedWriter(output, test_generator) as writer:
+        writer.add_range(max(start, 0), min(end, test_generator.num_test_cases))
+    return writer.written
+
+
+class FactorizedReader:
+    """Tables of a factorized output file; test cases are expanded on demand"""
+
+    def __init__(self, path: str):
+        self.actor_blocks: List[Tuple[int, List[str], List[str], int]] = []
+        self.class_orderings: Dict[str, List[List[str]]] = {}
+        self.runs: List[Tuple[int, int]] = []
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            header = json.loads(f.readline())
+            if header.get("format") != FORMAT_NAME or header.get("version") != FORMAT_VERSION:
+                raise ValueError(f"{path} is not a version {FORMAT_VERSION} {FORMAT_NAME} file")
+            self.num_test_cases = header["num_test_cases"]
+            for line in f:
+                record = json.loads(line)
+                if "ranks" in record:
+                    self.runs.append(tuple(record["ranks"]))
+                elif "class" in record:
+                    self.class_orderings[record["class"]] = record["orderings"]
+                else:
+                    self.actor_blocks = [(block["base"], block["actors"], block["labels"],
+                                          num_arrangements(Counter(block["labels"])))
+                                         for block in record["actor_blocks"]]
+        self.num_method_priority_combinations = 1
+        for orderings in self.class_orderings.values():
+            self.num_method_priority_combinations *= len(orderings)
+
+    def __len__(self):
+        return sum(end - start for start, end in self.runs)
+
+    def ranks(self) -> Iterator[int]:
+        for start, end in self.runs:
+            yield from range(start, end)
+
+    def index_tuple(self, rank: int) -> Tuple[Tuple[int, ...], Tuple[int, ...]]:
+        """(ordering index per actor block, ordering index per class) of test case `rank`"""
+        actor_index, message_index = divmod(rank, self.num_method_priority_combinations)
+        block_digits = []
+        for _, _, _, arrangements in self.actor_blocks:
+            actor_index, digit = divmod(actor_index, arrangements)
+            block_digits.append(digit)
+        class_digits = []
+        for orderings in reversed(list(self.class_orderings.values())):
+            message_index, digit = divmod(message_index, len(orderings))
+            class_digits.append(digit)
+        return tuple(block_digits), tuple(reversed(class_digits))
+
+    def test_case(self, rank: int) -> TestCase:
+        """Expand test case `rank` exactly as ERDGTestGenerator.test_case_at would"""
+        if not 0 <= rank < self.num_test_cases:
+            raise IndexError(f"test case index {rank} out of range [0, {self.num_test_cases})")
+        block_digits, class_digits = self.index_tuple(rank)
+
+        actor_priorities = {}
+        for (base, actors, labels, _), digit in zip(self.actor_blocks, block_digits):
+            for offset, actor in enumerate(unrank_canonical_permutation(actors, labels, digit)):
+                actor_priorities[actor] = base + offset
+
+        method_priorities = {}
+        for (actor_class, orderings), digit in zip(self.class_orderings.items(), class_digits):
+            method_priorities[actor_class] = {method: priority for priority, method in enumerate(orderings[digit], 1)}
+
+        return TestCase(id=rank + 1, actor_priorities=actor_priorities, method_priorities=method_priorities)
+
+    def __iter__(self) -> Iterator[TestCase]:
+        return map(self.test_case, self.ranks())
+
+
+def main():
+    """Expand a factorized file back into the plain text format"""
+    from src.main import write_test_cases
+
+    arg_parser = argparse.ArgumentParser(description="Expand a factorized test case file into plain text")
+    arg_parser.add_argument("input")
+    arg_parser.add_argument("output")
+    args = arg_parser.parse_args()
+
+    reader = FactorizedReader(args.input)
+    header = bool(reader.runs) and reader.runs[0][0] == 0
+    count = write_test_cases(args.output, reader, iter(reader), header=header)
+    print(f"✅ {count} test cases expanded to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
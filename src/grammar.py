@@ -19,13 +19,17 @@ method: "method" NAME priority_block? "{" stmt* "}" "end"
 
 ?stmt: assign_stmt ";"
     | send_stmt ";"
+    | delay_stmt ";"
     | "skip" ";"
     | "++" ";"
     | if_stmt
 
 assign_stmt: CNAME "=" expr
-send_stmt: CNAME "!" NAME
-if_stmt: "if" "(" expr ")" "{" stmt* "}" "else" "{" stmt* "}"
+send_stmt: CNAME "!" NAME after_clause?
+after_clause: "after" "(" NUMBER ")"
+delay_stmt: "delay" "(" NUMBER ")"
+if_stmt: "if" "(" expr ")" block "else" block
+block: "{" stmt* "}"
 
 ?expr: expr "+" expr   -> add
     | expr "-" expr   -> sub
@@ -45,4 +49,89 @@ NAME: /[a-z_][a-zA-Z0-9_]*/
 %import common.WS
 %import common.ESCAPED_STRING
 %ignore WS
-"""
\ No newline at end of file
+"""
+
+# ======== Timed Rebeca Grammar (reactiveclass / msgsrv models in Benchmark/) ========
+# Expressions are kept as flat token sequences: the analysis only needs the
+# names they read and, for after/delay, a constant-foldable value.
+timed_rebeca_grammar = r"""
+?start: model
+
+model: (env_decl | class_decl)* main_decl
+
+env_decl: "env" type NAME "=" expr ";"
+
+class_decl: ABSTRACT? "reactiveclass" NAME extends? "(" NUMBER ")" "{" member* "}"
+extends: "extends" NAME
+
+?member: knownrebecs
+    | statevars
+    | constructor
+    | msgsrv
+    | abstract_msgsrv
+
+knownrebecs: "knownrebecs" "{" field_decl* "}"
+statevars: "statevars" "{" field_decl* "}"
+field_decl: type NAME ("," NAME)* ";"
+type: NAME ("[" NUMBER "]")*
+
+constructor: NAME "(" params? ")" block
+msgsrv: "msgsrv" NAME "(" params? ")" block
+abstract_msgsrv: ABSTRACT "msgsrv" NAME "(" params? ")" ";"
+params: param ("," param)*
+param: type NAME
+
+block: "{" stmt* "}"
+
+?stmt: block
+    | if_stmt
+    | while_stmt
+    | local_decl ";"
+    | assign_stmt ";"
+    | send_stmt ";"
+    | call_stmt ";"
+    | ";" -> empty_stmt
+
+if_stmt: "if" "(" expr ")" stmt ("else" stmt)?
+while_stmt: "while" "(" expr ")" stmt
+local_decl: NAME NAME ("=" expr)?
+assign_stmt: lvalue ASSIGN_OP expr
+    | lvalue INCDEC
+lvalue: NAME ("[" expr "]")*
+send_stmt: NAME "." NAME "(" expr? ")" timing*
+    | "(" expr ")" "." NAME "(" expr? ")" timing*
+call_stmt: NAME "(" expr? ")" timing*
+timing: AFTER "(" expr ")"
+    | DEADLINE "(" expr ")"
+
+expr: item+
+?item: NAME | NUMBER | OP | COMMA | QMARK | DOT
+    | LPAR expr? RPAR
+    | LSQB expr RSQB
+
+main_decl: "main" "{" instance_decl* "}"
+instance_decl: NAME NAME "(" [NAME ("," NAME)*] ")" ":" "(" expr? ")" ";"
+
+ABSTRACT: "abstract"
+AFTER: "after"
+DEADLINE: "deadline"
+ASSIGN_OP: "=" | "+=" | "-=" | "*=" | "/=" | "%="
+INCDEC: "++" | "--"
+OP: "==" | "!=" | "<=" | ">=" | "&&" | "||" | /[-+*\/%<>!]/
+COMMA: ","
+QMARK: "?"
+DOT: "."
+LPAR: "("
+RPAR: ")"
+LSQB: "["
+RSQB: "]"
+NAME: /[A-Za-z_][A-Za-z0-9_]*/
+
+%import common.NUMBER
+%import common.WS
+%import common.CPP_COMMENT
+%import common.C_COMMENT
+%ignore WS
+%ignore CPP_COMMENT
+%ignore C_COMMENT
+"""
@@ -0,0 +1,155 @@
+from array import array
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+
+# ======== Integer-ID Graph Core ========
+class NodeTable:
+    """Interns node names to dense integer IDs"""
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.names: List[str] = []
+
+    @classmethod
+    def from_names(cls, names: Sequence[str]) -> "NodeTable":
+        """A table over distinct names already numbered 0..n-1; the name -> ID index is built on first lookup"""
+        table = cls.__new__(cls)
+        table.names = names
+        return table
+
+    def __getattr__(self, attr):
+        if attr == "ids":
+            self.ids = {name: node_id for node_id, name in enumerate(self.names)}
+            return self.ids
+        raise AttributeError(attr)
+
+    def intern(self, name: str) -> int:
+        node_id = self.ids.get(name)
+        if node_id is None:
+            node_id = len(self.names)
+            self.ids[name] = node_id
+            self.names.append(name)
+        return node_id
+
+    def id(self, name: str) -> Optional[int]:
+        return self.ids.get(name)
+
+    def name(self, node_id: int) -> str:
+        return self.names[node_id]
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name: str):
+        return name in self.ids
+
+
+class CSRAdjacency:
+    """Array-backed compressed sparse row adjacency over node IDs 0..num_nodes-1"""
+
+    def __init__(self, num_nodes: int, sources: Sequence[int], targets: Sequence[int]):
+        # Counting sort by source; edges of one source keep their insertion order
+        counts = array("q", bytes(8 * (num_nodes + 1)))
+        for u in sources:
+            counts[u + 1] += 1
+        for u in range(num_nodes):
+            counts[u + 1] += counts[u]
+        self.indptr = counts
+        self.indices = array("q", bytes(8 * len(targets)))
+        fill = array("q", counts[:num_nodes])
+        for u, v in zip(sources, targets):
+            self.indices[fill[u]] = v
+            fill[u] += 1
+
+    @classmethod
+    def from_arrays(cls, indptr: Sequence[int], indices: Sequence[int]) -> "CSRAdjacency":
+        """Wrap existing CSR arrays, e.g. views of a saved ERDG"""
+        adjacency = cls.__new__(cls)
+        adjacency.indptr = indptr
+        adjacency.indices = indices
+        return adjacency
+
+    def neighbors(self, node_id: int) -> Sequence[int]:
+        if node_id + 1 >= len(self.indptr):
+            return ()
+        return self.indices[self.indptr[node_id]:self.indptr[node_id + 1]]
+
+    def degree(self, node_id: int) -> int:
+        if node_id + 1 >= len(self.indptr):
+            return 0
+        return self.indptr[node_id + 1] - self.indptr[node_id]
+
+
+class GraphCore:
+    """Named relations over one interned node set.
+
+    Each relation is stored as two integer arrays (source, target) in insertion
+    order; forward and reverse CSR adjacency is built on first query and
+    dropped again whenever the relation grows.
+    """
+
+    def __init__(self):
+        self.nodes = NodeTable()
+        self._sources: Dict[str, array] = {}
+        self._targets: Dict[str, array] = {}
+        self._forward: Dict[str, CSRAdjacency] = {}
+        self._reverse: Dict[str, CSRAdjacency] = {}
+
+    def add_node(self, name: str) -> int:
+        return self.nodes.intern(name)
+
+    def add_relation(self, relation: str):
+        if relation not in self._sources:
+            self._sources[relation] = array("q")
+            self._targets[relation] = array("q")
+
+    def add_edge(self, relation: str, src: str, dst: str) -> Tuple[int, int]:
+        u, v = self.nodes.intern(src), self.nodes.intern(dst)
+        self.add_edge_ids(relation, u, v)
+        return u, v
+
+    def add_edge_ids(self, relation: str, u: int, v: int):
+        self.add_relation(relation)
+        self._sources[relation].append(u)
+        self._targets[relation].append(v)
+        self._forward.pop(relation, None)
+        self._reverse.pop(relation, None)
+
+    def relation_ids(self, relation: str) -> Tuple[array, array]:
+        """The (source, target) ID arrays of a relation, in insertion order"""
+        return self._sources.get(relation, array("q")), self._targets.get(relation, array("q"))
+
+    def set_relation_ids(self, relation: str, sources: array, targets: array):
+        """Replace a relation's edges wholesale"""
+        self._sources[relation] = sources
+        self._targets[relation] = targets
+        self._forward.pop(relation, None)
+        self._reverse.pop(relation, None)
+
+    def successors(self, relation: str, node_id: int) -> Sequence[int]:
+        adjacency = self._forward.get(relation)
+        if adjacency is None:
+            adjacency = self._forward[relation] = CSRAdjacency(
+                len(self.nodes), self._sources.get(relation, ()), self._targets.get(relation, ()))
+        return adjacency.neighbors(node_id)
+
+    def predecessors(self, relation: str, node_id: int) -> Sequence[int]:
+        adjacency = self._reverse.get(relation)
+        if adjacency is None:
+            adjacency = self._reverse[relation] = CSRAdjacency(
+                len(self.nodes), self._targets.get(relation, ()), self._sources.get(relation, ()))
+        return adjacency.neighbors(node_id)
+
+    def edge_ids(self, relation: str) -> Iterator[Tuple[int, int]]:
+        return zip(self._sources.get(relation, ()), self._targets.get(relation, ()))
+
+    def edges(self, relation: str) -> List[Tuple[str, str]]:
+        """Name-keyed view of a relation, in insertion order"""
+        names = self.nodes.names
+        return [(names[u], names[v]) for u, v in self.edge_ids(relation)]
+
+    def num_edges(self, relation: str) -> int:
+        return len(self._sources.get(relation, ()))
+
+    def relations(self) -> List[str]:
+        return list(self._sources)
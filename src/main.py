@@ -1,14 +1,31 @@
-from lark import Lark
+import argparse
+import glob
+import io
+import json
+import logging
+import os
 import pprint
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
 
-from src.grammar import grammar
-from src.erdg_nodes import RebecNode
-from src.ast_analyzer import ASTAnalyzer
+from src.parser_cache import get_parser
+from src.rendering import GRAPH_NAMES, IMAGES_DIR, render_graphs
+from src.ast_analyzer import ASTAnalyzer, build_summary_parser
+from src.timed_rebeca import build_timed_rebeca_parser, is_timed_rebeca
 from src.erdg_builder import ERDGTestGenerator
+from src.metrics import MetricsRecorder, measure_step
+from src.factorized_output import write_factorized_test_cases
+from src.result_cache import DEFAULT_MAX_BYTES, MAX_CACHED_OUTPUT_BYTES, ResultCache, result_key
 
-# ======== Example Usage ========
-if __name__ == "__main__":
-    code = """
+logger = logging.getLogger("src.main")
+
+DEFAULT_OUTPUT = "outputs/generated_scenario_cases.txt"
+DEFAULT_FACTORIZED_OUTPUT = "outputs/generated_scenario_cases.jsonl.gz"
+
+# ======== Example Model (used when no model files are given) ========
+EXAMPLE_MODEL = """
 actorclass Customer {
  statevars
      Boolean sent;
@@ -61,40 +78,386 @@ main {
 
 }
 """
-    try:
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    arg_parser = argparse.ArgumentParser(description="ERDG-based dependency-guided scheduling")
+    arg_parser.add_argument("models", nargs="*", metavar="MODEL",
+                            help="model files, directories or glob patterns (e.g. 'Benchmark/*.txt'); "
+                                 "without any, the built-in example model is analysed")
+    arg_parser.add_argument("--output-dir", default="outputs/batch",
+                            help="batch mode: one sub-directory per model plus summary.json")
+    arg_parser.add_argument("-j", "--jobs", type=int, default=None,
+                            help="batch mode: number of worker processes (default: CPU count)")
+    arg_parser.add_argument("--watch", action="store_true",
+                            help="re-analyse the single MODEL each time it is saved, reusing the previous ERDG")
+    arg_parser.add_argument("--watch-interval", type=float, default=0.5, metavar="SECONDS",
+                            help="with --watch: how often to check the model file for changes")
+    arg_parser.add_argument("--count-only", action="store_true",
+                            help="only report how many test cases would be generated")
+    arg_parser.add_argument("--symmetry", action="store_true",
+                            help="enumerate one representative per orbit of interchangeable instances")
+    arg_parser.add_argument("--partial-order", action="store_true",
+                            help="order only conflicting (E_I) message servers instead of permuting whole components")
+    arg_parser.add_argument("--range", nargs=2, type=int, metavar=("START", "END"),
+                            help="only emit test cases with 0-based index in [START, END)")
+    arg_parser.add_argument("--shard", nargs=2, type=int, metavar=("K", "N"),
+                            help="only emit shard K (0-based) of N equal index ranges")
+    arg_parser.add_argument("--single-pass", action="store_true",
+                            help="compute the analysis summary while parsing instead of walking a full parse tree")
+    arg_parser.add_argument("--render", nargs="+", default=[], type=str.upper, metavar="GRAPH",
+                            choices=GRAPH_NAMES + ("ALL",),
+                            help="render these graphs (AST, ERDG, AG, HAG or ALL); default: none")
+    arg_parser.add_argument("--render-workers", type=int, default=len(GRAPH_NAMES),
+                            help="number of concurrent Graphviz renders")
+    arg_parser.add_argument("--no-cache", action="store_true",
+                            help="neither read nor write the on-disk result cache")
+    arg_parser.add_argument("--cache-max-mb", type=float, default=DEFAULT_MAX_BYTES / 2**20, metavar="MB",
+                            help="size cap of the result cache; least recently used entries are evicted")
+    arg_parser.add_argument("--output-format", choices=("text", "factorized"), default="text",
+                            help="'factorized' stores actor blocks and per-class method orderings once and "
+                                 "test cases as rank ranges, in gzip-compressed JSONL")
+    arg_parser.add_argument("--output", default=None,
+                            help="where to write the generated test cases of the example model (default: "
+                                 f"{DEFAULT_OUTPUT}, or {DEFAULT_FACTORIZED_OUTPUT} with --output-format factorized)")
+    arg_parser.add_argument("--metrics", metavar="OUT_JSON",
+                            help="record wall/CPU time, peak memory and counts per step and write them as JSON")
+    arg_parser.add_argument("--no-trace-memory", action="store_true",
+                            help="with --metrics: skip tracemalloc (much faster on large runs); only peak RSS is kept")
+    arg_parser.add_argument("-v", "--verbose", action="count", default=0,
+                            help="-v: per-step progress, -vv: every node, edge and ordering")
+    return arg_parser
+
+
+def default_output(args: argparse.Namespace) -> str:
+    return DEFAULT_FACTORIZED_OUTPUT if args.output_format == "factorized" else DEFAULT_OUTPUT
+
+
+def analyze_model(code: str, single_pass: bool = False):
+    """Parse a model and return (analysis summary, analyzer)"""
+    if is_timed_rebeca(code):
+        analysis_result = build_timed_rebeca_parser().parse(code)
+        return analysis_result, ASTAnalyzer.from_summary(analysis_result)
+    if single_pass:
+        analysis_result = build_summary_parser().parse(code)
+        return analysis_result, ASTAnalyzer.from_summary(analysis_result)
+    tree = get_parser().parse(code)
+    analyzer = ASTAnalyzer()
+    analyzer.visit(tree)
+    return analyzer.get_summary(), analyzer
+
+
+def print_counts(counts: Dict, symmetry: bool):
+    print("\n=== Test Case Count ===")
+    for entry in counts["actor_groups"]:
+        print(f"  Group {entry['group']}: {entry['size']} actors -> {entry['orderings']} orderings")
+    for class_name, entry in counts["classes"].items():
+        print(f"  Class {class_name}: components {entry['components']} -> {entry['orderings']} orderings")
+    if symmetry:
+        print(f"  Interchangeable instances: {counts['instance_orbits']} "
+              f"(symmetry factor {counts['symmetry_factor']} removed)")
+    print(f"Total: {counts['actor_priority_assignments']} actor assignments x "
+          f"{counts['method_priority_combinations']} method combinations = {counts['total']} test cases")
+
+
+def build_result_cache(args: argparse.Namespace) -> Optional[ResultCache]:
+    return None if args.no_cache else ResultCache(max_bytes=int(args.cache_max_mb * 2**20))
+
+
+def run_model(code: str, args: argparse.Namespace, output: str, images_dir: str = IMAGES_DIR,
+              metrics: Optional[MetricsRecorder] = None, cache: Optional[ResultCache] = None) -> Dict:
+    """Analyse one model and write its test cases to `output`; returns a summary row.
+
+    With a `cache`, the saved ERDG with its step 1-4 results (and the full output
+    file) is looked up by a hash of the model text before anything is parsed.
+    """
+    key = entry = None
+    if cache is not None:
+        key = result_key(code, {"symmetry": args.symmetry, "partial_order": args.partial_order,
+                                "count_only": args.count_only, "output_format": args.output_format,
+                                "single_pass": args.single_pass})
+        with measure_step(metrics, "cache_lookup") as counts:
+            entry = cache.get(key)
+            counts["hit"] = int(entry is not None)
+        logger.info("Result cache %s (%s)", "hit" if entry is not None else "miss", key[:16])
+
+    if entry is not None:
+        if args.count_only:
+            return entry["row"]
+        test_generator = ERDGTestGenerator.load(entry["erdg"])
+        test_generator.metrics = metrics
+        analysis_result, analyzer = test_generator.analysis, None
+        test_cases = test_generator.iter_prioritized_test_cases()
+    else:
         # Step 1 & 2: Parse and analyze
-        parser = Lark(grammar, start="model", parser="lalr")
-        tree = parser.parse(code)
+        with measure_step(metrics, "parse_and_analyze") as counts:
+            analysis_result, analyzer = analyze_model(code, args.single_pass)
+            counts.update(classes=len(analysis_result["actors"]),
+                          methods=sum(len(info["methods"]) for info in analysis_result["actors"].values()),
+                          instances=len(analysis_result["main_instances"]))
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("=== Analysis Result ===\n%s", pprint.pformat(analysis_result))
+
+        test_generator = ERDGTestGenerator(analysis_result, symmetry_reduction=args.symmetry,
+                                           partial_order_reduction=args.partial_order, metrics=metrics)
+
+        if args.count_only:
+            counts = test_generator.count_test_cases()
+            row = {"rebecs": len(test_generator.N_R), "groups": len(test_generator.actor_groups),
+                   "test_cases": counts["total"], "counts": counts}
+            if cache is not None:
+                cache.put(key, {"row": row})
+            return row
 
-        analyzer = ASTAnalyzer()
-        analyzer.visit(tree)
-        analysis_result = analyzer.get_summary()
-        analyzer.draw_ast_graph("AST")
+        # Step 3: Build ERDG and Generate Test Cases (streamed, never materialized)
+        test_cases = test_generator.iter_dependency_guided_tests()
 
+    # Render only the requested graphs; unchanged DOT sources are not re-rendered
+    selected = GRAPH_NAMES if "ALL" in args.render else tuple(dict.fromkeys(args.render))
+    if selected:
+        if analyzer is None:  # cache hit: draw the AST from the cached summary
+            analyzer = ASTAnalyzer.from_summary(analysis_result)
+        builders = {"AST": analyzer.draw_ast_graph, "ERDG": test_generator.draw_erdg,
+                    "AG": test_generator.draw_actor_dependency_graph, "HAG": test_generator.draw_hag}
+        graphs = {name: builders[name](name, render=False) for name in selected}
+        os.makedirs(images_dir, exist_ok=True)
+        for name, rendered in render_graphs(graphs, workers=args.render_workers, directory=images_dir).items():
+            logger.info("✅ %s graph saved as %s.png" if rendered else "%s.png is up to date", name, name)
 
-        print("\n=== Analysis Result ===")
-        pprint.pprint(analysis_result)
+    # Restrict to an index range so shards can be generated independently;
+    # concatenating the shard files in order reproduces the full output.
+    start, end = 0, test_generator.num_test_cases
+    if args.shard:
+        k, n = args.shard
+        start = test_generator.num_test_cases * k // n
+        end = test_generator.num_test_cases * (k + 1) // n
+    elif args.range:
+        start, end = args.range
+    # END may run past the last test case; everything below counts what is actually emitted
+    start, end = min(start, test_generator.num_test_cases), min(end, test_generator.num_test_cases)
+    full_output = (start, end) == (0, test_generator.num_test_cases)
+    if not full_output:
+        test_cases = test_generator.iter_test_case_range(start, end)
+        logger.info("Emitting test case indices [%s, %s)", start, end)
 
-        # Step 3: Build ERDG and Generate Test Cases
-        test_generator = ERDGTestGenerator(analysis_result)
-        test_cases = test_generator.generate_dependency_guided_tests()
-        test_generator.draw_erdg("ERDG")
+    # Print a preview of the results
+    if logger.isEnabledFor(logging.INFO):
+        if start == 0:
+            test_generator.print_test_cases(test_generator.iter_prioritized_test_cases())
+        else:
+            test_generator.print_test_cases(test_generator.iter_test_case_range(start, end))
 
-        # Print results
-        test_generator.print_test_cases()
+    # Save results
+    with measure_step(metrics, "step5_test_cases") as counts:
+        if full_output and entry is not None and entry["output"] is not None:
+            with open(output, "wb") as f:
+                f.write(zlib.decompress(entry["output"]))
+            counts["test_cases"] = test_generator.num_test_cases
+        elif args.output_format == "factorized":
+            counts["test_cases"] = write_factorized_test_cases(output, test_generator, start, end)
+        else:
+            counts["test_cases"] = write_test_cases(output, test_generator, test_cases, header=start == 0)
 
-        # Save results to file inside outputs/
-        with open("outputs/generated_scenario_cases.txt", "w") as f:
-            f.write(f"Generated {len(test_cases)} test cases\n\n")
-            for test_case in test_cases:
-                f.write(f"Test Case {test_case.id}:\n")
-                f.write(f"  Actor Priorities: {test_case.actor_priorities}\n")
-                f.write(f"  Method Priorities: {test_case.method_priorities}\n\n")
+    if cache is not None and (entry is None or (full_output and entry["output"] is None)):
+        with measure_step(metrics, "cache_store"):
+            compressed = None
+            if full_output and os.path.getsize(output) <= MAX_CACHED_OUTPUT_BYTES:
+                with open(output, "rb") as f:
+                    compressed = zlib.compress(f.read())
+            erdg = io.BytesIO()
+            test_generator.save(erdg)
+            cache.put(key, {"erdg": erdg.getvalue(), "output": compressed})
 
-        print(f"\n✅ Results saved to generated_test_cases.txt")
+    return {"rebecs": len(test_generator.N_R), "groups": len(test_generator.actor_groups),
+            "test_cases": test_generator.num_test_cases, "emitted": end - start, "output": output}
 
+
+def write_test_cases(output: str, test_generator: ERDGTestGenerator, test_cases, header: bool = True) -> int:
+    """Write test cases to `output`; returns how many were written"""
+    written = 0
+    with open(output, "w") as f:
+        if header:
+            f.write(f"Generated {test_generator.num_test_cases} test cases\n\n")
+        for test_case in test_cases:
+            f.write(f"Test Case {test_case.id}:\n")
+            f.write(f"  Actor Priorities: {test_case.actor_priorities}\n")
+            f.write(f"  Method Priorities: {test_case.method_priorities}\n\n")
+            written += 1
+    return written
+
+
+# ======== Watch Mode ========
+def watch_model(path: str, args: argparse.Namespace):
+    """Re-analyse `path` whenever it is saved, updating the previous ERDG incrementally"""
+    def analyse():
+        with open(path) as f:
+            return analyze_model(f.read(), args.single_pass)[0]
+
+    def save():
+        if args.count_only:
+            return f"{test_generator.num_test_cases} test cases"
+        if args.output_format == "factorized":
+            write_factorized_test_cases(args.output, test_generator, 0, test_generator.num_test_cases)
+        else:
+            write_test_cases(args.output, test_generator, test_generator.iter_prioritized_test_cases())
+        return f"{test_generator.num_test_cases} test cases saved to {args.output}"
+
+    test_generator = ERDGTestGenerator(analyse(), symmetry_reduction=args.symmetry,
+                                       partial_order_reduction=args.partial_order)
+    test_generator.iter_dependency_guided_tests()
+    print(f"✅ {save()}; watching {path} (Ctrl-C to stop)")
+
+    modified = os.stat(path).st_mtime_ns
+    try:
+        while True:
+            time.sleep(args.watch_interval)
+            if os.stat(path).st_mtime_ns == modified:
+                continue
+            modified = os.stat(path).st_mtime_ns
+            started = time.perf_counter()
+            try:
+                report = test_generator.update_analysis(analyse())
+            except Exception as e:
+                logger.error("❌ %s: %s", path, e)
+                continue
+            elapsed = time.perf_counter() - started
+            print(f"↻ {elapsed * 1000:.0f} ms: {report['rebuilt_instances']} instances rebuilt, "
+                  f"{report['rechecked_pairs']} actor pairs re-checked; {save()}")
+    except KeyboardInterrupt:
+        pass
+
+
+# ======== Batch Mode ========
+def expand_model_paths(patterns: List[str]) -> List[str]:
+    """Resolve files, directories (their *.txt files) and glob patterns, in order and without duplicates"""
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = sorted(glob.glob(os.path.join(pattern, "*.txt")))
+        else:
+            matches = sorted(glob.glob(pattern, recursive=True)) or ([pattern] if os.path.exists(pattern) else [])
+        if not matches:
+            logger.warning("No model files match %s", pattern)
+        paths.extend(matches)
+    return list(dict.fromkeys(paths))
+
+
+def _model_output_names(paths: List[str]) -> List[str]:
+    """One output directory name per model: the file stem, suffixed when two stems collide"""
+    names, seen = [], {}
+    for path in paths:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        seen[stem] = seen.get(stem, 0) + 1
+        names.append(stem if seen[stem] == 1 else f"{stem}-{seen[stem]}")
+    return names
+
+
+def process_model_file(path: str, model_dir: str, args: argparse.Namespace) -> Dict:
+    """Worker: analyse one model file into `model_dir`; failures are reported, not raised"""
+    os.makedirs(model_dir, exist_ok=True)
+    metrics = MetricsRecorder(trace_memory=not args.no_trace_memory) if args.metrics else None
+    row = {"model": path, "output_dir": model_dir}
+    started = time.perf_counter()
+    try:
+        with open(path) as f:
+            code = f.read()
+        row.update(run_model(code, args, os.path.join(model_dir, os.path.basename(default_output(args))),
+                             images_dir=os.path.join(model_dir, "images"), metrics=metrics,
+                             cache=build_result_cache(args)))
+        row["status"] = "ok"
     except Exception as e:
-        print(f"❌ Error occurred: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.debug("Failed to process %s", path, exc_info=True)
+        row.update(status="error", error=f"{type(e).__name__}: {e}")
+    row["wall_seconds"] = time.perf_counter() - started
+    if metrics is not None:
+        row["metrics"] = metrics.to_dict()
+    return row
+
+
+def run_batch(args: argparse.Namespace) -> List[Dict]:
+    """Process every model in a process pool and write <output-dir>/summary.json"""
+    paths = expand_model_paths(args.models)
+    model_dirs = [os.path.join(args.output_dir, name) for name in _model_output_names(paths)]
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        rows = list(pool.map(process_model_file, paths, model_dirs, [args] * len(paths)))
+
+    print(f"{'model':<40} {'status':<6} {'rebecs':>7} {'groups':>7} {'test cases':>12} {'time (s)':>9}")
+    for row in rows:
+        print(f"{os.path.basename(row['model']):<40} {row['status']:<6} {row.get('rebecs', '-'):>7} "
+              f"{row.get('groups', '-'):>7} {row.get('test_cases', '-'):>12} {row['wall_seconds']:>9.3f}")
+        if row["status"] == "error":
+            print(f"    {row['error'].splitlines()[0]}")
+
+    summary_path = os.path.join(args.output_dir, "summary.json")
+    with open(summary_path, "w") as f:
+        json.dump({"models": [{k: v for k, v in row.items() if k != "metrics"} for row in rows]}, f, indent=2)
+    if args.metrics:
+        with open(args.metrics, "w") as f:
+            json.dump({row["model"]: row.get("metrics") for row in rows}, f, indent=2)
+
+    failed = sum(row["status"] != "ok" for row in rows)
+    print(f"✅ {len(rows) - failed} of {len(rows)} models processed; summary saved to {summary_path}")
+    return rows
+
 
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    arg_parser = build_arg_parser()
+    args = arg_parser.parse_args(argv)
+    if args.shard:
+        k, n = args.shard
+        if n < 1:
+            arg_parser.error(f"--shard: N must be at least 1, got {n}")
+        if not 0 <= k < n:
+            arg_parser.error(f"--shard: K must be in 0..{n - 1}, got {k}")
+    if args.range:
+        start, end = args.range
+        if start < 0:
+            arg_parser.error(f"--range: START must be at least 0, got {start}")
+        if start > end:
+            arg_parser.error(f"--range: START must not exceed END, got {start} > {end}")
+    return args
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    if args.output is None:
+        args.output = default_output(args)
+
+    # Quiet by default: a production run prints only its summary line
+    log_levels = [logging.WARNING, logging.INFO, logging.DEBUG]
+    logging.basicConfig(level=log_levels[min(args.verbose, len(log_levels) - 1)], format="%(message)s")
+
+    if args.watch:
+        paths = expand_model_paths(args.models)
+        if len(paths) != 1:
+            raise SystemExit("--watch needs exactly one model file")
+        watch_model(paths[0], args)
+        return
+
+    if args.models:
+        rows = run_batch(args)
+        raise SystemExit(1 if any(row["status"] != "ok" for row in rows) else 0)
+
+    metrics = MetricsRecorder(trace_memory=not args.no_trace_memory) if args.metrics else None
+    try:
+        row = run_model(EXAMPLE_MODEL, args, args.output, metrics=metrics, cache=build_result_cache(args))
+        if args.count_only:
+            print_counts(row["counts"], args.symmetry)
+        else:
+            print(f"✅ {row['emitted']} of {row['test_cases']} test cases saved to {args.output}")
+
+    except Exception as e:
+        logger.exception("❌ Error occurred: %s", e)
+
+    finally:
+        if metrics is not None:
+            metrics.write_json(args.metrics, symmetry_reduction=args.symmetry,
+                               partial_order_reduction=args.partial_order)
+            logger.info("Metrics written to %s", args.metrics)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import json
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows: no getrusage, so only tracemalloc peaks are recorded
+    resource = None
+
+
+# ======== Per-Step Instrumentation ========
+class MetricsRecorder:
+    """Records wall time, CPU time, peak traced memory and counts for each named step.
+
+    Memory is only traced when ``trace_memory`` is set, since tracemalloc slows
+    allocation-heavy steps (streaming step 5) down by an order of magnitude;
+    the process-wide resident high-water mark is recorded where the platform
+    provides it. Without it, memory is always traced.
+    """
+
+    def __init__(self, trace_memory: bool = True):
+        self.trace_memory = trace_memory or resource is None
+        self.steps: List[Dict] = []
+
+    @contextmanager
+    def step(self, name: str) -> Iterator[Dict[str, int]]:
+        """Measure the enclosed block; the yielded dict collects the step's counts"""
+        counts: Dict[str, int] = {}
+        started_tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield counts
+        finally:
+            entry = {
+                "step": name,
+                "wall_seconds": time.perf_counter() - wall,
+                "cpu_seconds": time.process_time() - cpu,
+                "peak_memory_bytes": tracemalloc.get_traced_memory()[1] if self.trace_memory else None,
+                "max_rss_bytes": _max_rss_bytes(),
+                "counts": counts,
+            }
+            if started_tracing:
+                tracemalloc.stop()
+            self.steps.append(entry)
+
+    def to_dict(self, **context) -> Dict:
+        peaks = [s["peak_memory_bytes"] for s in self.steps if s["peak_memory_bytes"] is not None]
+        return {
+            **context,
+            "steps": self.steps,
+            "total": {
+                "wall_seconds": sum(s["wall_seconds"] for s in self.steps),
+                "cpu_seconds": sum(s["cpu_seconds"] for s in self.steps),
+                "peak_memory_bytes": max(peaks) if peaks else None,
+                "max_rss_bytes": _max_rss_bytes(),
+            },
+        }
+
+    def write_json(self, path: str, **context):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(**context), f, indent=2)
+
+
+def _max_rss_bytes() -> Optional[int]:
+    """Peak resident set size of this process so far (ru_maxrss is in KiB on Linux, bytes on macOS)"""
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+@contextmanager
+def measure_step(recorder: Optional[MetricsRecorder], name: str) -> Iterator[Dict[str, int]]:
+    """recorder.step(name), or a throwaway counts dict when no recorder is attached"""
+    if recorder is None:
+        yield {}
+    else:
+        with recorder.step(name) as counts:
+            yield counts
@@ -0,0 +1,139 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from functools import lru_cache
+from typing import Dict, Optional
+
+import lark
+from lark import Lark, Transformer
+from lark.grammar import Rule
+from lark.lexer import TerminalDef
+
+from src.grammar import grammar
+
+logger = logging.getLogger(__name__)
+
+
+# ======== Cache Directory ========
+def _default_cache_dir() -> str:
+    """Per-user cache location: $XDG_CACHE_HOME/erdg, else ~/.cache/erdg"""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "erdg")
+
+
+CACHE_DIR = os.environ.get("ERDG_CACHE_DIR") or _default_cache_dir()
+
+
+def _make_private_dirs(path: str):
+    # os.makedirs applies `mode` to the leaf only; create missing parents as 0700 too
+    if os.path.isdir(path):
+        return
+    parent = os.path.dirname(path)
+    if parent and parent != path:
+        _make_private_dirs(parent)
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+
+
+def ensure_private_dir(path: str) -> bool:
+    """Create `path` with mode 0700 if missing; False when it cannot be created or is not safe to use.
+
+    A directory owned by another user, or writable by group/others, is refused:
+    whoever can write there could plant cache files for us to load.
+    """
+    try:
+        _make_private_dirs(path)
+        info = os.stat(path)
+    except OSError as e:
+        logger.debug("Cache directory %s unavailable: %s", path, e)
+        return False
+    if hasattr(os, "getuid") and info.st_uid != os.getuid():
+        logger.warning("Not using cache directory %s: owned by another user", path)
+        return False
+    if os.name == "posix" and info.st_mode & 0o022:
+        logger.warning("Not using cache directory %s: writable by group or others", path)
+        return False
+    return True
+
+
+# ======== Cached LALR Parser ========
+GRAMMAR_HASH = hashlib.sha256(grammar.encode("utf-8")).hexdigest()
+
+
+def parser_cache_path(grammar_hash: str = GRAMMAR_HASH) -> str:
+    """Location of the serialized LALR tables for one grammar version"""
+    return os.path.join(CACHE_DIR, f"parser-{grammar_hash[:16]}.json")
+
+
+def _source_cache_path(source: str) -> str:
+    source_hash = GRAMMAR_HASH if source is grammar else hashlib.sha256(source.encode("utf-8")).hexdigest()
+    return parser_cache_path(source_hash)
+
+
+def _int_keys(obj: Dict) -> Dict:
+    # JSON object keys are strings; Lark's tables and memo are keyed by integers
+    return {int(key) if key.isdigit() else key: value for key, value in obj.items()}
+
+
+def _load_tables(path: str) -> Optional[Dict]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            tables = json.load(f, object_hook=_int_keys)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning("Discarding unreadable parser cache %s: %s", path, e)
+        return None
+    if tables.get("lark") != lark.__version__:
+        return None
+    return tables
+
+
+def _save_tables(path: str, tables: Dict):
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(tables, f)
+        os.replace(tmp_path, path)
+    except OSError as e:  # read-only or full disk: the tables are simply rebuilt next time
+        logger.warning("Could not write parser cache %s: %s", path, e)
+
+
+@lru_cache(maxsize=None)
+def _tables(source: str) -> Optional[Dict]:
+    """Serialized LALR tables of a grammar, read from (or compiled into) the cache once per process"""
+    if not ensure_private_dir(CACHE_DIR):
+        return None
+    # Tables are stored as plain JSON (never pickled), one file per grammar hash
+    path = _source_cache_path(source)
+    tables = _load_tables(path)
+    if tables is None:
+        data, memo = Lark(source, start="model", parser="lalr").memo_serialize([TerminalDef, Rule])
+        tables = {"lark": lark.__version__, "data": data, "memo": memo}
+        _save_tables(path, tables)
+    return tables
+
+
+def _build(transformer: Optional[Transformer], source: str) -> Lark:
+    tables = _tables(source)
+    if tables is not None:
+        try:
+            return Lark._load_from_dict(tables["data"], tables["memo"], transformer=transformer)
+        except Exception as e:  # tables from another writer or a damaged file: compile afresh
+            logger.warning("Ignoring unusable parser cache %s: %s", _source_cache_path(source), e)
+    return Lark(source, start="model", parser="lalr", transformer=transformer)
+
+
+@lru_cache(maxsize=None)
+def get_parser(source: str = grammar) -> Lark:
+    """Tree-building LALR parser for a model grammar, loaded from the table cache"""
+    return _build(None, source)
+
+
+def get_transforming_parser(transformer: Transformer, source: str = grammar) -> Lark:
+    """LALR parser that applies `transformer` while parsing, sharing the same table cache"""
+    return _build(transformer, source)
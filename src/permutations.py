@@ -0,0 +1,106 @@
+from collections import Counter
+from math import factorial
+from typing import Iterable, Iterator, List, Tuple
+
+
+# ======== Permutation Ranking ========
+#
+# Orderings are addressed by rank so test cases can be generated, sharded and
+# decoded without enumerating the orderings before them. Canonical
+# permutations keep items that share a label (interchangeable instances) in
+# their original relative order.
+
+
+def unrank_permutation(items: List[str], index: int) -> Tuple[str, ...]:
+    """Return the ``index``-th tuple that itertools.permutations(items) yields"""
+    pool = list(items)
+    result = []
+    for remaining in range(len(pool), 0, -1):
+        pos, index = divmod(index, factorial(remaining - 1))
+        result.append(pool.pop(pos))
+    return tuple(result)
+
+
+def rank_permutation(items: List[str], perm: Iterable[str]) -> int:
+    """Inverse of unrank_permutation"""
+    pool = list(items)
+    index = 0
+    for item in perm:
+        pos = pool.index(item)
+        index += pos * factorial(len(pool) - 1)
+        pool.pop(pos)
+    return index
+
+
+def num_arrangements(label_counts: Counter) -> int:
+    """Number of distinct orderings of a multiset with the given label counts"""
+    total = factorial(sum(label_counts.values()))
+    for count in label_counts.values():
+        total //= factorial(count)
+    return total
+
+
+def iter_canonical_permutations(items: List[str], labels: List[str]) -> Iterator[Tuple[str, ...]]:
+    """Yield permutations of items in itertools order, keeping only those in which
+    items sharing a label appear in their original relative order"""
+    used = [False] * len(items)
+    perm = []
+
+    def extend():
+        if len(perm) == len(items):
+            yield tuple(perm)
+            return
+        seen = set()
+        for i, label in enumerate(labels):
+            if used[i] or label in seen:
+                continue
+            seen.add(label)
+            used[i] = True
+            perm.append(items[i])
+            yield from extend()
+            perm.pop()
+            used[i] = False
+
+    yield from extend()
+
+
+def unrank_canonical_permutation(items: List[str], labels: List[str], index: int) -> Tuple[str, ...]:
+    """Return the ``index``-th tuple that iter_canonical_permutations(items, labels) yields"""
+    remaining = Counter(labels)
+    used = [False] * len(items)
+    result = []
+    for _ in range(len(items)):
+        seen = set()
+        for i, label in enumerate(labels):
+            if used[i] or label in seen:
+                continue
+            seen.add(label)
+            remaining[label] -= 1
+            block = num_arrangements(remaining)
+            if index < block:
+                used[i] = True
+                result.append(items[i])
+                break
+            index -= block
+            remaining[label] += 1
+    return tuple(result)
+
+
+def rank_canonical_permutation(items: List[str], labels: List[str], perm: Iterable[str]) -> int:
+    """Inverse of unrank_canonical_permutation"""
+    remaining = Counter(labels)
+    used = [False] * len(items)
+    index = 0
+    for item in perm:
+        seen = set()
+        for i, label in enumerate(labels):
+            if used[i] or label in seen:
+                continue
+            seen.add(label)
+            remaining[label] -= 1
+            if items[i] == item:
+                used[i] = True
+                break
+            index += num_arrangements(remaining)
+            remaining[label] += 1
+    return index
@@ -0,0 +1,32 @@
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict
+
+
+# ======== Graphviz Rendering ========
+IMAGES_DIR = "outputs/images"
+GRAPH_NAMES = ("AST", "ERDG", "AG", "HAG")
+
+
+def _digest(source: str) -> str:
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()
+
+
+def render_graph(dot, filename: str, directory: str = IMAGES_DIR) -> bool:
+    """Render `dot` to <directory>/<filename>.<format>; skipped (False) if the saved DOT source is unchanged"""
+    source_path = os.path.join(directory, filename)
+    image_path = f"{source_path}.{dot.format}"
+    if os.path.exists(image_path) and os.path.exists(source_path):
+        with open(source_path, encoding="utf-8") as f:
+            if _digest(f.read()) == _digest(dot.source):
+                return False
+    dot.render(source_path, view=False)
+    return True
+
+
+def render_graphs(graphs: Dict[str, object], workers: int = 4, directory: str = IMAGES_DIR) -> Dict[str, bool]:
+    """Render several graphs concurrently; each `dot` call runs in its own subprocess"""
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {name: pool.submit(render_graph, dot, name, directory) for name, dot in graphs.items()}
+        return {name: future.result() for name, future in futures.items()}
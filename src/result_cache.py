@@ -0,0 +1,135 @@
+import glob
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from functools import lru_cache
+from typing import Dict, Optional
+
+from src.grammar import grammar, timed_rebeca_grammar
+from src.parser_cache import CACHE_DIR, ensure_private_dir
+
+logger = logging.getLogger(__name__)
+
+
+# ======== Content-Addressed Result Cache ========
+RESULTS_DIR = os.path.join(CACHE_DIR, "results")
+# Bump when the layout of a cache entry changes
+RESULT_FORMAT = 3
+DEFAULT_MAX_BYTES = 256 * 2**20
+# Outputs larger than this are regenerated from the cached ERDG instead of stored
+MAX_CACHED_OUTPUT_BYTES = 16 * 2**20
+
+
+@lru_cache(maxsize=None)
+def _code_hash() -> str:
+    """Hash of the grammars and of the analysis code itself, so upgrading the tool invalidates old entries"""
+    digest = hashlib.sha256(f"format {RESULT_FORMAT}".encode("utf-8"))
+    for source in (grammar, timed_rebeca_grammar):
+        digest.update(hashlib.sha256(source.encode("utf-8")).digest())
+    for path in sorted(glob.glob(os.path.join(os.path.dirname(__file__), "*.py"))):
+        with open(path, "rb") as f:
+            digest.update(hashlib.sha256(f.read()).digest())
+    return digest.hexdigest()
+
+
+def result_key(code: str, options: Dict) -> str:
+    """Cache key of one model: hash of its text, the grammar/code version and the options that shape the result"""
+    digest = hashlib.sha256(_code_hash().encode("utf-8"))
+    digest.update(json.dumps(options, sort_keys=True).encode("utf-8"))
+    digest.update(code.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _encode_entry(entry: Dict) -> bytes:
+    """One JSON header line (plain values and blob sizes) followed by the bytes values back to back"""
+    blobs = {name: value for name, value in entry.items() if isinstance(value, bytes)}
+    header = {"values": {name: value for name, value in entry.items() if name not in blobs},
+              "blobs": {name: len(value) for name, value in blobs.items()}}
+    return json.dumps(header).encode("utf-8") + b"\n" + b"".join(blobs.values())
+
+
+def _decode_entry(data: bytes) -> Dict:
+    header_end = data.index(b"\n")
+    header = json.loads(data[:header_end])
+    entry, offset = header["values"], header_end + 1
+    for name, size in header["blobs"].items():
+        entry[name] = data[offset:offset + size]
+        offset += size
+    if offset != len(data):
+        raise ValueError(f"entry holds {len(data)} bytes, header describes {offset}")
+    return entry
+
+
+class ResultCache:
+    """On-disk store of analysis results, one file per key, capped at ``max_bytes``.
+
+    An entry is a dict of JSON values and ``bytes`` (the saved ERDG, the
+    compressed output); nothing is unpickled. The directory must belong to the
+    current user and is created with mode 0700, otherwise caching is disabled.
+    Reads refresh a file's modification time, so eviction removes the least
+    recently used entries first. Files are written to a temporary name and
+    renamed into place, so concurrent batch workers never see a partial entry.
+    """
+
+    def __init__(self, directory: str = RESULTS_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.enabled = ensure_private_dir(directory)
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.entry")
+
+    def get(self, key: str) -> Optional[Dict]:
+        if not self.enabled:
+            return None
+        path = self.path(key)
+        try:
+            with open(path, "rb") as f:
+                entry = _decode_entry(f.read())
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning("Discarding unreadable cache entry %s: %s", path, e)
+            self._remove(path)
+            return None
+        return entry
+
+    def put(self, key: str, entry: Dict):
+        if not self.enabled:
+            return
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(_encode_entry(entry))
+            os.replace(tmp_path, self.path(key))
+        except OSError as e:  # read-only or full disk: caching is best effort
+            logger.warning("Could not write cache entry %s: %s", key[:16], e)
+            return
+        self.evict()
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits in ``max_bytes``"""
+        entries = []
+        for path in glob.glob(os.path.join(self.directory, "*.entry")):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:  # evicted by another worker
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+            logger.debug("Evicted cache entry %s", path)
+
+    def _remove(self, path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
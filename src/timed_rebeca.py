@@ -0,0 +1,446 @@
+import ast
+import logging
+import operator
+import re
+from typing import Dict, List, Tuple
+
+from lark import Lark, Token, Transformer
+
+from src.grammar import timed_rebeca_grammar
+from src.parser_cache import get_transforming_parser
+
+logger = logging.getLogger(__name__)
+
+UNBOUNDED = float("inf")
+# The only operations an after/delay constant may fold; "/" is rewritten to "//"
+_BINARY_OPERATORS = {ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul,
+                     ast.FloorDiv: operator.floordiv, ast.Mod: operator.mod}
+_UNARY_OPERATORS = {ast.UAdd: operator.pos, ast.USub: operator.neg}
+
+
+# ======== Expression helpers (expressions are flat token lists) ========
+def _read_names(tokens: List[Token]) -> set:
+    return {tok.value for tok in tokens if tok.type == "NAME"}
+
+
+def _split_arguments(tokens: List[Token]) -> List[List[Token]]:
+    """Split a token list on its top-level commas"""
+    parts, current, depth = [], [], 0
+    for tok in tokens:
+        if tok.type in ("LPAR", "LSQB"):
+            depth += 1
+        elif tok.type in ("RPAR", "RSQB"):
+            depth -= 1
+        if tok.type == "COMMA" and depth == 0:
+            parts.append(current)
+            current = []
+        else:
+            current.append(tok)
+    parts.append(current)
+    return parts
+
+
+def _constant_range(tokens: List[Token], env: Dict[str, int]) -> Tuple[float, float]:
+    """(min, max) value of an after/delay expression; (0, inf) when it depends on run-time state"""
+    if not tokens:
+        return 0, 0
+    # ?(a, b, ...) picks one alternative nondeterministically
+    if tokens[0].type == "QMARK" and tokens[1].type == "LPAR" and tokens[-1].type == "RPAR":
+        ranges = [_constant_range(alt, env) for alt in _split_arguments(tokens[2:-1])]
+        return min(r[0] for r in ranges), max(r[1] for r in ranges)
+
+    text = []
+    for tok in tokens:
+        if tok.type == "NAME":
+            if tok.value not in env:
+                return 0, UNBOUNDED
+            text.append(str(env[tok.value]))
+        elif tok.type == "OP" and tok.value == "/":
+            text.append("//")
+        else:
+            text.append(tok.value)
+    try:
+        value = max(0, _fold_int(ast.parse(" ".join(text), mode="eval").body))
+    except (SyntaxError, ZeroDivisionError, ValueError, RecursionError):
+        return 0, UNBOUNDED
+    return value, value
+
+
+def _fold_int(node: ast.AST) -> int:
+    """Value of an expression built only from int literals, + - * // % and unary + -; ValueError otherwise"""
+    if isinstance(node, ast.Constant) and type(node.value) is int:
+        return node.value
+    if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPERATORS:
+        return _BINARY_OPERATORS[type(node.op)](_fold_int(node.left), _fold_int(node.right))
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPERATORS:
+        return _UNARY_OPERATORS[type(node.op)](_fold_int(node.operand))
+    raise ValueError(f"not an integer constant: {ast.dump(node)}")
+
+
+# ======== Timed Rebeca Front-End ========
+class TimedRebecaTransformer(Transformer):
+    """Reduces a Timed Rebeca model to the ASTAnalyzer.get_summary() structure.
+
+    Rules are reduced to small tuples while parsing; ``model`` then resolves
+    inheritance, ``env`` constants and rebec-typed send targets, and folds every
+    message server (and constructor) into reads/writes/sends/send_times/delay.
+    Sends to a known rebec keep the known-rebec name; each main instance carries
+    its ``knownrebecs`` bindings so the ERDG builder can map it to an instance.
+    A rebec-typed state variable that only the constructor sets, straight from
+    a parameter, is bound the same way from the instance's constructor
+    arguments (``None`` for ``null``). Sends through other rebec-typed variables
+    or a cast such as ``((Train)sender)`` target the class, expanded to its
+    instantiated subclasses; the builder sends them to every instance.
+    """
+
+    # ---- expressions ----
+    def expr(self, children):
+        tokens = []
+        for child in children:
+            if isinstance(child, list):
+                tokens.extend(child)
+            else:
+                tokens.append(child)
+        return tokens
+
+    item = expr
+
+    def type(self, children):
+        return children[0].value
+
+    # ---- declarations ----
+    def env_decl(self, children):
+        return ("env", children[1].value, children[2])
+
+    def field_decl(self, children):
+        return [(children[0], name.value) for name in children[1:]]
+
+    def knownrebecs(self, children):
+        return ("knownrebecs", [field for decl in children for field in decl])
+
+    def statevars(self, children):
+        return ("statevars", [field for decl in children for field in decl])
+
+    def param(self, children):
+        return children[0], children[1].value
+
+    def params(self, children):
+        return children
+
+    def constructor(self, children):
+        params = children[1] if len(children) > 2 else []
+        return ("constructor", children[0].value, params, children[-1])
+
+    def msgsrv(self, children):
+        params = children[1] if len(children) > 2 else []
+        return ("msgsrv", children[0].value, params, children[-1])
+
+    def abstract_msgsrv(self, children):
+        return ("abstract_msgsrv", children[1].value)
+
+    def extends(self, children):
+        return ("extends", children[0].value)
+
+    def class_decl(self, children):
+        cls = {"abstract": False, "parent": None, "knownrebecs": [], "statevars": [],
+               "constructor": None, "msgsrvs": {}}
+        for child in children:
+            if isinstance(child, Token):
+                if child.type == "ABSTRACT":
+                    cls["abstract"] = True
+                elif child.type == "NAME":
+                    cls["name"] = child.value
+            elif child[0] == "extends":
+                cls["parent"] = child[1]
+            elif child[0] in ("knownrebecs", "statevars"):
+                cls[child[0]].extend(child[1])
+            elif child[0] == "constructor":
+                cls["constructor"] = child[1:]
+            elif child[0] == "msgsrv":
+                cls["msgsrvs"][child[1]] = child[1:]
+        return ("class", cls)
+
+    # ---- statements ----
+    def block(self, children):
+        return ("block", [child for child in children if child is not None])
+
+    def empty_stmt(self, children):
+        return None
+
+    def if_stmt(self, children):
+        return ("if", children[0], [child for child in children[1:] if child is not None])
+
+    def while_stmt(self, children):
+        return ("while", children[0], children[1])
+
+    def local_decl(self, children):
+        return ("decl", children[0].value, children[1].value, children[2] if len(children) > 2 else [])
+
+    def lvalue(self, children):
+        return children[0].value, [tok for index in children[1:] for tok in index]
+
+    def assign_stmt(self, children):
+        (name, index), op = children[0], children[1]
+        value = children[2] if len(children) > 2 else []
+        compound = op.value != "="
+        return ("assign", name, index + value, compound)
+
+    def timing(self, children):
+        return children[0].value, children[1]
+
+    def send_stmt(self, children):
+        if isinstance(children[0], Token):
+            target = ("name", children[0].value)
+        else:
+            target = ("dynamic", children[0])
+        rest = children[2:]
+        args = rest[0] if rest and isinstance(rest[0], list) else []
+        timings = dict(child for child in rest if isinstance(child, tuple))
+        return ("send", target, children[1].value, args, timings.get("after", []))
+
+    def call_stmt(self, children):
+        rest = children[1:]
+        args = rest[0] if rest and isinstance(rest[0], list) else []
+        timings = dict(child for child in rest if isinstance(child, tuple))
+        return ("call", children[0].value, args, timings.get("after", []))
+
+    # ---- main ----
+    def instance_decl(self, children):
+        bindings = [child.value for child in children[2:] if isinstance(child, Token)]
+        args = next((child for child in children[2:] if isinstance(child, list)), [])
+        return {"class": children[0].value, "name": children[1].value, "bindings": bindings, "args": args}
+
+    def main_decl(self, children):
+        return children
+
+    # ---- resolution ----
+    def model(self, children):
+        env, classes, instances = {}, {}, []
+        for child in children:
+            if isinstance(child, list):
+                instances = child
+            elif child[0] == "env":
+                low, high = _constant_range(child[2], env)
+                if low == high:
+                    env[child[1]] = low
+            elif child[0] == "class":
+                classes[child[1]["name"]] = child[1]
+
+        instantiated = {inst["class"] for inst in instances}
+        resolved = {name: self._inherit(name, classes) for name in classes}
+
+        def concrete_targets(class_name):
+            """Instantiated classes a message to `class_name` may reach (itself and its subclasses)"""
+            targets = [name for name, cls in resolved.items()
+                       if name in instantiated and class_name in cls["ancestors"]]
+            return targets or [class_name]
+
+        actors, constructor_bound = {}, {}
+        for name, cls in resolved.items():
+            if cls["abstract"]:
+                continue
+            statevars = {var for _, var in cls["statevars"]}
+            rebec_vars = {var: type_ for type_, var in cls["statevars"] if type_ in classes}
+            constructor_bound[name] = self._constructor_bindings(cls, rebec_vars)
+            context = {
+                "env": env,
+                "knownrebecs": dict((var, type_) for type_, var in cls["knownrebecs"]),
+                "rebec_vars": rebec_vars,
+                "bound_vars": constructor_bound[name],
+                "classes": classes,
+                "concrete_targets": concrete_targets,
+            }
+            methods = {}
+            servers = ([cls["constructor"]] if cls["constructor"] else []) + list(cls["msgsrvs"].values())
+            for method_name, params, body in servers:
+                methods[method_name] = self._method_summary(body, params, statevars, context)
+            actors[name] = {"statevars": statevars, "methods": methods}
+
+        main_instances = []
+        for inst in instances:
+            formals = [var for _, var in resolved.get(inst["class"], {}).get("knownrebecs", [])]
+            if len(formals) != len(inst["bindings"]):
+                logger.warning("Instance %s binds %s known rebecs, class %s declares %s",
+                               inst["name"], len(inst["bindings"]), inst["class"], len(formals))
+            bindings = dict(zip(formals, inst["bindings"]))
+            bound = constructor_bound.get(inst["class"], {})
+            if bound:
+                args = _split_arguments(inst["args"])
+                for var, (position, rebec_type) in bound.items():
+                    tokens = args[position] if position < len(args) else []
+                    if len(tokens) == 1 and tokens[0].type == "NAME":
+                        bindings[var] = None if tokens[0].value == "null" else tokens[0].value
+                    else:
+                        # Not a plain rebec name: sends go to the variable's class
+                        bindings[var] = rebec_type
+            main_instances.append({
+                "name": inst["name"],
+                "class": inst["class"],
+                "arg": "".join(tok.value for tok in inst["args"]),
+                "priority": None,
+                "knownrebecs": bindings,
+            })
+        return {"actors": actors, "main_instances": main_instances}
+
+    def _inherit(self, name: str, classes: Dict) -> Dict:
+        """Class with its ancestors' known rebecs, state variables and message servers merged in"""
+        cls = classes[name]
+        parent = classes.get(cls["parent"]) if cls["parent"] else None
+        if parent is None:
+            return dict(cls, ancestors=[name])
+        base = self._inherit(parent["name"], classes)
+        return dict(cls,
+                    knownrebecs=base["knownrebecs"] + cls["knownrebecs"],
+                    statevars=base["statevars"] + cls["statevars"],
+                    msgsrvs={**base["msgsrvs"], **cls["msgsrvs"]},
+                    ancestors=[name] + base["ancestors"])
+
+    def _constructor_bindings(self, cls: Dict, rebec_vars: Dict[str, str]) -> Dict[str, Tuple[int, str]]:
+        """Rebec-typed state variables the constructor sets from a parameter and no message server writes.
+
+        Maps each to (parameter position, declared class).
+        """
+        if not cls["constructor"]:
+            return {}
+        _, params, body = cls["constructor"]
+        positions = {var: position for position, (_, var) in enumerate(params)}
+        bound = {}
+        for stmt in body[1]:
+            if stmt[0] != "assign" or stmt[1] not in rebec_vars or stmt[3]:
+                continue
+            tokens = stmt[2]
+            if len(tokens) == 1 and tokens[0].type == "NAME" and tokens[0].value in positions:
+                bound[stmt[1]] = (positions[tokens[0].value], rebec_vars[stmt[1]])
+            else:
+                bound.pop(stmt[1], None)
+        # Assigned anywhere else (a message server or a nested constructor statement): not fixed per instance
+        elsewhere = [("block", [stmt for stmt in body[1] if stmt[0] != "assign"])]
+        elsewhere += [msgsrv_body for _, _, msgsrv_body in cls["msgsrvs"].values()]
+        for fragment in elsewhere:
+            for name in self._assigned_names(fragment):
+                bound.pop(name, None)
+        return bound
+
+    def _assigned_names(self, stmt) -> set:
+        """State or local names assigned anywhere inside a statement fragment"""
+        if stmt is None:
+            return set()
+        kind = stmt[0]
+        if kind == "assign":
+            return {stmt[1]}
+        if kind == "block":
+            return set().union(*map(self._assigned_names, stmt[1]))
+        if kind == "if":
+            return set().union(*map(self._assigned_names, stmt[2]))
+        if kind == "while":
+            return self._assigned_names(stmt[2])
+        return set()
+
+    def _method_summary(self, body, params, statevars, context) -> Dict:
+        method_info = {
+            "priority": None,
+            "sends": [],
+            "send_times": [],
+            "reads": set(),
+            "writes": set(),
+            "delay": 0
+        }
+        scope = {"locals": {var: type_ for type_, var in params}, "statevars": statevars}
+        scope.update(context)
+        _, method_info["delay"] = self._fold([body], (0, 0), method_info, scope)
+        return method_info
+
+    def _state_reads(self, tokens, scope) -> set:
+        return {name for name in _read_names(tokens)
+                if name in scope["statevars"] and name not in scope["locals"]}
+
+    def _resolve_target(self, target, scope) -> List[str]:
+        kind, value = target
+        if kind == "dynamic":
+            # ((Class)expr): a cast names the receiving class
+            names = [tok.value for tok in value if tok.type == "NAME"]
+            casts = [name for name in names if name in scope["classes"]]
+            if casts:
+                return scope["concrete_targets"](casts[0])
+            if len(names) == 1:
+                return self._resolve_target(("name", names[0]), scope)
+            return []
+        if value == "self":
+            return ["self"]
+        if value in scope["knownrebecs"]:
+            return [value]
+        if value in scope["bound_vars"] and value not in scope["locals"]:
+            return [value]
+        rebec_type = scope["locals"].get(value) or scope["rebec_vars"].get(value)
+        if rebec_type in scope["classes"]:
+            return scope["concrete_targets"](rebec_type)
+        if value == "sender":
+            logger.debug("Skipping send to un-cast sender")
+            return []
+        return [value]
+
+    def _fold(self, statements, offset, method_info, scope):
+        """Fold statement fragments in source order; returns the final time offset range"""
+        earliest, latest = offset
+        for stmt in statements:
+            if stmt is None:
+                continue
+            kind = stmt[0]
+            if kind == "block":
+                earliest, latest = self._fold(stmt[1], (earliest, latest), method_info, scope)
+            elif kind == "decl":
+                scope["locals"][stmt[2]] = stmt[1]
+                method_info["reads"] |= self._state_reads(stmt[3], scope)
+            elif kind == "assign":
+                _, name, tokens, compound = stmt
+                if name in scope["statevars"] and name not in scope["locals"]:
+                    method_info["writes"].add(name)
+                    if compound:
+                        method_info["reads"].add(name)
+                method_info["reads"] |= self._state_reads(tokens, scope)
+            elif kind == "send":
+                _, target, message, args, after = stmt
+                low, high = _constant_range(after, scope["env"])
+                method_info["reads"] |= self._state_reads(args + after, scope)
+                if target[0] == "name":
+                    method_info["reads"] |= self._state_reads([Token("NAME", target[1])], scope)
+                for resolved in self._resolve_target(target, scope):
+                    method_info["sends"].append((resolved, message))
+                    method_info["send_times"].append((earliest + low, latest + high))
+            elif kind == "call":
+                _, name, args, after = stmt
+                method_info["reads"] |= self._state_reads(args + after, scope)
+                if name == "delay":
+                    low, high = _constant_range(args, scope["env"])
+                    earliest, latest = earliest + low, latest + high
+                elif name != "assertion":
+                    # A bare call is a send to self
+                    low, high = _constant_range(after, scope["env"])
+                    method_info["sends"].append(("self", name))
+                    method_info["send_times"].append((earliest + low, latest + high))
+            elif kind == "if":
+                method_info["reads"] |= self._state_reads(stmt[1], scope)
+                branches = [self._fold([branch], (earliest, latest), method_info, scope) for branch in stmt[2]]
+                if len(branches) < 2:
+                    branches.append((earliest, latest))
+                earliest = min(b[0] for b in branches)
+                latest = max(b[1] for b in branches)
+            elif kind == "while":
+                method_info["reads"] |= self._state_reads(stmt[1], scope)
+                scratch = {"sends": [], "send_times": [], "reads": set(), "writes": set()}
+                after_once = self._fold([stmt[2]], (earliest, latest), scratch, scope)
+                # A body that advances time can repeat arbitrarily often
+                if after_once != (earliest, latest):
+                    latest = UNBOUNDED
+                self._fold([stmt[2]], (earliest, latest), method_info, scope)
+        return earliest, latest
+
+
+def build_timed_rebeca_parser() -> Lark:
+    """LALR parser for Timed Rebeca whose parse() returns the analysis summary"""
+    return get_transforming_parser(TimedRebecaTransformer(), source=timed_rebeca_grammar)
+
+
+def is_timed_rebeca(code: str) -> bool:
+    """Whether a model is written in Timed Rebeca (reactiveclass) rather than the actorclass language"""
+    return re.search(r"\breactiveclass\b", code) is not None
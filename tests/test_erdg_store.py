@@ -0,0 +1,32 @@
+import io
+
+from src.erdg_builder import ERDGTestGenerator
+from src.main import EXAMPLE_MODEL, analyze_model
+
+
+def built_and_loaded():
+    generator = ERDGTestGenerator(analyze_model(EXAMPLE_MODEL)[0])
+    list(generator.iter_dependency_guided_tests())
+    buffer = io.BytesIO()
+    generator.save(buffer)
+    return generator, ERDGTestGenerator.load(buffer.getvalue())
+
+
+def test_loaded_generator_answers_dependency_queries():
+    built, loaded = built_and_loaded()
+    rebecs = [r.name for r in built.N_R]
+    for r1 in rebecs:
+        for r2 in rebecs:
+            assert loaded.are_actor_dependent(r1, r2) == built.are_actor_dependent(r1, r2)
+            assert loaded.messages_may_interfere([r1], [r2]) == built.messages_may_interfere([r1], [r2])
+    servers = [str(m) for m in built.N_M]
+    for src_ms in servers:
+        for dst_ms in servers:
+            assert loaded.has_causal_path(src_ms, dst_ms) == built.has_causal_path(src_ms, dst_ms)
+
+
+def test_loaded_generator_keeps_test_cases():
+    built, loaded = built_and_loaded()
+    assert loaded.num_test_cases == built.num_test_cases
+    assert [loaded.test_case_at(i) for i in range(min(20, loaded.num_test_cases))] == \
+        [built.test_case_at(i) for i in range(min(20, built.num_test_cases))]
@@ -0,0 +1,74 @@
+import os
+import random
+import subprocess
+import sys
+
+import pytest
+
+from benchmarks.synthetic import generate_summary
+from src.erdg_builder import ERDGTestGenerator
+from src.factorized_output import FactorizedReader, write_factorized_test_cases
+from src.main import EXAMPLE_MODEL, analyze_model, parse_args, run_model
+
+REPO_ROOT = os.path.join(os.path.dirname(__file__), os.pardir)
+BENCHMARK_DIR = os.path.join(REPO_ROOT, "Benchmark")
+REDUCTIONS = [{}, {"symmetry_reduction": True}, {"partial_order_reduction": True}]
+SAMPLES = 40
+
+
+def summaries():
+    with open(os.path.join(BENCHMARK_DIR, "8.SegmentedHaulage.txt")) as f:
+        haulage = analyze_model(f.read())[0]
+    return [("example", analyze_model(EXAMPLE_MODEL)[0]), ("SegmentedHaulage", haulage),
+            ("synthetic", generate_summary(actors=9, classes=3, methods_per_class=5, fan_out=1))]
+
+
+@pytest.mark.parametrize("reductions", REDUCTIONS, ids=lambda r: "+".join(r) or "plain")
+@pytest.mark.parametrize("case", summaries(), ids=lambda case: case[0])
+def test_reader_expands_ranks_like_test_case_at(tmp_path, case, reductions):
+    test_generator = ERDGTestGenerator(case[1], **reductions)
+    test_generator.iter_dependency_guided_tests()
+    path = str(tmp_path / "cases.jsonl.gz")
+    write_factorized_test_cases(path, test_generator, 0, test_generator.num_test_cases)
+    reader = FactorizedReader(path)
+
+    total = test_generator.num_test_cases
+    rnd = random.Random(0)
+    ranks = [0, 1, total - 1] + [rnd.randrange(total) for _ in range(SAMPLES)]
+    for rank in ranks:
+        expected, expanded = test_generator.test_case_at(rank), reader.test_case(rank)
+        # Compare the printed form too: the text output depends on dict order
+        assert expanded == expected and repr(expanded) == repr(expected)
+    assert reader.runs == [(0, total)] and reader.num_test_cases == total
+    with pytest.raises(IndexError):
+        reader.test_case(total)
+
+
+def expand(path, output):
+    subprocess.run([sys.executable, "-m", "src.factorized_output", str(path), str(output)], cwd=REPO_ROOT,
+                   capture_output=True, check=True)
+    return output.read_bytes()
+
+
+def generate(tmp_path, argv, name):
+    output = tmp_path / name
+    run_model(EXAMPLE_MODEL, parse_args(["--no-cache", *argv]), str(output))
+    return output
+
+
+@pytest.mark.parametrize("selection", [[], ["--shard", "0", "3"], ["--shard", "2", "3"], ["--range", "7", "20"]],
+                         ids=lambda argv: " ".join(argv) or "full")
+@pytest.mark.parametrize("reduction", [[], ["--partial-order"]], ids=lambda argv: " ".join(argv) or "plain")
+def test_expansion_is_byte_identical_to_text_output(tmp_path, selection, reduction):
+    text = generate(tmp_path, [*reduction, *selection], "cases.txt").read_bytes()
+    factorized = generate(tmp_path, ["--output-format", "factorized", *reduction, *selection], "cases.jsonl.gz")
+    assert expand(factorized, tmp_path / "expanded.txt") == text
+
+
+def test_expanded_shards_concatenate_to_the_full_output(tmp_path):
+    full = generate(tmp_path, [], "full.txt").read_bytes()
+    shards = b""
+    for k in range(4):
+        factorized = generate(tmp_path, ["--output-format", "factorized", "--shard", str(k), "4"], f"{k}.jsonl.gz")
+        shards += expand(factorized, tmp_path / f"{k}.txt")
+    assert shards == full
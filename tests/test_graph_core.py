@@ -0,0 +1,60 @@
+import sys
+
+from src.erdg_builder import ERDGTestGenerator, _strongly_connected_components
+from src.graph_core import GraphCore
+
+# Deeper than any recursion limit: a recursive DFS would overflow
+CHAIN_LENGTH = 100_000
+
+
+def empty_generator():
+    return ERDGTestGenerator({"actors": {}, "main_instances": []})
+
+
+def test_chain_is_deeper_than_recursion_limit():
+    assert CHAIN_LENGTH > sys.getrecursionlimit()
+
+
+def test_tarjan_on_long_chain():
+    successors = [[i + 1] for i in range(CHAIN_LENGTH - 1)] + [[]]
+    components = _strongly_connected_components(successors)
+    # One singleton per node, sinks first
+    assert components == [[i] for i in reversed(range(CHAIN_LENGTH))]
+
+
+def test_tarjan_on_long_cycle():
+    successors = [[(i + 1) % CHAIN_LENGTH] for i in range(CHAIN_LENGTH)]
+    components = _strongly_connected_components(successors)
+    assert len(components) == 1
+    assert sorted(components[0]) == list(range(CHAIN_LENGTH))
+
+
+def test_topological_sort_on_long_chain():
+    # Edges listed back to front so the order cannot come from insertion order
+    hag = {"groups": [[f"r{i}"] for i in range(CHAIN_LENGTH)],
+           "edges": [(i, i + 1) for i in reversed(range(CHAIN_LENGTH - 1))]}
+    assert empty_generator()._topological_sort(hag) == list(range(CHAIN_LENGTH))
+
+
+def test_topological_sort_on_long_cycle():
+    hag = {"groups": [[f"r{i}"] for i in range(CHAIN_LENGTH)],
+           "edges": [(i, (i + 1) % CHAIN_LENGTH) for i in range(CHAIN_LENGTH)]}
+    assert empty_generator()._topological_sort(hag) == list(range(CHAIN_LENGTH))
+
+
+def test_connected_components_on_long_chain():
+    nodes = [f"r{i}" for i in range(CHAIN_LENGTH)]
+    graph = {"nodes": nodes, "edges": [(nodes[i], nodes[i + 1]) for i in range(CHAIN_LENGTH - 1)]}
+    components = empty_generator()._find_connected_components(graph)
+    assert components == [nodes]
+
+
+def test_graph_core_adjacency_follows_insertion_order():
+    graph = GraphCore()
+    graph.add_edge("E", "a", "c")
+    graph.add_edge("E", "b", "a")
+    graph.add_edge("E", "a", "b")
+    a, b, c = (graph.nodes.id(name) for name in "abc")
+    assert list(graph.successors("E", a)) == [c, b]
+    assert list(graph.predecessors("E", a)) == [b]
+    assert graph.edges("E") == [("a", "c"), ("b", "a"), ("a", "b")]
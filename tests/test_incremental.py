@@ -0,0 +1,100 @@
+import copy
+
+import pytest
+
+from benchmarks.bench_incremental import EDITS, fingerprint
+from benchmarks.synthetic import generate_summary
+from src.erdg_builder import ERDGTestGenerator
+from src.main import EXAMPLE_MODEL, analyze_model
+
+REDUCTIONS = [{}, {"symmetry_reduction": True}, {"partial_order_reduction": True}]
+
+
+def edit_reads(summary):
+    """Class1.m2 reads nothing and writes what it used to read"""
+    method = summary["actors"]["Class1"]["methods"]["m2"]
+    method["reads"], method["writes"] = set(), set(method["reads"]) | {"v0"}
+
+
+def edit_delay(summary):
+    """Class0.m0 now delays and sends after a while, which moves start windows"""
+    method = summary["actors"]["Class0"]["methods"]["m0"]
+    method["delay"] = 5
+    method["send_times"] = [(5, 8)] * len(method["sends"])
+
+
+def edit_silence(summary):
+    """Class2's message servers stop sending, which removes AG edges"""
+    for method_name, method in summary["actors"]["Class2"]["methods"].items():
+        if method_name != "class2":
+            method["sends"] = []
+
+
+def edit_drop_method(summary):
+    """Class2 loses m4, so sends to it no longer resolve"""
+    del summary["actors"]["Class2"]["methods"]["m4"]
+
+
+def edit_new_class(summary):
+    """A new class whose instance replaces r4"""
+    summary["actors"]["Extra"] = {"statevars": {"x"}, "methods": {
+        "extra": {"priority": None, "sends": [("self", "m0")], "reads": set(), "writes": {"x"}},
+        "m0": {"priority": None, "sends": [("r0", "m1")], "reads": {"x"}, "writes": {"x"}}}}
+    summary["main_instances"][4] = {"name": "r4", "class": "Extra", "arg": "Extra", "priority": None}
+
+
+def edit_new_instance(summary):
+    """One more Class1 instance, which changes target resolution everywhere"""
+    summary["main_instances"].append({"name": "r9", "class": "Class1", "arg": "Class1", "priority": None})
+    summary["actors"]["Class0"]["methods"]["m3"]["sends"].append(("r9", "m1"))
+
+
+ALL_EDITS = {**EDITS, "reads": edit_reads, "delay": edit_delay, "silence": edit_silence, "drop method": edit_drop_method,
+             "new class": edit_new_class, "new instance": edit_new_instance}
+
+
+def full_fingerprint(test_generator):
+    return fingerprint(test_generator), test_generator.ms_start_windows, [str(a) for a in test_generator.N_A]
+
+
+def prepared(summary, reductions):
+    test_generator = ERDGTestGenerator(summary, **reductions)
+    test_generator._prepare_dependency_guided_tests(materialize=False)
+    return test_generator
+
+
+@pytest.mark.parametrize("reductions", REDUCTIONS, ids=lambda r: "+".join(r) or "plain")
+@pytest.mark.parametrize("label", ALL_EDITS)
+@pytest.mark.parametrize("seed", range(3))
+def test_update_analysis_matches_fresh_run(seed, label, reductions):
+    summary = generate_summary(actors=9, classes=3, methods_per_class=5, fan_out=2, seed=seed)
+    test_generator = prepared(summary, reductions)
+    edited = copy.deepcopy(summary)
+    ALL_EDITS[label](edited)
+
+    report = test_generator.update_analysis(edited)
+
+    assert not report["full_rebuild"]
+    assert full_fingerprint(test_generator) == full_fingerprint(prepared(edited, reductions))
+    assert [test_generator.index_of(test_generator.test_case_at(r)) for r in range(20)] == list(range(20))
+
+
+@pytest.mark.parametrize("reductions", REDUCTIONS, ids=lambda r: "+".join(r) or "plain")
+def test_chained_edits_on_example(reductions):
+    """Several edits applied one after another to the same generator"""
+    summary = analyze_model(EXAMPLE_MODEL)[0]
+    test_generator = prepared(summary, reductions)
+    for actor_class, actor_info in sorted(summary["actors"].items()):
+        summary = copy.deepcopy(summary)
+        for method in summary["actors"][actor_class]["methods"].values():
+            method["writes"] = method["writes"] | set(actor_info["statevars"])
+        test_generator.update_analysis(summary)
+        assert full_fingerprint(test_generator) == full_fingerprint(prepared(summary, reductions))
+
+
+def test_unchanged_summary_rebuilds_nothing():
+    summary = generate_summary(actors=9, classes=3, methods_per_class=5, fan_out=2)
+    test_generator = prepared(summary, {})
+    report = test_generator.update_analysis(copy.deepcopy(summary))
+    assert report["rebuilt_instances"] == 0
+    assert full_fingerprint(test_generator) == full_fingerprint(prepared(summary, {}))
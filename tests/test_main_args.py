@@ -0,0 +1,30 @@
+import pytest
+
+from src.main import EXAMPLE_MODEL, parse_args, run_model
+
+
+@pytest.mark.parametrize("shard", [("0", "0"), ("0", "-2"), ("3", "3"), ("-1", "4")])
+def test_invalid_shard_is_a_usage_error(shard, capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        parse_args(["--shard", *shard])
+    assert exit_info.value.code == 2
+    assert "--shard" in capsys.readouterr().err
+
+
+def test_valid_shard_is_accepted():
+    assert parse_args(["--shard", "2", "3"]).shard == [2, 3]
+
+
+@pytest.mark.parametrize("bounds", [("-5", "3"), ("8", "2")])
+def test_invalid_range_is_a_usage_error(bounds, capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        parse_args(["--range", *bounds])
+    assert exit_info.value.code == 2
+    assert "--range" in capsys.readouterr().err
+
+
+def test_range_past_the_end_is_clamped(tmp_path):
+    output = tmp_path / "cases.txt"
+    row = run_model(EXAMPLE_MODEL, parse_args(["--no-cache", "--range", "5", "1000"]), str(output))
+    assert row["emitted"] == row["test_cases"] - 5
+    assert output.read_text().startswith("Test Case 6:")
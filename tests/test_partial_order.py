@@ -0,0 +1,109 @@
+import random
+from itertools import combinations, permutations
+from math import factorial
+
+import pytest
+
+from src.erdg_builder import (ERDGTestGenerator, _count_conflict_orderings, _rank_conflict_ordering,
+                              _unrank_conflict_ordering)
+
+
+def orientation(ordering, conflicts):
+    position = {m: i for i, m in enumerate(ordering)}
+    return frozenset((a, b) if position[a] < position[b] else (b, a) for a, b in conflicts)
+
+
+def brute_force_orientations(methods, conflicts):
+    """Distinct acyclic orientations, found by ordering the methods every possible way"""
+    return {orientation(ordering, conflicts) for ordering in permutations(methods)}
+
+
+def random_conflicts(rnd, methods, density):
+    return [(a, b) for a, b in combinations(methods, 2) if rnd.random() < density]
+
+
+def graphs():
+    methods = [f"m{i}" for i in range(6)]
+    cases = {
+        "chain": (methods, list(zip(methods, methods[1:]))),
+        "complete": (methods, list(combinations(methods, 2))),
+        "cycle": (methods, list(zip(methods, methods[1:])) + [(methods[0], methods[-1])]),
+        "two writers, four readers": (methods, [(w, m) for w in methods[:2] for m in methods if m > w]),
+        "no conflicts": (methods, []),
+    }
+    rnd = random.Random(0)
+    for seed in range(30):
+        n = rnd.randint(1, 7)
+        cases[f"random-{seed}"] = ([f"m{i}" for i in range(n)],
+                                   random_conflicts(rnd, [f"m{i}" for i in range(n)], rnd.random()))
+    return cases
+
+
+GRAPHS = graphs()
+
+
+@pytest.mark.parametrize("name", GRAPHS)
+def test_count_matches_brute_force(name):
+    methods, conflicts = GRAPHS[name]
+    assert _count_conflict_orderings(methods, conflicts) == len(brute_force_orientations(methods, conflicts))
+
+
+@pytest.mark.parametrize("n", range(1, 9))
+def test_closed_form_block_counts(n):
+    methods = [f"m{i}" for i in range(n)]
+    assert _count_conflict_orderings(methods, list(zip(methods, methods[1:]))) == 2 ** (n - 1)
+    assert _count_conflict_orderings(methods, list(combinations(methods, 2))) == factorial(n)
+    if n >= 3:
+        # Inclusion-exclusion over sources on a cycle: 2^n - 2
+        cycle = list(zip(methods, methods[1:])) + [(methods[0], methods[-1])]
+        assert _count_conflict_orderings(methods, cycle) == 2 ** n - 2
+
+
+@pytest.mark.parametrize("name", GRAPHS)
+def test_unrank_covers_every_orientation_once(name):
+    methods, conflicts = GRAPHS[name]
+    count = _count_conflict_orderings(methods, conflicts)
+    orderings = [_unrank_conflict_ordering(methods, conflicts, i) for i in range(count)]
+    assert {orientation(o, conflicts) for o in orderings} == brute_force_orientations(methods, conflicts)
+    assert [_rank_conflict_ordering(methods, conflicts, o) for o in orderings] == list(range(count))
+    # Ordering 0 follows the given pair directions
+    assert orientation(orderings[0], conflicts) == frozenset(conflicts)
+
+
+@pytest.mark.parametrize("name", GRAPHS)
+def test_rank_depends_only_on_the_orientation(name):
+    methods, conflicts = GRAPHS[name]
+    for ordering in permutations(methods):
+        rank = _rank_conflict_ordering(methods, conflicts, ordering)
+        assert orientation(_unrank_conflict_ordering(methods, conflicts, rank), conflicts) \
+            == orientation(ordering, conflicts)
+
+
+def test_class_conflicts_come_from_reads_and_writes():
+    methods = {"a": ({"x"}, set()), "b": (set(), {"x"}), "c": (set(), {"x"}), "d": ({"y"}, {"y"})}
+    summary = {
+        "actors": {"Store": {"statevars": {"x", "y"}, "knownrebecs": {},
+                         "methods": {m: {"writes": writes, "reads": reads, "sends": []}
+                                     for m, (writes, reads) in methods.items()}}},
+        "main_instances": [{"name": "r", "class": "Store", "arg": "Store", "priority": None}],
+    }
+    # Readers of x do not conflict with each other; d only touches y
+    assert ERDGTestGenerator(summary)._class_conflicts("Store") == [("a", "b"), ("a", "c")]
+
+
+@pytest.mark.parametrize("partial_order", [False, True])
+def test_step4_orderings_are_not_listed(partial_order):
+    # 12 methods that all write one variable: 12! orderings either way
+    methods = [f"m{i}" for i in range(12)]
+    summary = {
+        "actors": {"Store": {"statevars": {"x"}, "knownrebecs": {"peer": "Store"},
+                             "methods": {m: {"writes": {"x"}, "reads": set(), "sends": [("peer", n)],
+                                             "delay": 0, "priority": None, "send_times": [(0, 0)]}
+                                         for m, n in zip(methods, methods[1:] + methods[:1])}}},
+        "main_instances": [{"name": "peer", "class": "Store", "arg": "Store", "priority": None}],
+    }
+    test_generator = ERDGTestGenerator(summary, partial_order_reduction=partial_order)
+    test_generator.iter_dependency_guided_tests()
+    assert test_generator.class_orderings["Store"] == factorial(12)
+    last = test_generator.num_test_cases - 1
+    assert test_generator.index_of(test_generator.test_case_at(last)) == last
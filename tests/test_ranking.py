@@ -0,0 +1,62 @@
+import glob
+import os
+from itertools import islice
+
+import pytest
+
+from benchmarks.synthetic import generate_summary
+from src.erdg_builder import ERDGTestGenerator
+from src.main import EXAMPLE_MODEL, analyze_model
+
+BENCHMARK_DIR = os.path.join(os.path.dirname(__file__), os.pardir, "Benchmark")
+REDUCTIONS = [{}, {"symmetry_reduction": True}, {"partial_order_reduction": True},
+              {"symmetry_reduction": True, "partial_order_reduction": True}]
+# Sampled ranks per model, and how many leading cases are compared with the streamed enumeration
+SAMPLES = 40
+PREFIX = 200
+
+
+def summaries():
+    cases = [("example", analyze_model(EXAMPLE_MODEL)[0])]
+    for path in sorted(glob.glob(os.path.join(BENCHMARK_DIR, "*.txt"))):
+        with open(path) as f:
+            cases.append((os.path.basename(path), analyze_model(f.read())[0]))
+    cases += [(f"synthetic-{seed}", generate_summary(actors=9, classes=3, methods_per_class=5, fan_out=1, seed=seed))
+              for seed in range(5)]
+    return cases
+
+
+def generator(summary, reductions):
+    test_generator = ERDGTestGenerator(summary, **reductions)
+    test_generator.iter_dependency_guided_tests()
+    return test_generator
+
+
+@pytest.fixture(scope="module", params=summaries(), ids=lambda case: case[0])
+def summary(request):
+    return request.param[1]
+
+
+@pytest.mark.parametrize("reductions", REDUCTIONS, ids=lambda r: "+".join(r) or "plain")
+def test_unrank_then_rank_is_identity(summary, reductions):
+    test_generator = generator(summary, reductions)
+    assert ERDGTestGenerator(summary, **reductions).count_test_cases()["total"] == test_generator.num_test_cases
+    step = max(1, test_generator.num_test_cases // SAMPLES)
+    ranks = list(range(0, test_generator.num_test_cases, step))[:SAMPLES] + [test_generator.num_test_cases - 1]
+    for rank in ranks:
+        assert test_generator.index_of(test_generator.test_case_at(rank)) == rank
+
+
+@pytest.mark.parametrize("reductions", REDUCTIONS, ids=lambda r: "+".join(r) or "plain")
+def test_test_case_at_follows_streamed_order(summary, reductions):
+    test_generator = generator(summary, reductions)
+    for rank, streamed in enumerate(islice(test_generator.iter_prioritized_test_cases(), PREFIX)):
+        assert test_generator.test_case_at(rank) == streamed
+
+
+def test_rank_out_of_range():
+    test_generator = generator(analyze_model(EXAMPLE_MODEL)[0], {})
+    with pytest.raises(IndexError):
+        test_generator.test_case_at(test_generator.num_test_cases)
+    with pytest.raises(IndexError):
+        test_generator.test_case_at(-1)
@@ -0,0 +1,121 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from src.main import EXAMPLE_MODEL, parse_args, run_model
+from src.parser_cache import ensure_private_dir
+from src.result_cache import ResultCache, result_key
+
+REPO_ROOT = os.path.join(os.path.dirname(__file__), os.pardir)
+# Options that change what run_model produces, each with the arguments that set it
+OPTION_ARGS = {"symmetry": ["--symmetry"], "partial_order": ["--partial-order"], "count_only": ["--count-only"],
+               "output_format": ["--output-format", "factorized"], "single_pass": ["--single-pass"]}
+
+
+class RecordingCache(ResultCache):
+    """ResultCache that remembers the keys it was asked for and whether each lookup hit"""
+
+    def __init__(self, directory):
+        super().__init__(directory)
+        self.lookups = []
+
+    def get(self, key):
+        entry = super().get(key)
+        self.lookups.append((key, entry is not None))
+        return entry
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return RecordingCache(str(tmp_path / "results"))
+
+
+def run(cache, tmp_path, argv, name="cases"):
+    output = tmp_path / name
+    row = run_model(EXAMPLE_MODEL, parse_args(argv), str(output), metrics=None, cache=cache)
+    return row, output.read_bytes() if output.exists() else None
+
+
+# ======== Key composition ========
+def test_every_option_gets_its_own_key(cache, tmp_path):
+    keys = set()
+    for argv in [[], *OPTION_ARGS.values()]:
+        run(cache, tmp_path, argv)
+        keys.add(cache.lookups[-1][0])
+    assert len(keys) == len(OPTION_ARGS) + 1
+    assert not any(hit for _, hit in cache.lookups)
+
+
+def test_options_that_do_not_shape_the_entry_share_a_key(cache, tmp_path):
+    run(cache, tmp_path, [])
+    run(cache, tmp_path, ["--range", "2", "7", "--render-workers", "1"], name="range")
+    (first, _), (second, hit) = cache.lookups
+    assert first == second and hit
+
+
+def test_key_depends_on_model_text_not_option_order():
+    options = {"symmetry": True, "partial_order": False, "single_pass": False}
+    assert result_key(EXAMPLE_MODEL, options) == result_key(EXAMPLE_MODEL, dict(reversed(options.items())))
+    assert result_key(EXAMPLE_MODEL, options) != result_key(EXAMPLE_MODEL + "\n", options)
+
+
+# ======== Hit / miss equivalence ========
+@pytest.mark.parametrize("argv", [[], ["--symmetry", "--partial-order"], ["--single-pass"],
+                                  ["--output-format", "factorized"], ["--range", "3", "11"], ["--count-only"]],
+                         ids=lambda argv: " ".join(argv) or "default")
+def test_hit_reproduces_the_miss(cache, tmp_path, argv):
+    miss = run(cache, tmp_path, argv, name="miss")
+    hit = run(cache, tmp_path, argv, name="hit")
+    assert [found for _, found in cache.lookups] == [False, True]
+    if "--count-only" in argv:
+        assert hit[0] == miss[0]
+    assert hit[1] == miss[1]
+    uncached = run(None, tmp_path, argv, name="uncached")
+    assert uncached[1] == miss[1]
+
+
+def test_cache_dir_comes_from_the_environment(tmp_path):
+    env = dict(os.environ, ERDG_CACHE_DIR=str(tmp_path / "cache"))
+    outputs = []
+    for run_index in range(2):
+        output = tmp_path / f"cases{run_index}.txt"
+        result = subprocess.run([sys.executable, "-m", "src.main", "-v", "--output", str(output)], cwd=REPO_ROOT,
+                                env=env, capture_output=True, text=True, check=True)
+        assert ("Result cache hit" if run_index else "Result cache miss") in result.stderr + result.stdout
+        outputs.append(output.read_bytes())
+    assert outputs[0] == outputs[1]
+    assert len(os.listdir(tmp_path / "cache" / "results")) == 1
+    assert oct(os.stat(tmp_path / "cache").st_mode & 0o777) == oct(0o700)
+
+
+# ======== Refused directories ========
+def test_missing_directories_are_created_private(tmp_path):
+    path = tmp_path / "a" / "b"
+    assert ensure_private_dir(str(path))
+    for directory in (tmp_path / "a", path):
+        assert os.stat(directory).st_mode & 0o777 == 0o700
+
+
+@pytest.mark.skipif(os.name != "posix", reason="POSIX permission bits")
+def test_group_writable_directory_is_refused(tmp_path):
+    path = tmp_path / "shared"
+    path.mkdir()
+    os.chmod(path, 0o775)
+    assert not ensure_private_dir(str(path))
+    os.chmod(path, 0o700)
+    assert ensure_private_dir(str(path))
+
+
+@pytest.mark.skipif(not hasattr(os, "getuid"), reason="needs file ownership")
+def test_directory_of_another_user_is_refused(tmp_path, monkeypatch):
+    path = tmp_path / "theirs"
+    path.mkdir(mode=0o700)
+    monkeypatch.setattr(os, "getuid", lambda: os.stat(path).st_uid + 1)
+    assert not ensure_private_dir(str(path))
+
+    refused = ResultCache(str(path))
+    refused.put("key", {"row": {}})
+    assert not refused.enabled and refused.get("key") is None
+    assert os.listdir(path) == []
@@ -0,0 +1,54 @@
+from src.erdg_builder import ERDGTestGenerator
+from src.main import analyze_model
+
+MODEL = """
+actorclass Worker {
+ statevars
+     Boolean busy;
+
+ method job {
+ } end
+}
+
+actorclass Boss {
+ statevars
+     Boolean done;
+
+ method boss {
+     Worker!job;
+     w2!job;
+     W3!job;
+     SELF_CHECK!job;
+ } end
+}
+
+main {
+   w1 actor: (Worker);
+   w2 actor: (Worker);
+   w3 actor: (Worker);
+   b actor: (Boss);
+}
+"""
+
+
+def boss_sends():
+    test_generator = ERDGTestGenerator(analyze_model(MODEL)[0])
+    test_generator.build_erdg()
+    return [(a.target_rebec, i in test_generator.class_targeted_activations)
+            for i, a in enumerate(test_generator.N_A) if a.sender_rebec == "b"]
+
+
+def test_class_name_target_reaches_every_instance_in_declaration_order():
+    assert boss_sends()[:3] == [("w1", True), ("w2", True), ("w3", True)]
+
+
+def test_instance_name_target_is_not_a_class_send():
+    assert boss_sends()[3] == ("w2", False)
+
+
+def test_instance_name_matches_case_insensitively():
+    assert boss_sends()[4] == ("w3", False)
+
+
+def test_unknown_target_is_skipped():
+    assert len(boss_sends()) == 5
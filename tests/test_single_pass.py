@@ -0,0 +1,80 @@
+import glob
+import os
+import random
+
+import pytest
+
+from src.main import EXAMPLE_MODEL, analyze_model
+from src.timed_rebeca import is_timed_rebeca
+
+BENCHMARK_DIR = os.path.join(os.path.dirname(__file__), os.pardir, "Benchmark")
+
+
+def random_statements(rnd, depth):
+    lines = []
+    for _ in range(rnd.randint(0, 3)):
+        kind = rnd.choice(["send", "send", "assign", "delay", "if"] if depth < 3 else ["send", "assign", "delay"])
+        if kind == "send":
+            after = f" after({rnd.randint(1, 5)})" if rnd.random() < 0.3 else ""
+            lines.append(f"r{rnd.randint(0, 2)}!m{rnd.randint(0, 3)}{after};")
+        elif kind == "assign":
+            lines.append(f"v{rnd.randint(0, 1)} = v{rnd.randint(0, 1)} + 1;")
+        elif kind == "delay":
+            lines.append(f"delay({rnd.randint(1, 5)});")
+        else:
+            then = " ".join(random_statements(rnd, depth + 1))
+            otherwise = " ".join(random_statements(rnd, depth + 1))
+            lines.append(f"if (v0) {{ {then} }} else {{ {otherwise} }}")
+    return lines
+
+
+def random_model(seed):
+    """Three instances of one class whose message servers nest if/else up to three levels deep"""
+    rnd = random.Random(seed)
+    methods = []
+    for m in range(4):
+        body = " ".join(random_statements(rnd, 0))
+        methods.append(f" method m{m} {{ {body} }} end")
+    return "\n".join(["actorclass A {", " statevars", "     Int v0;", "     Int v1;", *methods, "}",
+                      "main {", "   r0 actor: (A);", "   r1 actor: (A);", "   r2 actor: (A);", "}"]) + "\n"
+
+
+def actorclass_models():
+    models = [("example", EXAMPLE_MODEL)]
+    for path in sorted(glob.glob(os.path.join(BENCHMARK_DIR, "*.txt"))):
+        with open(path) as f:
+            code = f.read()
+        # Timed Rebeca models have a single front-end; --single-pass only applies to actorclass models
+        if not is_timed_rebeca(code):
+            models.append((os.path.basename(path), code))
+    return models
+
+
+@pytest.mark.parametrize("name, code", actorclass_models())
+def test_single_pass_matches_visitor_on_shipped_models(name, code):
+    assert analyze_model(code, single_pass=True)[0] == analyze_model(code)[0]
+
+
+def test_single_pass_keeps_visitor_send_order_in_nested_if():
+    code = """
+actorclass A {
+ statevars
+     Int x;
+ method a {
+     if (x) { t!a; if (x) { t!b; } else { } } else { t!c; }
+     t!d;
+ } end
+}
+main {
+   t actor: (A);
+}
+"""
+    for single_pass in (False, True):
+        sends = analyze_model(code, single_pass)[0]["actors"]["A"]["methods"]["a"]["sends"]
+        assert [message for _, message in sends] == ["b", "a", "c", "d"]
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_single_pass_matches_visitor_on_random_branching_models(seed):
+    code = random_model(seed)
+    assert analyze_model(code, single_pass=True)[0] == analyze_model(code)[0]
@@ -0,0 +1,49 @@
+import re
+
+import pytest
+from lark import Token
+
+from src.timed_rebeca import UNBOUNDED, _constant_range
+
+TOKEN_TYPES = {"(": "LPAR", ")": "RPAR", "[": "LSQB", "]": "RSQB", ",": "COMMA", "?": "QMARK", ".": "DOT"}
+
+
+def tokens(text):
+    """Flat token list as the Timed Rebeca grammar hands it to _constant_range"""
+    result = []
+    for value in re.findall(r"\d+|\w+|[-+*/%]|\S", text):
+        if value.isdigit():
+            result.append(Token("NUMBER", value))
+        elif re.match(r"\w", value):
+            result.append(Token("NAME", value))
+        else:
+            result.append(Token(TOKEN_TYPES.get(value, "OP"), value))
+    return result
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("", (0, 0)),
+    ("30", (30, 30)),
+    ("NET_DELAY * 2 + 1", (21, 21)),
+    ("7 / 2", (3, 3)),
+    ("-(NET_DELAY % 3) + 2", (1, 1)),
+    ("1 - 5", (0, 0)),
+    ("?(1, NET_DELAY, 4)", (1, 10)),
+    ("?(1, x)", (0, UNBOUNDED)),
+])
+def test_constant_range_folds_env_arithmetic(text, expected):
+    assert _constant_range(tokens(text), {"NET_DELAY": 10}) == expected
+
+
+@pytest.mark.parametrize("text", [
+    "x",
+    "3 / 0",
+    "2 ** 8",
+    "1 < 2",
+    "NET_DELAY . real",
+    "f(1)",
+    "[1][0]",
+    "( 1",
+])
+def test_constant_range_refuses_anything_else(text):
+    assert _constant_range(tokens(text), {"NET_DELAY": 10, "f": 1}) == (0, UNBOUNDED)